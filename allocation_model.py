@@ -0,0 +1,128 @@
+"""Compact allocation records shared by the converter and the load tools.
+
+Records refer to teachers, lines and subjects by index into shared tables instead of
+repeating the strings in every record. Per-subject period values and per-line minutes
+are also stored once in the tables. A record is then a small ``__slots__`` object with
+four indices and its load in minutes, roughly a third of the size of the dict it
+replaces.
+"""
+
+from typing import Dict, List, Sequence
+
+
+class StringTable:
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self.ids[value] = index
+            self.values.append(value)
+        return index
+
+    def canonical(self, value: str) -> str:
+        """Return the table's own copy of ``value`` so equal strings share one object."""
+        return self.values[self.intern(value)]
+
+
+class TeacherRow:
+    """One row of the Teacher Matrix, with each line cell already split into codes."""
+
+    __slots__ = ("name", "allowance_periods", "line_codes")
+
+    def __init__(self, name: str, allowance_periods: float, line_codes: List[List[str]]) -> None:
+        self.name = name
+        self.allowance_periods = allowance_periods
+        self.line_codes = line_codes
+
+    def __repr__(self) -> str:
+        return f"TeacherRow(name={self.name!r}, allowance_periods={self.allowance_periods!r}, line_codes={self.line_codes!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TeacherRow):
+            return NotImplemented
+        return (self.name, self.allowance_periods, self.line_codes) == (
+            other.name,
+            other.allowance_periods,
+            other.line_codes,
+        )
+
+
+class RecordTables:
+    """Teacher, line and subject tables shared by the records of one snapshot."""
+
+    __slots__ = ("teachers", "lines", "line_minutes", "subjects", "period_values")
+
+    def __init__(self, teachers: Sequence[str], lines: Sequence[str], line_minutes: Sequence[float]) -> None:
+        self.teachers = teachers
+        self.lines = lines
+        self.line_minutes = line_minutes
+        self.subjects = StringTable()
+        self.period_values: List[float] = []
+
+    def add_subject(self, subject: str, period_value: float) -> int:
+        index = self.subjects.intern(subject)
+        if index == len(self.period_values):
+            self.period_values.append(period_value)
+        return index
+
+
+class AllocationRecord:
+    """One subject allocated to one teacher on one line."""
+
+    __slots__ = ("tables", "teacher_index", "line_index", "subject_index", "minutes")
+
+    def __init__(
+        self,
+        tables: RecordTables,
+        teacher_index: int,
+        line_index: int,
+        subject_index: int,
+        minutes: float,
+    ) -> None:
+        self.tables = tables
+        self.teacher_index = teacher_index
+        self.line_index = line_index
+        self.subject_index = subject_index
+        self.minutes = minutes
+
+    @property
+    def teacher(self) -> str:
+        return self.tables.teachers[self.teacher_index]
+
+    @property
+    def line_label(self) -> str:
+        return self.tables.lines[self.line_index]
+
+    @property
+    def subject(self) -> str:
+        return self.tables.subjects.values[self.subject_index]
+
+    @property
+    def period_value(self) -> float:
+        return self.tables.period_values[self.subject_index]
+
+    @property
+    def line_minutes(self) -> float:
+        return self.tables.line_minutes[self.line_index]
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "teacher_index": self.teacher_index,
+            "teacher": self.teacher,
+            "line_index": self.line_index,
+            "line_label": self.line_label,
+            "subject": self.subject,
+            "period_value": self.period_value,
+            "line_minutes": self.line_minutes,
+            "minutes": self.minutes,
+        }
+
+    def __repr__(self) -> str:
+        return f"AllocationRecord({self.as_dict()!r})"
@@ -0,0 +1,220 @@
+"""Benchmark the conversion, load and workbook stages on synthetic schools.
+
+For each size preset a school is generated with ``synthetic_matrix`` and every stage is
+timed (best of ``--repeat`` runs) and then run once more under ``tracemalloc`` for its
+peak memory. Results are written as a JSON baseline; pass ``--baseline`` with an
+earlier file to flag stages that got slower or hungrier than ``--threshold`` allows.
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from convert_csv_to_json import convert_csv_to_payload
+from synthetic_matrix import PRESETS, generate_school, write_school
+from verify_teacher_load import (
+    build_allocation_records,
+    build_snapshot_loads,
+    build_split_lookup,
+    format_load_report,
+    format_teacher_summary,
+    load_snapshot,
+)
+
+BASELINE_VERSION = 1
+DEFAULT_SIZES = ["sample", "small", "medium"]
+SUMMARY_SAMPLE_TEACHERS = 25
+# Stages faster or smaller than this are too noisy to call a regression.
+MIN_COMPARABLE = {"seconds": 0.01, "peak_bytes": 256 * 1024}
+TEMPLATE_SCRIPT = Path(__file__).with_name("Make excel file.py")
+
+
+def load_template_builder():
+    """Import ``create_workbook`` from "Make excel file.py", whose name is not importable."""
+    spec = importlib.util.spec_from_file_location("make_excel_file", TEMPLATE_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.create_workbook
+
+
+def measure(run: Callable[[], object], repeat: int = 1) -> Dict[str, float]:
+    """Return the best wall time of ``repeat`` runs and the peak traced memory of one more."""
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_bytes": peak}
+
+
+def benchmark_size(name: str, work_dir: Path, repeat: int = 1, seed: int = 0) -> Dict[str, object]:
+    school = generate_school(replace(PRESETS[name], seed=seed))
+    csv_path, json_path = write_school(school, work_dir, name)
+    data = load_snapshot(json_path)
+    split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+    records = build_allocation_records(data, split_lookup)
+    load_index = build_snapshot_loads(data)
+    load_settings_map = data.get("teacherLoadSettings", {})
+    sample_teachers = data["teachers"][:SUMMARY_SAMPLE_TEACHERS]
+    with csv_path.open(encoding="utf-8") as handle:
+        csv_line_count = sum(1 for _ in handle)
+    create_workbook = load_template_builder()
+    workbook_path = work_dir / f"{name}-template.xlsx"
+
+    stages = {
+        "convert_csv_to_payload": (lambda: convert_csv_to_payload(csv_path), csv_line_count),
+        "load_snapshot": (lambda: load_snapshot(json_path), json_path.stat().st_size),
+        "build_allocation_records": (lambda: build_allocation_records(data, split_lookup), len(records)),
+        "format_teacher_summary": (
+            lambda: [
+                format_teacher_summary(teacher, records, load_settings_map.get(teacher, {}))
+                for teacher in sample_teachers
+            ],
+            len(sample_teachers),
+        ),
+        "build_snapshot_loads": (lambda: build_snapshot_loads(data), len(data["teachers"])),
+        "format_load_report": (lambda: format_load_report(data, load_index), len(data["teachers"])),
+        "create_workbook": (
+            lambda: create_workbook(
+                str(workbook_path),
+                staff_rows=len(data["teachers"]),
+                subject_rows=len(data["subjects"]),
+                line_rows=len(data["lines"]),
+                allocation_rows=len(data["allocations"]),
+            ),
+            len(data["allocations"]),
+        ),
+    }
+
+    results = {}
+    for stage, (run, items) in stages.items():
+        results[stage] = dict(measure(run, repeat), items=items)
+    return {
+        "teachers": len(data["teachers"]),
+        "lines": len(data["lines"]),
+        "subjects": len(data["subjects"]),
+        "allocated_cells": len(data["allocations"]),
+        "stages": results,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def run_benchmarks(sizes: Sequence[str], repeat: int = 1, seed: int = 0) -> Dict[str, object]:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="matrix-bench-") as tmp:
+        for name in sizes:
+            results[name] = benchmark_size(name, Path(tmp), repeat, seed)
+    return {
+        "version": BASELINE_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "sizes": results,
+    }
+
+
+def compare_results(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Return one line per stage whose time or peak memory grew beyond ``threshold``."""
+    regressions = []
+    for size, result in current["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for stage, metrics in result["stages"].items():
+            before = previous["stages"].get(stage)
+            if not before:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                old, new = before[metric], metrics[metric]
+                if max(old, new) < MIN_COMPARABLE[metric]:
+                    continue
+                if old and new / old > threshold:
+                    regressions.append(f"{size}/{stage}: {metric} {old} -> {new} ({new / old:.2f}x)")
+    return regressions
+
+
+def format_results(results: Dict[str, object]) -> str:
+    lines = []
+    for size, result in results["sizes"].items():
+        lines.append(
+            f"{size}: {result['teachers']} teachers, {result['lines']} lines, "
+            f"{result['subjects']} subjects, {result['allocated_cells']} cells"
+        )
+        for stage, metrics in result["stages"].items():
+            lines.append(
+                f"  {stage:<26} {metrics['seconds']:>10.4f}s {metrics['peak_bytes'] / 1_048_576:>9.1f} MiB"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Matrix tools on synthetic schools.")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=sorted(PRESETS),
+        default=DEFAULT_SIZES,
+        help="Size presets to run (default: sample small medium).",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the best is kept.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic schools.")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"), help="Where to write results.")
+    parser.add_argument("--baseline", type=Path, help="Earlier results file to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Ratio over the baseline that counts as a regression (default 1.25).",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.seed)
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(format_results(results))
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
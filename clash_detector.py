@@ -0,0 +1,281 @@
+"""Detect teacher, line and room clashes in a Matrix snapshot in one pass.
+
+Lookups mirror the web app: subject codes are normalised like ``normalizeSubjectCode``,
+mapped lines are looked up by normalised then raw code, and a cell's rooms come from
+``allocationRoomOverrides`` before ``subjectRoomAssignments`` (split parts fall back to
+their base subject), as in ``getEffectiveRoomAssignmentsForCell``.
+
+Three kinds of clash are reported:
+
+* ``teacher``: a teacher holding two different classes on one line in the same
+  semester. ``S1``/``S2`` codes take one semester and can share a cell; split parts of
+  the same base subject count as one class;
+* ``line``: a subject allocated on a line other than its ``subjectLineMapping`` line;
+* ``room``: a room used by more than one cell on the same line, unless every cell holds
+  a part of the same split class.
+
+Malformed allocation keys are reported as ``key`` problems.
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from columnar_snapshot import ColumnarSnapshot
+from verify_teacher_load import build_split_lookup, iter_allocation_cells, load_snapshot
+
+SEMESTER_PATTERN = re.compile(r"^S\s*([12])\s*:?\s*(.+)$", re.IGNORECASE)
+SEMESTER_ONE = 1
+SEMESTER_TWO = 2
+FULL_YEAR = SEMESTER_ONE | SEMESTER_TWO
+CLASH_KINDS = ("teacher", "line", "room", "key")
+
+
+def semester_mask(code: str) -> int:
+    match = SEMESTER_PATTERN.match(code.strip())
+    if not match:
+        return FULL_YEAR
+    return SEMESTER_ONE if match.group(1) == "1" else SEMESTER_TWO
+
+
+def normalize_subject_code(raw) -> str:
+    value = " ".join(str(raw or "").split()).upper()
+    if re.match(r"^S[12]\s+\d", value):
+        return value
+    return value.replace(" ", "")
+
+
+@dataclass
+class Clash:
+    kind: str
+    line_index: Optional[int]
+    line: str
+    cells: List[str]
+    subjects: List[str]
+    detail: str
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "kind": self.kind,
+            "lineIndex": self.line_index,
+            "line": self.line,
+            "cells": self.cells,
+            "subjects": self.subjects,
+            "detail": self.detail,
+        }
+
+
+@dataclass
+class ClashReport:
+    clashes: List[Clash] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.clashes)
+
+    def of_kind(self, kind: str) -> List[Clash]:
+        return [clash for clash in self.clashes if clash.kind == kind]
+
+    def counts(self) -> Dict[str, int]:
+        return {kind: len(self.of_kind(kind)) for kind in CLASH_KINDS}
+
+
+def build_line_index(line_mapping) -> Dict[str, int]:
+    index: Dict[str, int] = {}
+    for code, line in (line_mapping or {}).items():
+        try:
+            line_idx = int(line)
+        except (TypeError, ValueError):
+            continue
+        index.setdefault(code, line_idx)
+        index.setdefault(normalize_subject_code(code), line_idx)
+    return index
+
+
+def mapped_line_for(code: str, line_index: Dict[str, int]) -> Optional[int]:
+    mapped = line_index.get(normalize_subject_code(code))
+    return mapped if mapped is not None else line_index.get(code)
+
+
+def unique_rooms(entries) -> List[str]:
+    rooms: List[str] = []
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("room"), str):
+            room = entry["room"].strip().upper()
+            if room and room not in rooms:
+                rooms.append(room)
+    return rooms
+
+
+def build_room_indexes(data, split_lookup):
+    """Return ``(subject rooms, override rooms)`` keyed by normalised code."""
+    subject_rooms: Dict[str, List[str]] = {}
+    for code, entries in (data.get("subjectRoomAssignments") or {}).items():
+        rooms = unique_rooms(entries)
+        if rooms:
+            subject_rooms[normalize_subject_code(code)] = rooms
+    for code, info in split_lookup.items():
+        normalized = normalize_subject_code(code)
+        base_rooms = subject_rooms.get(normalize_subject_code(info["base"]))
+        if normalized not in subject_rooms and base_rooms:
+            subject_rooms[normalized] = base_rooms
+
+    override_rooms: Dict[Tuple[str, str], List[str]] = {}
+    for key, mapping in (data.get("allocationRoomOverrides") or {}).items():
+        if not isinstance(mapping, dict):
+            continue
+        for code, entries in mapping.items():
+            rooms = unique_rooms(entries)
+            if rooms:
+                override_rooms[(key, normalize_subject_code(code))] = rooms
+    return subject_rooms, override_rooms
+
+
+def iter_cells(data, report: ClashReport) -> Iterator[Tuple[int, int, List[str]]]:
+    if isinstance(data, ColumnarSnapshot):
+        yield from iter_allocation_cells(data)
+        return
+    for key, subjects in data.get("allocations", {}).items():
+        try:
+            line_idx, teacher_idx = (int(part) for part in key.split("-"))
+        except ValueError:
+            report.clashes.append(Clash("key", None, "", [key], [], f"Malformed allocation key {key!r}"))
+            continue
+        yield line_idx, teacher_idx, subjects if isinstance(subjects, list) else [subjects]
+
+
+def detect_clashes(data) -> ClashReport:
+    """Check ``data`` for clashes with a single pass over its allocations."""
+    report = ClashReport()
+    teachers = data.get("teachers", [])
+    lines = data.get("lines", [])
+    split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+    line_index = build_line_index(data.get("subjectLineMapping", {}))
+    subject_rooms, override_rooms = build_room_indexes(data, split_lookup)
+    room_cells: Dict[Tuple[int, str], Dict[str, Set[str]]] = {}
+
+    def line_label(line_idx: int) -> str:
+        return lines[line_idx] if 0 <= line_idx < len(lines) else f"line {line_idx}"
+
+    def cell_label(line_idx: int, teacher_idx: int) -> str:
+        teacher = teachers[teacher_idx] if 0 <= teacher_idx < len(teachers) else f"teacher {teacher_idx}"
+        return f"{line_label(line_idx)} / {teacher}"
+
+    for line_idx, teacher_idx, subjects in iter_cells(data, report):
+        key = f"{line_idx}-{teacher_idx}"
+        by_semester: Dict[int, Dict[str, List[str]]] = {SEMESTER_ONE: {}, SEMESTER_TWO: {}}
+        for subject in subjects:
+            normalized = normalize_subject_code(subject)
+            class_key = split_lookup.get(subject, {}).get("base", subject)
+            mask = semester_mask(subject)
+            for semester in (SEMESTER_ONE, SEMESTER_TWO):
+                if mask & semester:
+                    by_semester[semester].setdefault(class_key, []).append(subject)
+
+            mapped = mapped_line_for(subject, line_index)
+            if mapped is not None and mapped != line_idx:
+                report.clashes.append(
+                    Clash(
+                        "line",
+                        line_idx,
+                        line_label(line_idx),
+                        [key],
+                        [subject],
+                        f"{subject} is on {line_label(line_idx)} but mapped to {line_label(mapped)}",
+                    )
+                )
+
+            rooms = override_rooms.get((key, normalized)) or subject_rooms.get(normalized, [])
+            for room in rooms:
+                room_cells.setdefault((line_idx, room), {}).setdefault(key, set()).add(subject)
+
+        clashing = {
+            semester: sorted(code for codes in classes.values() for code in codes)
+            for semester, classes in by_semester.items()
+            if len(classes) > 1
+        }
+        if SEMESTER_ONE in clashing and clashing[SEMESTER_ONE] == clashing.get(SEMESTER_TWO):
+            clashing = {FULL_YEAR: clashing[SEMESTER_ONE]}
+        for semester, codes in clashing.items():
+            scope = "both semesters" if semester == FULL_YEAR else f"semester {semester}"
+            class_count = len(by_semester[SEMESTER_ONE if semester == FULL_YEAR else semester])
+            report.clashes.append(
+                Clash(
+                    "teacher",
+                    line_idx,
+                    line_label(line_idx),
+                    [key],
+                    codes,
+                    f"{cell_label(line_idx, teacher_idx)} holds {class_count} classes in {scope}",
+                )
+            )
+
+    for (line_idx, room), cells in room_cells.items():
+        if len(cells) < 2:
+            continue
+        classes = {split_lookup.get(code, {}).get("base", code) for codes in cells.values() for code in codes}
+        if len(classes) < 2:
+            # Parts of one split class share its room across the periods they divide.
+            continue
+        report.clashes.append(
+            Clash(
+                "room",
+                line_idx,
+                line_label(line_idx),
+                sorted(cells),
+                sorted(code for codes in cells.values() for code in codes),
+                f"Room {room} is used by {len(cells)} cells on {line_label(line_idx)}",
+            )
+        )
+    return report
+
+
+def format_report(path: str, report: ClashReport) -> str:
+    counts = report.counts()
+    summary = ", ".join(f"{counts[kind]} {kind}" for kind in CLASH_KINDS if counts[kind])
+    lines = [f"{path}: {summary or 'no clashes'}"]
+    for clash in report.clashes:
+        subjects = f" [{', '.join(clash.subjects)}]" if clash.subjects else ""
+        lines.append(f"  {clash.kind}: {clash.detail}{subjects}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check Matrix snapshots for teacher, line and room clashes. Exits 1 if any are found."
+    )
+    parser.add_argument("snapshots", nargs="+", help="Snapshot files (.json or .mxc).")
+    parser.add_argument(
+        "--kind",
+        action="append",
+        choices=CLASH_KINDS,
+        help="Only report this kind of clash (repeatable). Defaults to every kind.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args(argv)
+
+    kinds = set(args.kind or CLASH_KINDS)
+    results = {}
+    failed = False
+    for path in args.snapshots:
+        try:
+            with load_snapshot(path) as data:
+                report = detect_clashes(data)
+        except (OSError, ValueError) as exc:
+            print(f"{path}: could not be checked ({exc})", file=sys.stderr)
+            return 2
+        report.clashes = [clash for clash in report.clashes if clash.kind in kinds]
+        results[path] = report
+        failed = failed or bool(report)
+
+    if args.json:
+        print(json.dumps({path: [clash.as_dict() for clash in report.clashes] for path, report in results.items()}, indent=2))
+    else:
+        print("\n".join(format_report(path, report) for path, report in results.items()))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
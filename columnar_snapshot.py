@@ -0,0 +1,319 @@
+"""Compact columnar snapshot format for Matrix payloads, read through a memory map.
+
+A columnar snapshot (``.mxc``) stores the same data as the JSON payload written by the
+Matrix app, laid out so a load check can start without decoding the whole document:
+
+* an 8-byte magic, a little-endian ``uint32`` header length and a JSON header that
+  records the byte range of every section;
+* ``strings``: interned tables of teacher names, line labels and subject codes;
+* ``cells``: one ``int32`` row of ``(line, teacher, subject, flags)`` per allocated
+  subject, in allocation-key order;
+* ``meta``: the remaining small sections with subject codes replaced by table ids,
+  plus any allocation keys that are not ``line-teacher`` integers. A split entry of
+  the usual ``code``, ``periods``, ``index``, ``totalSplits`` shape is stored as a row;
+  any other entry, or a split value that is not a list, is kept whole, so
+  ``to_payload`` returns what was written;
+* ``csvData``: the source grid, decoded only if it is asked for.
+
+``ColumnarSnapshot`` behaves like a read-only payload mapping, and additionally exposes
+``iter_allocation_cells`` so callers can walk allocations straight off the mapped
+integer array.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from allocation_model import StringTable
+
+MAGIC = b"MXCOL\x00\x00\x01"
+HEADER_LENGTH = struct.Struct("<I")
+FORMAT_VERSION = 1
+CELL_WIDTH = 4
+FLAG_SCALAR = 1
+SECTION_ALIGNMENT = 8
+COLUMNAR_SUFFIX = ".mxc"
+
+SPLIT_ENTRY_KEYS = ["code", "periods", "index", "totalSplits"]
+
+CORE_KEYS = (
+    "allocations",
+    "timestamp",
+    "subjects",
+    "teachers",
+    "lines",
+    "csvData",
+    "subjectLineMapping",
+    "subjectSplits",
+    "subjectYearMapping",
+    "teacherLoadSettings",
+)
+
+
+def is_columnar_snapshot(path: Union[str, Path]) -> bool:
+    try:
+        with Path(path).open("rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _subject_list(subjects) -> List[str]:
+    return subjects if isinstance(subjects, list) else [subjects]
+
+
+def _encode_json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _pad(length: int) -> int:
+    return -length % SECTION_ALIGNMENT
+
+
+def _encode_split_entry(entry, subject_table: StringTable):
+    if isinstance(entry, dict) and list(entry) == SPLIT_ENTRY_KEYS and isinstance(entry["code"], str):
+        return [subject_table.intern(entry["code"]), entry["periods"], entry["index"], entry["totalSplits"]]
+    return {"entry": entry}
+
+
+def _decode_split_entry(row, table: List[str]):
+    if isinstance(row, dict):
+        return row["entry"]
+    code, periods, index, total = row
+    return {"code": table[code], "periods": periods, "index": index, "totalSplits": total}
+
+
+def write_columnar_snapshot(payload: Mapping, path: Union[str, Path]) -> Path:
+    teachers = list(payload.get("teachers", []))
+    lines = list(payload.get("lines", []))
+    subject_table = StringTable()
+
+    cells = array("i")
+    irregular = {}
+    for key, subjects in payload.get("allocations", {}).items():
+        try:
+            line_idx, teacher_idx = (int(part) for part in key.split("-"))
+        except ValueError:
+            irregular[key] = subjects
+            continue
+        if not subjects or not all(isinstance(subject, str) for subject in _subject_list(subjects)):
+            irregular[key] = subjects
+            continue
+        flags = 0 if isinstance(subjects, list) else FLAG_SCALAR
+        for subject in _subject_list(subjects):
+            cells.extend((line_idx, teacher_idx, subject_table.intern(subject), flags))
+    if sys.byteorder != "little":
+        cells.byteswap()
+
+    splits = {}
+    for base, entries in payload.get("subjectSplits", {}).items():
+        splits[subject_table.intern(base)] = (
+            [_encode_split_entry(entry, subject_table) for entry in entries]
+            if isinstance(entries, list)
+            else {"value": entries}
+        )
+
+    meta = {
+        "timestamp": payload.get("timestamp"),
+        "subjects": [subject_table.intern(code) for code in payload.get("subjects", [])],
+        "subjectLineMapping": [
+            [subject_table.intern(code), line]
+            for code, line in payload.get("subjectLineMapping", {}).items()
+        ],
+        "subjectYearMapping": [
+            [subject_table.intern(code), year]
+            for code, year in payload.get("subjectYearMapping", {}).items()
+        ],
+        "subjectSplits": [[base, entries] for base, entries in splits.items()],
+        "teacherLoadSettings": payload.get("teacherLoadSettings", {}),
+        "irregularAllocations": irregular,
+        "extra": {key: value for key, value in payload.items() if key not in CORE_KEYS},
+        "keys": list(payload.keys()),
+    }
+
+    sections = [
+        ("strings", _encode_json({"teachers": teachers, "lines": lines, "subjects": subject_table.values})),
+        ("cells", cells.tobytes()),
+        ("meta", _encode_json(meta)),
+        ("csvData", _encode_json(payload.get("csvData", []))),
+    ]
+
+    directory = {}
+    offset = 0
+    for name, blob in sections:
+        directory[name] = [offset, len(blob)]
+        offset += len(blob) + _pad(len(blob))
+    header = _encode_json({"version": FORMAT_VERSION, "sections": directory})
+    header_end = len(MAGIC) + HEADER_LENGTH.size + len(header)
+    data_start = header_end + _pad(header_end)
+
+    output_path = Path(path)
+    with output_path.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(HEADER_LENGTH.pack(len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (data_start - header_end))
+        for _, blob in sections:
+            handle.write(blob)
+            handle.write(b"\0" * _pad(len(blob)))
+    return output_path
+
+
+class ColumnarSnapshot(Mapping):
+    """Read-only, memory-mapped view of a columnar snapshot."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._cells: Optional[memoryview] = None
+        if bytes(self._view[: len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError(f"Not a columnar Matrix snapshot: {path}")
+
+        (header_length,) = HEADER_LENGTH.unpack_from(self._map, len(MAGIC))
+        header_start = len(MAGIC) + HEADER_LENGTH.size
+        header = json.loads(bytes(self._view[header_start : header_start + header_length]))
+        if header.get("version") != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar snapshot version in {path}")
+
+        header_end = header_start + header_length
+        self._data_start = header_end + _pad(header_end)
+        self._sections: Dict[str, Tuple[int, int]] = header["sections"]
+        self._decoded: Dict[str, object] = {}
+
+    def __enter__(self) -> "ColumnarSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._cells is not None:
+            self._cells.release()
+            self._cells = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+
+    def _section_bytes(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        start = self._data_start + offset
+        return self._view[start : start + length]
+
+    def _section_json(self, name: str):
+        if name not in self._decoded:
+            self._decoded[name] = json.loads(bytes(self._section_bytes(name)))
+        return self._decoded[name]
+
+    @property
+    def teachers(self) -> List[str]:
+        return self._section_json("strings")["teachers"]
+
+    @property
+    def lines(self) -> List[str]:
+        return self._section_json("strings")["lines"]
+
+    @property
+    def subject_table(self) -> List[str]:
+        return self._section_json("strings")["subjects"]
+
+    @property
+    def cells(self):
+        """Flat ``int32`` cell rows of ``(line, teacher, subject, flags)``."""
+        if self._cells is None:
+            raw = self._section_bytes("cells")
+            if sys.byteorder == "little":
+                self._cells = raw.cast("i")
+            else:
+                swapped = array("i", bytes(raw))
+                swapped.byteswap()
+                self._cells = memoryview(swapped)
+        return self._cells
+
+    def iter_allocation_cells(self) -> Iterator[Tuple[int, int, List[str]]]:
+        table = self.subject_table
+        cells = self.cells
+        current = None
+        subjects: List[str] = []
+        for offset in range(0, len(cells), CELL_WIDTH):
+            key = (cells[offset], cells[offset + 1])
+            if key != current:
+                if current is not None:
+                    yield current[0], current[1], subjects
+                current = key
+                subjects = []
+            subjects.append(table[cells[offset + 2]])
+        if current is not None:
+            yield current[0], current[1], subjects
+
+    def _build_allocations(self) -> Dict[str, Union[List[str], str]]:
+        table = self.subject_table
+        cells = self.cells
+        allocations: Dict[str, Union[List[str], str]] = {}
+        for offset in range(0, len(cells), CELL_WIDTH):
+            key = f"{cells[offset]}-{cells[offset + 1]}"
+            subject = table[cells[offset + 2]]
+            if cells[offset + 3] & FLAG_SCALAR:
+                allocations[key] = subject
+            else:
+                allocations.setdefault(key, []).append(subject)
+        allocations.update(self._section_json("meta")["irregularAllocations"])
+        return allocations
+
+    def _build_value(self, key: str):
+        meta = self._section_json("meta")
+        table = self.subject_table
+        if key == "allocations":
+            return self._build_allocations()
+        if key == "teachers":
+            return self.teachers
+        if key == "lines":
+            return self.lines
+        if key == "csvData":
+            return self._section_json("csvData")
+        if key == "subjects":
+            return [table[index] for index in meta["subjects"]]
+        if key in ("subjectLineMapping", "subjectYearMapping"):
+            return {table[index]: value for index, value in meta[key]}
+        if key == "subjectSplits":
+            return {
+                table[base]: (
+                    entries["value"]
+                    if isinstance(entries, dict)
+                    else [_decode_split_entry(row, table) for row in entries]
+                )
+                for base, entries in meta["subjectSplits"]
+            }
+        if key in meta["extra"]:
+            return meta["extra"][key]
+        return meta[key]
+
+    def __getitem__(self, key: str):
+        if key not in self._section_json("meta")["keys"]:
+            raise KeyError(key)
+        cache_key = f"value:{key}"
+        if cache_key not in self._decoded:
+            self._decoded[cache_key] = self._build_value(key)
+        return self._decoded[cache_key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._section_json("meta")["keys"])
+
+    def __len__(self) -> int:
+        return len(self._section_json("meta")["keys"])
+
+    def to_payload(self) -> Dict[str, object]:
+        return {key: self[key] for key in self}
+
+
+def load_columnar_snapshot(path: Union[str, Path]) -> ColumnarSnapshot:
+    return ColumnarSnapshot(path)
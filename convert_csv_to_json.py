@@ -1,25 +1,68 @@
-"""Convert teacher allocation CSV files to the JSON structure used by the Matrix app."""
+"""Convert teacher allocation CSV or XLSX files to the JSON structure used by the Matrix app."""
 
 import argparse
 import csv
+import glob
+import hashlib
+import itertools
 import json
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from allocation_model import StringTable, TeacherRow
+from columnar_snapshot import COLUMNAR_SUFFIX, write_columnar_snapshot
+from stage_metrics import NULL_METRICS, StageMetrics, profile_to
+from xlsx_reader import XLSX_SUFFIXES, is_xlsx_path, iter_xlsx_rows
 
 TAG_PATTERN = re.compile(r"^(?:[A-Za-z]{2,}|S\d+)\s*:\s*")
 YEAR_PATTERN = re.compile(r"Year\s*(\d{1,2})", re.IGNORECASE)
 ROW_PATTERN = re.compile(r"Row\s*(\d+)", re.IGNORECASE)
 LINE_PATTERN = re.compile(r"Line\s*(\d+)", re.IGNORECASE)
+YEAR_CODE_PATTERN = re.compile(r"^\d{1,2}\s*[A-Z]")
+TEACHER_SECTION_MARKER = "teacher matrix"
+CELL_SEPARATOR = "\x00"
+
+STATE_YEARS = "years"
+STATE_TEACHER_HEADER = "teacher_header"
+STATE_TEACHERS = "teachers"
+
+EVENT_YEAR = "year"
+EVENT_LINE_HEADER = "line_header"
+EVENT_SUBJECT_ROW = "subject_row"
+EVENT_TEACHER_SECTION = "teacher_section"
+EVENT_TEACHER_HEADER = "teacher_header"
+EVENT_TEACHER = "teacher"
+EVENT_PERIOD_MATRIX = "period_matrix"
+
+DETERMINISTIC_TIMESTAMP = "1970-01-01T00:00:00+00:00"
+SORTED_SECTIONS = ("allocations", "subjectLineMapping", "subjectSplits", "subjectYearMapping", "teacherLoadSettings")
+CONVERSION_CACHE_NAME = ".conversion-cache.json"
+CONVERSION_CACHE_VERSION = 1
+MATRIX_SUFFIXES = {".csv", *XLSX_SUFFIXES}
+
+# Metrics stage charged for the rows scanned to produce each kind of event.
+EVENT_STAGES = {
+    EVENT_YEAR: "year_parse",
+    EVENT_LINE_HEADER: "year_parse",
+    EVENT_SUBJECT_ROW: "year_parse",
+    EVENT_TEACHER_SECTION: "section_find",
+    EVENT_TEACHER_HEADER: "teacher_parse",
+    EVENT_TEACHER: "teacher_parse",
+    EVENT_PERIOD_MATRIX: "year_parse",
+}
 
 
 @dataclass
-class TeacherRow:
-    name: str
-    allowance_periods: float
-    line_values: List[str]
+class MatrixEvent:
+    kind: str
+    year: Optional[str] = None
+    line_names: Optional[List[str]] = None
+    codes: Optional[List[List[str]]] = None
+    teacher: Optional[TeacherRow] = None
 
 
 def read_csv_rows(path: Path) -> List[List[str]]:
@@ -28,6 +71,11 @@ def read_csv_rows(path: Path) -> List[List[str]]:
         return [row for row in reader]
 
 
+def iter_csv_rows(path: Path) -> Iterator[List[str]]:
+    with path.open("r", newline="", encoding="utf-8-sig") as handle:
+        yield from csv.reader(handle)
+
+
 def strip_tags(value: str) -> str:
     text = value.strip().replace("\u2013", "-").replace("\u2014", "-")
     while True:
@@ -38,7 +86,8 @@ def strip_tags(value: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
-def split_subject_codes(value: str) -> List[str]:
+def split_subject_codes(value: str, table: Optional[StringTable] = None) -> List[str]:
+    """Split a cell into subject codes; with ``table``, equal codes share one string."""
     if not value or value.strip() == "":
         return []
     cleaned = strip_tags(value)
@@ -49,7 +98,7 @@ def split_subject_codes(value: str) -> List[str]:
     for part in parts:
         code = strip_tags(part).upper()
         if code:
-            codes.append(code)
+            codes.append(table.canonical(code) if table is not None else code)
     return codes
 
 
@@ -60,86 +109,230 @@ def find_teacher_section(rows: Sequence[Sequence[str]]) -> Optional[int]:
     return None
 
 
-def parse_year_sections(rows: Sequence[Sequence[str]], teacher_start: int) -> Tuple[Dict[str, List[Set[str]]], List[str]]:
-    year_subjects: Dict[str, List[Set[str]]] = {}
-    current_year: Optional[str] = None
+def parse_line_header(row: Sequence[str]) -> Tuple[List[int], List[str]]:
+    line_columns: List[int] = []
     line_names: List[str] = []
-    line_start_index: Optional[int] = None
+    for idx, cell in enumerate(row):
+        if cell and LINE_PATTERN.match(cell.strip()):
+            line_columns.append(idx)
+            line_names.append(cell.strip())
+    return line_columns, line_names
 
-    for row in rows[:teacher_start]:
-        stripped = [cell.strip() for cell in row]
-        if not any(stripped):
-            continue
 
-        year_cell = next((cell for cell in stripped if YEAR_PATTERN.search(cell)), None)
-        if year_cell:
-            match = YEAR_PATTERN.search(year_cell)
-            if match:
-                current_year = f"Year {int(match.group(1))}"
+def parse_teacher_row(
+    row: Sequence[str], line_columns: Sequence[int], table: Optional[StringTable] = None
+) -> Optional[TeacherRow]:
+    if not row:
+        return None
+    name = (row[0] or "").strip()
+    if not name:
+        return None
+
+    allowance_raw = row[2] if len(row) > 2 else ""
+    line_codes = [split_subject_codes(row[column] if column < len(row) else "", table) for column in line_columns]
+    return TeacherRow(name=name, allowance_periods=extract_number(allowance_raw), line_codes=line_codes)
+
+
+def iter_matrix_events(
+    rows: Iterable[Sequence[str]],
+    state: str = STATE_YEARS,
+    table: Optional[StringTable] = None,
+) -> Iterator[MatrixEvent]:
+    """Walk the matrix rows once, yielding year sections, headers and teacher rows as they appear.
+
+    The year grid above the Teacher Matrix marker produces ``year``, ``line_header`` and
+    ``subject_row`` events; the marker, the "Teacher" header row and each teacher row
+    below it produce ``teacher_section``, ``teacher_header`` and ``teacher`` events.
+    Every cell is split into codes exactly once, interned through ``table`` when given.
+    """
+    current_year: Optional[str] = None
+    line_count = 0
+    line_start_index: Optional[int] = None
+    teacher_columns: List[int] = []
+
+    for row in rows:
+        if state == STATE_YEARS:
+            joined = CELL_SEPARATOR.join(row)
+            if TEACHER_SECTION_MARKER in joined.lower():
+                state = STATE_TEACHER_HEADER
+                yield MatrixEvent(EVENT_TEACHER_SECTION)
             else:
-                current_year = year_cell.strip()
-            line_names = []
-            line_start_index = None
+                if not any(cell.strip() for cell in row):
+                    continue
+
+                year_match = YEAR_PATTERN.search(joined)
+                if year_match:
+                    current_year = f"Year {int(year_match.group(1))}"
+                    line_count = 0
+                    line_start_index = None
+                    yield MatrixEvent(EVENT_YEAR, year=current_year)
+                    continue
+
+                if current_year and not line_count:
+                    line_columns, line_names = parse_line_header(row)
+                    if line_columns:
+                        line_start_index = line_columns[0]
+                        line_count = len(line_names)
+                        yield MatrixEvent(EVENT_LINE_HEADER, year=current_year, line_names=line_names)
+                    continue
+
+                if current_year and line_count and line_start_index is not None:
+                    row_label = row[line_start_index - 1].strip() if line_start_index >= 1 else ""
+                    if not ROW_PATTERN.match(row_label):
+                        continue
+                    codes = []
+                    for column in range(line_start_index, line_start_index + line_count):
+                        codes.append(split_subject_codes(row[column] if column < len(row) else "", table))
+                    yield MatrixEvent(EVENT_SUBJECT_ROW, year=current_year, codes=codes)
+                continue
+
+        if state == STATE_TEACHER_HEADER:
+            if row and row[0].strip().lower() == "teacher":
+                teacher_columns, line_names = parse_line_header(row)
+                state = STATE_TEACHERS
+                yield MatrixEvent(EVENT_TEACHER_HEADER, line_names=line_names)
             continue
 
-        if current_year and not line_names:
-            line_candidates: List[Tuple[int, str]] = [
-                (idx, cell.strip())
-                for idx, cell in enumerate(row)
-                if cell and LINE_PATTERN.match(cell.strip())
-            ]
-            if line_candidates:
-                line_start_index = line_candidates[0][0]
-                line_names = [name for _, name in line_candidates]
-                year_subjects[current_year] = [set() for _ in line_names]
+        teacher_row = parse_teacher_row(row, teacher_columns, table)
+        if teacher_row is not None:
+            yield MatrixEvent(EVENT_TEACHER, teacher=teacher_row)
+
+
+def parse_period_header(row: Sequence[str]) -> Tuple[List[Optional[int]], List[str]]:
+    """Map every column of a Period-Matrix header row to the index of the line above it.
+
+    Lines are labelled once over their first period column (``Line 1``) or over every
+    column (``Line 4`` repeated); single-column lines such as ``WedA1`` follow the
+    standard lines. Columns left of the first ``Line N`` label map to ``None``.
+    """
+    column_lines: List[Optional[int]] = []
+    line_names: List[str] = []
+    current: Optional[int] = None
+    for cell in row:
+        label = (cell or "").strip()
+        if label and (line_names or LINE_PATTERN.match(label)):
+            if label not in line_names:
+                line_names.append(label)
+            current = line_names.index(label)
+        column_lines.append(current)
+    return column_lines, line_names
+
+
+def iter_period_matrix_events(
+    rows: Iterable[Sequence[str]], table: Optional[StringTable] = None
+) -> Iterator[MatrixEvent]:
+    """Walk a Period-Matrix sheet: a ``Line N`` header over one column per period.
+
+    This is the layout of the timetabling workbooks (``TAS matrix.xlsx``). It has year
+    blocks of subject rows under the line header but no Teacher Matrix section. Codes
+    are recognised by their year prefix (``10MAT``, ``9FOTE:2``), which also gives the
+    year. Period numbers, semester labels and notes do not match and are skipped. The
+    header yields one ``period_matrix`` event. The first row that holds a year's codes
+    yields a ``line_header`` event, and every such row yields ``subject_row`` events.
+    """
+    column_lines: Optional[List[Optional[int]]] = None
+    line_names: List[str] = []
+    years_seen: Set[str] = set()
+
+    for row in rows:
+        if column_lines is None:
+            columns, names = parse_period_header(row)
+            if names:
+                column_lines, line_names = columns, names
+                yield MatrixEvent(EVENT_PERIOD_MATRIX, line_names=line_names)
             continue
 
-        if current_year and line_names and line_start_index is not None:
-            if line_start_index - 1 >= 0:
-                row_label = row[line_start_index - 1].strip()
-            else:
-                row_label = ""
-            if not ROW_PATTERN.match(row_label or ""):
+        codes_by_year: Dict[str, List[List[str]]] = {}
+        previous = None
+        for column, cell in enumerate(row[: len(column_lines)]):
+            line_index = column_lines[column]
+            # A class fills every period column of its line; split each run once.
+            if line_index is None or not cell.strip() or (line_index, cell) == previous:
                 continue
+            previous = (line_index, cell)
+            for code in split_subject_codes(cell, table):
+                year = infer_year_from_code(code) if YEAR_CODE_PATTERN.match(code) else None
+                if year is None:
+                    continue
+                year_codes = codes_by_year.setdefault(year, [[] for _ in line_names])
+                if code not in year_codes[line_index]:
+                    year_codes[line_index].append(code)
+
+        for year, codes in codes_by_year.items():
+            if year not in years_seen:
+                years_seen.add(year)
+                yield MatrixEvent(EVENT_LINE_HEADER, year=year, line_names=line_names)
+            yield MatrixEvent(EVENT_SUBJECT_ROW, year=year, codes=codes)
+
+
+def iter_layout_events(
+    rows: Iterable[Sequence[str]],
+    table: Optional[StringTable] = None,
+    detect_period_matrix: bool = False,
+) -> Iterator[MatrixEvent]:
+    """Events for either sheet layout, chosen from the rows before the first year or line header.
+
+    A ``Year N`` heading or the Teacher Matrix marker means the allocation template read
+    by ``iter_matrix_events``. With ``detect_period_matrix`` set, a ``Line N`` header
+    before either one means the Period-Matrix layout. Rows read to decide are replayed,
+    so the input is still consumed in one pass.
+    """
+    if not detect_period_matrix:
+        yield from iter_matrix_events(rows, table=table)
+        return
+    rows = iter(rows)
+    seen: List[Sequence[str]] = []
+    period_layout = False
+    for row in rows:
+        seen.append(row)
+        joined = CELL_SEPARATOR.join(row)
+        if TEACHER_SECTION_MARKER in joined.lower() or YEAR_PATTERN.search(joined):
+            break
+        if parse_line_header(row)[0]:
+            period_layout = True
+            break
+    replayed = itertools.chain(seen, rows)
+    if period_layout:
+        yield from iter_period_matrix_events(replayed, table)
+    else:
+        yield from iter_matrix_events(replayed, table=table)
 
-            for idx, _ in enumerate(line_names):
-                column = line_start_index + idx
-                cell = row[column] if column < len(row) else ""
-                for code in split_subject_codes(cell):
-                    year_subjects[current_year][idx].add(code)
 
-    return year_subjects, line_names
+def apply_year_event(event: MatrixEvent, year_subjects: Dict[str, List[Set[str]]]) -> None:
+    if event.kind == EVENT_LINE_HEADER:
+        year_subjects[event.year] = [set() for _ in event.line_names]
+    elif event.kind == EVENT_SUBJECT_ROW:
+        for line_set, codes in zip(year_subjects[event.year], event.codes):
+            line_set.update(codes)
 
 
-def parse_teacher_rows(rows: Sequence[Sequence[str]], header_index: int) -> Tuple[List[str], List[str], List[TeacherRow]]:
-    header_row: Sequence[str] = rows[header_index]
-    line_columns: List[int] = []
+def parse_year_sections(rows: Sequence[Sequence[str]], teacher_start: int) -> Tuple[Dict[str, List[Set[str]]], List[str]]:
+    year_subjects: Dict[str, List[Set[str]]] = {}
     line_names: List[str] = []
 
-    for idx, cell in enumerate(header_row):
-        if cell and LINE_PATTERN.match(cell.strip()):
-            line_columns.append(idx)
-            line_names.append(cell.strip())
+    for event in iter_matrix_events(rows[:teacher_start]):
+        if event.kind == EVENT_TEACHER_SECTION:
+            break
+        if event.kind == EVENT_YEAR:
+            line_names = []
+        elif event.kind == EVENT_LINE_HEADER:
+            line_names = event.line_names
+        apply_year_event(event, year_subjects)
+
+    return year_subjects, line_names
+
+
+def parse_teacher_rows(rows: Sequence[Sequence[str]], header_index: int) -> Tuple[List[str], List[str], List[TeacherRow]]:
+    line_columns, line_names = parse_line_header(rows[header_index])
 
     teachers: List[str] = []
     parsed_rows: List[TeacherRow] = []
-
     for row in rows[header_index + 1:]:
-        if not row or all((cell or "").strip() == "" for cell in row):
-            continue
-
-        name = (row[0] or "").strip()
-        if not name:
+        teacher_row = parse_teacher_row(row, line_columns)
+        if teacher_row is None:
             continue
-
-        teachers.append(name)
-        allowance_raw = row[2] if len(row) > 2 else ""
-        allowance_value = extract_number(allowance_raw)
-        line_values: List[str] = []
-        for column in line_columns:
-            cell = row[column] if column < len(row) else ""
-            line_values.append(cell)
-        parsed_rows.append(TeacherRow(name=name, allowance_periods=allowance_value, line_values=line_values))
+        teachers.append(teacher_row.name)
+        parsed_rows.append(teacher_row)
 
     return teachers, line_names, parsed_rows
 
@@ -184,19 +377,41 @@ def infer_year_from_code(code: str) -> Optional[str]:
     return f"Year {year_number}"
 
 
+def teacher_load_setting(row: TeacherRow) -> Dict[str, Union[float, str]]:
+    return {
+        "fte": "1.0",
+        "periodAllowance": max(0.0, row.allowance_periods),
+        "assemblyFullCount": 0,
+        "assemblyShortCount": 0,
+        "additionalMinutes": 0,
+    }
+
+
 def create_teacher_load_settings(rows: Sequence[TeacherRow]) -> Dict[str, Dict[str, Union[float, str]]]:
     settings: Dict[str, Dict[str, Union[float, str]]] = {}
     for row in rows:
-        settings[row.name] = {
-            "fte": "1.0",
-            "periodAllowance": max(0.0, row.allowance_periods),
-            "assemblyFullCount": 0,
-            "assemblyShortCount": 0,
-            "additionalMinutes": 0,
-        }
+        settings[row.name] = teacher_load_setting(row)
     return settings
 
 
+def add_teacher_allocations(
+    teacher_index: int,
+    row: TeacherRow,
+    allocations: Dict[str, Union[List[str], str]],
+    subjects: Set[str],
+    subject_line_mapping: Dict[str, int],
+) -> None:
+    for line_index, codes in enumerate(row.line_codes):
+        if not codes:
+            continue
+        key = f"{line_index}-{teacher_index}"
+        subjects.update(codes)
+        for code in codes:
+            if code not in subject_line_mapping:
+                subject_line_mapping[code] = line_index
+        allocations[key] = codes if len(codes) > 1 else codes[0]
+
+
 def build_allocations(
     teacher_rows: Sequence[TeacherRow],
 ) -> Tuple[Dict[str, Union[List[str], str]], Set[str], Dict[str, int]]:
@@ -205,16 +420,7 @@ def build_allocations(
     subject_line_mapping: Dict[str, int] = {}
 
     for teacher_index, row in enumerate(teacher_rows):
-        for line_index, cell in enumerate(row.line_values):
-            codes = split_subject_codes(cell)
-            if not codes:
-                continue
-            key = f"{line_index}-{teacher_index}"
-            subjects.update(codes)
-            for code in codes:
-                if code not in subject_line_mapping:
-                    subject_line_mapping[code] = line_index
-            allocations[key] = codes if len(codes) > 1 else codes[0]
+        add_teacher_allocations(teacher_index, row, allocations, subjects, subject_line_mapping)
 
     return allocations, subjects, subject_line_mapping
 
@@ -234,43 +440,96 @@ def flatten_year_subjects(subjects_by_year: Dict[str, List[Set[str]]]) -> Set[st
     return combined
 
 
-def convert_csv_to_payload(csv_path: Path) -> Dict[str, object]:
-    rows = read_csv_rows(csv_path)
-    teacher_section = find_teacher_section(rows)
-    if teacher_section is None:
-        raise ValueError("Could not locate the Teacher Matrix section in the CSV file.")
-
-    subjects_by_year, matrix_line_names = parse_year_sections(rows, teacher_section)
-
-    header_index = None
-    for offset in range(teacher_section, len(rows)):
-        row = rows[offset]
-        if row and row[0].strip().lower() == "teacher":
-            header_index = offset
-            break
-    if header_index is None:
-        raise ValueError("Teacher header row not found after the Teacher Matrix marker.")
-
-    teachers, teacher_line_names, teacher_rows = parse_teacher_rows(rows, header_index)
-    if not teachers:
-        raise ValueError("No teacher rows found in the CSV file.")
-
-    allocations, allocation_subjects, allocation_line_mapping = build_allocations(teacher_rows)
-
-    matrix_subjects = flatten_year_subjects(subjects_by_year)
-    subject_year_mapping, matrix_line_mapping = build_subject_mappings(subjects_by_year)
-    all_subjects = merge_subject_sets(allocation_subjects, matrix_subjects)
-
-    for code in allocation_subjects:
-        if code not in subject_year_mapping:
-            inferred = infer_year_from_code(code)
-            if inferred:
-                subject_year_mapping[code] = inferred
-
-    for code, line_index in matrix_line_mapping.items():
-        allocation_line_mapping.setdefault(code, line_index)
+def record_rows(rows: Iterable[List[str]], sink: List[List[str]]) -> Iterator[List[str]]:
+    for row in rows:
+        sink.append(row)
+        yield row
+
+
+def convert_rows_to_payload(
+    rows: Iterable[List[str]],
+    include_csv_data: bool = True,
+    metrics=NULL_METRICS,
+    source: str = "the input",
+    detect_period_matrix: bool = False,
+) -> Dict[str, object]:
+    """Build a Matrix payload from matrix rows in a single streaming pass.
+
+    Rows are only retained when ``include_csv_data`` is set, because the payload then
+    embeds the source grid as ``csvData``. ``metrics`` receives per-stage timings and
+    ``source`` names the input in error messages. ``detect_period_matrix`` is set for
+    workbooks only: a Period-Matrix sheet has no teacher rows, so its payload places
+    subjects on lines and years with no teachers or allocations.
+    """
+    rows = metrics.timed_iter("read", rows)
+    csv_rows: List[List[str]] = []
+    if include_csv_data:
+        rows = record_rows(rows, csv_rows)
+
+    subjects_by_year: Dict[str, List[Set[str]]] = {}
+    matrix_line_names: List[str] = []
+    teacher_line_names: List[str] = []
+    section_found = False
+    header_found = False
+    period_layout = False
 
-    teacher_load_settings = create_teacher_load_settings(teacher_rows)
+    teachers: List[str] = []
+    teacher_load_settings: Dict[str, Dict[str, Union[float, str]]] = {}
+    allocations: Dict[str, Union[List[str], str]] = {}
+    allocation_subjects: Set[str] = set()
+    allocation_line_mapping: Dict[str, int] = {}
+
+    codes = StringTable()
+    events = metrics.timed_iter(
+        "teacher_parse", iter_layout_events(rows, table=codes, detect_period_matrix=detect_period_matrix), lambda event: EVENT_STAGES[event.kind]
+    )
+    for event in events:
+        if event.kind == EVENT_TEACHER:
+            row = event.teacher
+            with metrics.stage("allocation_build", items=len(row.line_codes)):
+                add_teacher_allocations(len(teachers), row, allocations, allocation_subjects, allocation_line_mapping)
+            teachers.append(row.name)
+            teacher_load_settings[row.name] = teacher_load_setting(row)
+        elif event.kind == EVENT_YEAR:
+            matrix_line_names = []
+        elif event.kind == EVENT_LINE_HEADER:
+            matrix_line_names = event.line_names
+            apply_year_event(event, subjects_by_year)
+        elif event.kind == EVENT_SUBJECT_ROW:
+            apply_year_event(event, subjects_by_year)
+        elif event.kind == EVENT_TEACHER_SECTION:
+            section_found = True
+        elif event.kind == EVENT_TEACHER_HEADER:
+            header_found = True
+            teacher_line_names = event.line_names
+        elif event.kind == EVENT_PERIOD_MATRIX:
+            period_layout = True
+            matrix_line_names = event.line_names
+
+    if period_layout:
+        if not subjects_by_year:
+            raise ValueError(f"No subject codes found under the line header in {source}.")
+    elif not section_found:
+        raise ValueError(f"Could not locate the Teacher Matrix section in {source}.")
+    elif not header_found:
+        raise ValueError(f"Teacher header row not found after the Teacher Matrix marker in {source}.")
+    elif not teachers:
+        raise ValueError(f"No teacher rows found in {source}.")
+
+    with metrics.stage("mapping_merge") as stage:
+        matrix_subjects = flatten_year_subjects(subjects_by_year)
+        subject_year_mapping, matrix_line_mapping = build_subject_mappings(subjects_by_year)
+        all_subjects = merge_subject_sets(allocation_subjects, matrix_subjects)
+
+        for code in allocation_subjects:
+            if code not in subject_year_mapping:
+                inferred = infer_year_from_code(code)
+                if inferred:
+                    subject_year_mapping[code] = inferred
+
+        for code, line_index in matrix_line_mapping.items():
+            allocation_line_mapping.setdefault(code, line_index)
+        stage.count(len(all_subjects))
 
     lines = teacher_line_names if teacher_line_names else matrix_line_names
 
@@ -280,7 +539,7 @@ def convert_csv_to_payload(csv_path: Path) -> Dict[str, object]:
         "subjects": sorted(all_subjects),
         "teachers": list(teachers),
         "lines": list(lines),
-        "csvData": rows,
+        "csvData": csv_rows,
         "subjectLineMapping": allocation_line_mapping,
         "subjectSplits": {},
         "subjectYearMapping": subject_year_mapping,
@@ -290,28 +549,66 @@ def convert_csv_to_payload(csv_path: Path) -> Dict[str, object]:
     return payload
 
 
-def default_output_path(input_path: Path) -> Path:
-    today = datetime.now().strftime("%Y-%m-%d")
-    return input_path.with_name(f"faculty-allocations-{today}.json")
-
+def convert_csv_to_payload(
+    csv_path: Path,
+    include_csv_data: bool = True,
+    metrics=NULL_METRICS,
+    detect_period_matrix: bool = False,
+) -> Dict[str, object]:
+    return convert_rows_to_payload(
+        iter_csv_rows(csv_path), include_csv_data, metrics, source=str(csv_path), detect_period_matrix=detect_period_matrix
+    )
+
+
+def convert_xlsx_to_payload(
+    xlsx_path: Path,
+    sheet: Optional[Union[str, int]] = None,
+    include_csv_data: bool = True,
+    metrics=NULL_METRICS,
+) -> Dict[str, object]:
+    source = f"{xlsx_path} (sheet {sheet})" if sheet is not None else str(xlsx_path)
+    return convert_rows_to_payload(
+        iter_xlsx_rows(xlsx_path, sheet), include_csv_data, metrics, source=source, detect_period_matrix=True
+    )
+
+
+def convert_matrix_file(
+    input_path: Path,
+    sheet: Optional[Union[str, int]] = None,
+    include_csv_data: bool = True,
+    metrics=NULL_METRICS,
+    layout: str = "auto",
+) -> Dict[str, object]:
+    """Convert a CSV or XLSX matrix; workbooks may be Period-Matrix sheets, CSVs only with ``layout="period-matrix"``."""
+    if is_xlsx_path(input_path):
+        return convert_xlsx_to_payload(input_path, sheet, include_csv_data, metrics)
+    return convert_csv_to_payload(input_path, include_csv_data, metrics, detect_period_matrix=layout == "period-matrix")
+
+
+def make_deterministic(payload: Dict[str, object], timestamp: str = DETERMINISTIC_TIMESTAMP) -> Dict[str, object]:
+    """Fix the timestamp and sort the mapping sections so equal inputs give equal bytes."""
+    payload["timestamp"] = timestamp
+    for key in SORTED_SECTIONS:
+        section = payload.get(key)
+        if isinstance(section, dict):
+            payload[key] = dict(sorted(section.items()))
+    return payload
 
-def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Convert a timetable matrix CSV into the Matrix JSON format.")
-    parser.add_argument("csv_file", type=Path, help="Path to the CSV file to convert.")
-    parser.add_argument("-o", "--output", type=Path, help="Path for the generated JSON file.")
-    parser.add_argument("--pretty", action="store_true", help="Pretty-print the JSON output.")
-    return parser.parse_args(argv)
 
+def default_output_path(input_path: Path, suffix: str = ".json", deterministic: bool = False) -> Path:
+    if deterministic:
+        return input_path.with_name(f"{input_path.stem}{suffix}")
+    today = datetime.now().strftime("%Y-%m-%d")
+    return input_path.with_name(f"faculty-allocations-{today}{suffix}")
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    args = parse_args(argv)
-    csv_path: Path = args.csv_file
-    if not csv_path.exists():
-        raise SystemExit(f"CSV file not found: {csv_path}")
 
-    payload = convert_csv_to_payload(csv_path)
+def write_payload(payload: Dict[str, object], csv_path: Path, args: argparse.Namespace) -> Path:
+    if args.format == "columnar":
+        output_path = args.output or default_output_path(csv_path, COLUMNAR_SUFFIX, args.deterministic)
+        write_columnar_snapshot(payload, output_path)
+        return output_path
 
-    output_path = args.output or default_output_path(csv_path)
+    output_path = args.output or default_output_path(csv_path, deterministic=args.deterministic)
     json_kwargs = {"ensure_ascii": False}
     if args.pretty:
         json_kwargs["indent"] = 2
@@ -322,8 +619,260 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     with output_path.open("w", encoding="utf-8") as handle:
         json.dump(payload, handle, **json_kwargs)
         handle.write("\n")
+    return output_path
+
+
+def resolve_matrix_paths(sources: Iterable[str]) -> List[Path]:
+    """Expand files, directories and globs into the matrix CSV and XLSX files they name."""
+    paths: Set[Path] = set()
+    for source in sources:
+        source_path = Path(source)
+        if source_path.is_dir():
+            candidates: Iterable[Path] = source_path.iterdir()
+        elif source_path.is_file():
+            candidates = [source_path]
+        else:
+            candidates = (Path(match) for match in glob.glob(source))
+        paths.update(path for path in candidates if path.is_file() and path.suffix.lower() in MATRIX_SUFFIXES)
+    return sorted(paths)
+
+
+def batch_output_paths(input_paths: Sequence[Path], output_dir: Path, suffix: str = ".json") -> List[Path]:
+    output_paths = []
+    used: Set[str] = set()
+    for path in input_paths:
+        candidate = f"{path.stem}{suffix}"
+        counter = 2
+        while candidate in used:
+            candidate = f"{path.stem}-{counter}{suffix}"
+            counter += 1
+        used.add(candidate)
+        output_paths.append(output_dir / candidate)
+    return output_paths
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def conversion_key(input_digest: str, sheet, args: argparse.Namespace) -> str:
+    """Hash of the input content and every option that changes the output bytes."""
+    options = {
+        "version": CONVERSION_CACHE_VERSION,
+        "input": input_digest,
+        "sheet": sheet,
+        "format": args.format,
+        "pretty": args.pretty,
+        "omit_csv_data": args.omit_csv_data,
+        "layout": args.layout,
+        "timestamp": args.timestamp if args.deterministic else None,
+    }
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    """Outputs of earlier batch conversions, keyed by output name and checked by content hash."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                stored = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                stored = {}
+            if stored.get("version") == CONVERSION_CACHE_VERSION:
+                self.entries = stored.get("entries", {})
+
+    def is_current(self, output_path: Path, key: str) -> bool:
+        entry = self.entries.get(output_path.name)
+        return (
+            entry is not None
+            and entry.get("key") == key
+            and output_path.is_file()
+            and file_digest(output_path) == entry.get("output")
+        )
+
+    def put(self, output_path: Path, key: str) -> None:
+        self.entries[output_path.name] = {"key": key, "output": file_digest(output_path)}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        payload = {"version": CONVERSION_CACHE_VERSION, "entries": self.entries}
+        self.path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        self.dirty = False
+
+
+def convert_to_file(input_path: Path, output_path: Path, args: argparse.Namespace) -> Path:
+    """Convert one matrix file to ``output_path``; a batch worker's unit of work."""
+    sheet = args.sheet if is_xlsx_path(input_path) else None
+    payload = convert_matrix_file(input_path, sheet, include_csv_data=not args.omit_csv_data, layout=args.layout)
+    if args.deterministic:
+        make_deterministic(payload, args.timestamp)
+    return write_payload(payload, input_path, argparse.Namespace(**{**vars(args), "output": output_path}))
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    input_paths = resolve_matrix_paths(args.batch)
+    if not input_paths:
+        raise SystemExit(f"No matrix CSV or XLSX files found for {', '.join(args.batch)}")
+    output_dir: Path = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = COLUMNAR_SUFFIX if args.format == "columnar" else ".json"
+    cache = ConversionCache(output_dir / CONVERSION_CACHE_NAME)
+
+    pending = []
+    reused = 0
+    for input_path, output_path in zip(input_paths, batch_output_paths(input_paths, output_dir, suffix)):
+        sheet = args.sheet if is_xlsx_path(input_path) else None
+        key = conversion_key(file_digest(input_path), sheet, args)
+        if not args.force and cache.is_current(output_path, key):
+            reused += 1
+            continue
+        pending.append((input_path, output_path, key))
+
+    failures = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(convert_to_file, input_path, output_path, args): (input_path, output_path, key)
+                for input_path, output_path, key in pending
+            }
+            for future in as_completed(futures):
+                input_path, output_path, key = futures[future]
+                try:
+                    future.result()
+                except Exception as exc:  # noqa: BLE001 - reported with the other failures
+                    failures.append((input_path, exc))
+                    continue
+                cache.put(output_path, key)
+                print(f"Wrote {output_path}")
+    cache.save()
+
+    for input_path, exc in sorted(failures, key=lambda failure: failure[0]):
+        print(f"{input_path}: {exc}")
+    print(
+        f"Converted {len(pending) - len(failures)}, reused {reused} unchanged, "
+        f"failed {len(failures)} of {len(input_paths)} files into {output_dir}"
+    )
+    return 1 if failures else 0
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert a timetable matrix CSV or XLSX into the Matrix JSON format.")
+    parser.add_argument("csv_file", type=Path, nargs="?", help="Path to the CSV or .xlsx workbook to convert.")
+    parser.add_argument(
+        "--batch",
+        action="append",
+        metavar="SOURCE",
+        help="Convert every CSV/XLSX in a directory, glob or file in parallel; may be repeated.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("converted"),
+        help="Directory for batch outputs and their conversion cache (default: converted).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for batch mode. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reconvert batch inputs even when the cache shows an unchanged input.",
+    )
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="Use a fixed timestamp, sorted mapping keys and an input-named output so equal inputs give equal files.",
+    )
+    parser.add_argument(
+        "--timestamp",
+        default=DETERMINISTIC_TIMESTAMP,
+        help=f"Timestamp written by --deterministic (default {DETERMINISTIC_TIMESTAMP}).",
+    )
+    parser.add_argument(
+        "--sheet",
+        help="Worksheet to read from an .xlsx workbook, by name or zero-based index (default: first sheet).",
+    )
+    parser.add_argument(
+        "--layout",
+        choices=("auto", "period-matrix"),
+        default="auto",
+        help="CSV layout: the Teacher Matrix template (auto, default) or a Period-Matrix export. "
+        "Workbooks are always checked for the Period-Matrix layout.",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Path for the generated JSON file.")
+    parser.add_argument("--pretty", action="store_true", help="Pretty-print the JSON output.")
+    parser.add_argument(
+        "--format",
+        choices=("json", "columnar"),
+        default="json",
+        help="Output format: Matrix JSON or the compact columnar snapshot (.mxc).",
+    )
+    parser.add_argument(
+        "--omit-csv-data",
+        action="store_true",
+        help="Leave csvData empty so large files are converted without keeping the source grid in memory.",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write per-stage wall time, row counts and peak memory to this JSON file.",
+    )
+    parser.add_argument("--profile", type=Path, help="Write cProfile stats for the conversion to this file.")
+    args = parser.parse_args(argv)
+    if args.batch:
+        if args.csv_file is not None:
+            parser.error("give either an input file or --batch, not both")
+        if args.output or args.metrics or args.profile:
+            parser.error("--output, --metrics and --profile only apply to single-file conversion")
+    elif args.csv_file is None:
+        parser.error("an input file or --batch is required")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.batch:
+        return run_batch(args)
+    csv_path: Path = args.csv_file
+    if not csv_path.exists():
+        raise SystemExit(f"Input file not found: {csv_path}")
+    if args.sheet is not None and not is_xlsx_path(csv_path):
+        raise SystemExit("--sheet only applies to .xlsx workbooks.")
+
+    metrics = StageMetrics().start() if args.metrics else NULL_METRICS
+    with profile_to(args.profile):
+        try:
+            payload = convert_matrix_file(
+                csv_path, args.sheet, include_csv_data=not args.omit_csv_data, metrics=metrics, layout=args.layout
+            )
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        if args.deterministic:
+            make_deterministic(payload, args.timestamp)
+
+        with metrics.stage("serialization") as stage:
+            output_path = write_payload(payload, csv_path, args)
+            stage.count(output_path.stat().st_size)
+    metrics.stop()
 
     print(f"Wrote {output_path}")
+    if args.metrics:
+        metrics.write_json(args.metrics, command="convert_csv_to_json", input=str(csv_path), output=str(output_path))
+        print(f"Wrote {args.metrics}")
+    if args.profile:
+        print(f"Wrote {args.profile}")
     return 0
 
 
@@ -0,0 +1,296 @@
+"""Merge several faculty payloads into one whole-school payload.
+
+Each faculty is converted and verified on its own, so staff who teach in more than one
+faculty only ever show part of their load. This tool combines faculty payloads and then
+computes every teacher's load once over the merged allocations:
+* teachers are merged by name, ignoring case and extra spaces;
+* lines are merged by label;
+* ``line-teacher`` allocation keys (and room overrides) are remapped to merged indices;
+* ``teacherLoadSettings`` are reconciled by a policy, and disagreements are reported.
+
+Inputs can be Matrix JSON or columnar snapshots, or matrix CSV/XLSX files, which are
+converted with ``convert_matrix_file``. Inputs are read in worker processes; merging
+itself is a cheap pass in input order, so the result does not depend on scheduling.
+"""
+
+import argparse
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from convert_csv_to_json import convert_matrix_file
+from load_renderers import RENDERERS, get_renderer, render_loads
+from period_rules import PeriodRuleEngine
+from snapshot_archive import read_snapshot_payload
+from verify_teacher_load import build_snapshot_loads, iter_report_loads
+from xlsx_reader import is_xlsx_path
+
+SETTINGS_POLICIES = ("first", "max")
+SETTINGS_NUMERIC_FIELDS = ("periodAllowance", "assemblyFullCount", "assemblyShortCount", "additionalMinutes")
+ALLOCATION_KEY = re.compile(r"^(\d+)-(\d+)$")
+
+
+def identity_key(name: str) -> str:
+    return " ".join(str(name).split()).casefold()
+
+
+def read_faculty_payload(path: Path) -> Dict[str, object]:
+    """A faculty payload from a snapshot, or from a matrix CSV/XLSX converted without ``csvData``."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv" or is_xlsx_path(path):
+        return convert_matrix_file(path, include_csv_data=False)
+    return read_snapshot_payload(path)
+
+
+def _fte_value(value) -> float:
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return 0.0
+
+
+def reconcile_settings(candidates: List[Tuple[str, dict]], policy: str = "first") -> dict:
+    """Combine one teacher's settings from several faculties.
+
+    ``first`` keeps the first faculty's settings. ``max`` takes the largest FTE and the
+    largest of each allowance count across faculties.
+    """
+    if policy not in SETTINGS_POLICIES:
+        raise ValueError(f"Unknown settings policy {policy!r}; choose from {', '.join(SETTINGS_POLICIES)}.")
+    settings = dict(candidates[0][1])
+    if policy == "max":
+        for _, other in candidates[1:]:
+            if "fte" in other and ("fte" not in settings or _fte_value(other["fte"]) > _fte_value(settings["fte"])):
+                settings["fte"] = other["fte"]
+            for name in SETTINGS_NUMERIC_FIELDS:
+                value = other.get(name)
+                if isinstance(value, (int, float)) and value > settings.get(name, 0):
+                    settings[name] = value
+    return settings
+
+
+@dataclass
+class MergeReport:
+    sources: List[str] = field(default_factory=list)
+    teacher_sources: Dict[str, List[str]] = field(default_factory=dict)
+    settings_conflicts: Dict[str, List[Tuple[str, dict]]] = field(default_factory=dict)
+    split_conflicts: List[Tuple[str, str]] = field(default_factory=list)
+    shared_cells: List[Tuple[str, str, List[str]]] = field(default_factory=list)
+
+    @property
+    def shared_teachers(self) -> Dict[str, List[str]]:
+        return {name: sources for name, sources in self.teacher_sources.items() if len(sources) > 1}
+
+
+class FacultyMerger:
+    """Accumulates faculty payloads with ``add`` and builds the merged payload."""
+
+    def __init__(self, settings_policy: str = "first") -> None:
+        if settings_policy not in SETTINGS_POLICIES:
+            raise ValueError(f"Unknown settings policy {settings_policy!r}; choose from {', '.join(SETTINGS_POLICIES)}.")
+        self.settings_policy = settings_policy
+        self.report = MergeReport()
+        self.teachers: List[str] = []
+        self.teacher_ids: Dict[str, int] = {}
+        self.lines: List[str] = []
+        self.line_ids: Dict[str, int] = {}
+        self.allocations: Dict[str, List[str]] = {}
+        self.allocation_sources: Dict[str, List[str]] = {}
+        self.subjects: set = set()
+        self.subject_splits: Dict[str, object] = {}
+        self.subject_line_mapping: Dict[str, int] = {}
+        self.subject_year_mapping: Dict[str, object] = {}
+        self.settings: Dict[str, List[Tuple[str, dict]]] = {}
+        self.timestamps: List[str] = []
+        self.extra: Dict[str, dict] = {}
+
+    def _teacher_index(self, name: str, source: str) -> int:
+        key = identity_key(name)
+        index = self.teacher_ids.get(key)
+        if index is None:
+            index = self.teacher_ids[key] = len(self.teachers)
+            self.teachers.append(name)
+        sources = self.report.teacher_sources.setdefault(self.teachers[index], [])
+        if source not in sources:
+            sources.append(source)
+        return index
+
+    def _line_index(self, label: str) -> int:
+        key = identity_key(label)
+        index = self.line_ids.get(key)
+        if index is None:
+            index = self.line_ids[key] = len(self.lines)
+            self.lines.append(label)
+        return index
+
+    def _remap_key(self, key: str, line_map: List[int], teacher_map: List[int]) -> Optional[str]:
+        match = ALLOCATION_KEY.match(key)
+        if not match:
+            return None
+        line_idx, teacher_idx = int(match.group(1)), int(match.group(2))
+        if line_idx >= len(line_map) or teacher_idx >= len(teacher_map):
+            return None
+        return f"{line_map[line_idx]}-{teacher_map[teacher_idx]}"
+
+    def add(self, payload, source: str) -> None:
+        self.report.sources.append(source)
+        teacher_map = [self._teacher_index(name, source) for name in payload.get("teachers", [])]
+        line_map = [self._line_index(label) for label in payload.get("lines", [])]
+
+        for key, subjects in payload.get("allocations", {}).items():
+            merged_key = self._remap_key(key, line_map, teacher_map)
+            if merged_key is None:
+                # Keys that are not valid ``line-teacher`` indices cannot be placed.
+                continue
+            subject_list = subjects if isinstance(subjects, list) else [subjects]
+            cell = self.allocations.setdefault(merged_key, [])
+            cell.extend(subject for subject in subject_list if subject not in cell)
+            cell_sources = self.allocation_sources.setdefault(merged_key, [])
+            if source not in cell_sources:
+                cell_sources.append(source)
+
+        self.subjects.update(payload.get("subjects", []))
+        for base, entries in payload.get("subjectSplits", {}).items():
+            existing = self.subject_splits.setdefault(base, entries)
+            if existing != entries:
+                self.report.split_conflicts.append((base, source))
+        for code, line_idx in payload.get("subjectLineMapping", {}).items():
+            if isinstance(line_idx, int) and 0 <= line_idx < len(line_map):
+                self.subject_line_mapping.setdefault(code, line_map[line_idx])
+        for code, year in payload.get("subjectYearMapping", {}).items():
+            self.subject_year_mapping.setdefault(code, year)
+
+        for name, settings in payload.get("teacherLoadSettings", {}).items():
+            key = identity_key(name)
+            if key in self.teacher_ids and isinstance(settings, dict):
+                self.settings.setdefault(self.teachers[self.teacher_ids[key]], []).append((source, settings))
+
+        timestamp = payload.get("timestamp")
+        if isinstance(timestamp, str):
+            self.timestamps.append(timestamp)
+
+        for key in ("subjectRoomAssignments", "allocationRoomOverrides"):
+            section = payload.get(key)
+            if not isinstance(section, dict):
+                continue
+            merged = self.extra.setdefault(key, {})
+            for entry_key, value in section.items():
+                if key == "allocationRoomOverrides":
+                    entry_key = self._remap_key(entry_key, line_map, teacher_map)
+                    if entry_key is None:
+                        continue
+                merged.setdefault(entry_key, value)
+
+    def payload(self) -> Dict[str, object]:
+        load_settings = {}
+        for name, candidates in self.settings.items():
+            load_settings[name] = reconcile_settings(candidates, self.settings_policy)
+            if any(settings != candidates[0][1] for _, settings in candidates[1:]):
+                self.report.settings_conflicts[name] = candidates
+        self.report.shared_cells = [
+            (self.teachers[int(key.split("-")[1])], self.lines[int(key.split("-")[0])], sources)
+            for key, sources in self.allocation_sources.items()
+            if len(sources) > 1
+        ]
+        return {
+            "allocations": self.allocations,
+            "timestamp": max(self.timestamps) if self.timestamps else None,
+            "subjects": sorted(self.subjects),
+            "teachers": list(self.teachers),
+            "lines": list(self.lines),
+            # Each faculty's source grid only describes that faculty, so none is kept.
+            "csvData": [],
+            "subjectLineMapping": self.subject_line_mapping,
+            "subjectSplits": self.subject_splits,
+            "subjectYearMapping": self.subject_year_mapping,
+            "teacherLoadSettings": load_settings,
+            **self.extra,
+        }
+
+
+def read_faculty_payloads(paths: Sequence[Path], workers: Optional[int] = None) -> List[Dict[str, object]]:
+    """Read or convert ``paths`` in worker processes, returning payloads in input order."""
+    if len(paths) < 2 or workers == 1:
+        return [read_faculty_payload(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_faculty_payload, paths))
+
+
+def merge_faculty_payloads(payloads, sources: Sequence[str], settings_policy: str = "first"):
+    """Return ``(merged payload, MergeReport)``."""
+    merger = FacultyMerger(settings_policy)
+    for payload, source in zip(payloads, sources):
+        merger.add(payload, source)
+    return merger.payload(), merger.report
+
+
+def format_merge_summary(report: MergeReport, load_index) -> str:
+    lines = [f"Merged {len(report.sources)} faculties, {len(report.teacher_sources)} teachers."]
+    shared = report.shared_teachers
+    if shared:
+        lines.append(f"Shared teachers ({len(shared)}):")
+        for name, sources in shared.items():
+            load = load_index.get(name)
+            balance = f"; balance {load['balance_minutes']:.2f}" if load else ""
+            lines.append(f"- {name}: {', '.join(sources)}{balance}")
+    for name, candidates in report.settings_conflicts.items():
+        lines.append(
+            f"Load settings differ for {name}: "
+            + "; ".join(f"{source} {json.dumps(settings, sort_keys=True)}" for source, settings in candidates)
+        )
+    for base, source in report.split_conflicts:
+        lines.append(f"Split of {base} in {source} differs from an earlier faculty; the first was kept.")
+    for teacher, line, sources in report.shared_cells:
+        lines.append(f"{teacher} is allocated on {line} by more than one faculty: {', '.join(sources)}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge faculty payloads and compute whole-school teacher loads.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Faculty snapshots (.json, .mxc) or matrix CSV/XLSX files.")
+    parser.add_argument("--output", type=Path, help="Write the merged payload to this JSON file.")
+    parser.add_argument("--report", type=Path, help="Write the whole-school load report to this file.")
+    parser.add_argument(
+        "--format",
+        choices=sorted(RENDERERS),
+        default="markdown",
+        help="Report format: markdown (default), csv (totals per teacher), jsonl or html.",
+    )
+    parser.add_argument(
+        "--settings-policy",
+        choices=SETTINGS_POLICIES,
+        default="first",
+        help="How to combine a shared teacher's load settings: first faculty wins, or the maximum of each field.",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes for reading inputs. Defaults to the CPU count.")
+    parser.add_argument("--period-profile", help="Optional JSON profile overriding the subject-period rules.")
+    args = parser.parse_args(argv)
+
+    try:
+        payloads = read_faculty_payloads(args.inputs, args.workers)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Could not read the faculties: {exc}", file=sys.stderr)
+        return 1
+    merged, report = merge_faculty_payloads(payloads, [path.name for path in args.inputs], args.settings_policy)
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    load_index = build_snapshot_loads(merged, rules)
+
+    if args.output:
+        with args.output.open("w", encoding="utf-8") as handle:
+            json.dump(merged, handle, ensure_ascii=False, indent=2)
+        print(f"Merged payload written to {args.output}")
+    report_path = args.report or Path(f"whole_school_load_report{get_renderer(args.format).extension}")
+    with report_path.open("w", encoding="utf-8") as handle:
+        render_loads(iter_report_loads(merged, load_index), handle, args.format, "Whole-school teacher loads")
+    print(f"Whole-school load report written to {report_path}")
+    sys.stdout.write(format_merge_summary(report, load_index))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
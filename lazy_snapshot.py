@@ -0,0 +1,206 @@
+"""Lazily decoded view of a Matrix JSON snapshot.
+
+A snapshot's top-level object is scanned once. The sections the load checks use
+(``LOAD_KEYS``) are decoded straight away. Every other section, including the
+``csvData`` source grid, is only located and kept as a span of the source text until
+it is first read.
+
+Finding a skipped section's end must be cheaper than decoding it, which a Python
+character loop is not. So a flat mapping ends at its first ``}``, and any other value
+ends before the next key: the first quote followed by a colon. The span
+is accepted only if simple counts prove it is one value:
+* no escaped quotes;
+* an even number of quotes;
+* balanced brackets;
+* the shape of a flat grid, list or mapping;
+* for a list, no ``"`` followed by ``:``, i.e. no key.
+Anything else is decoded normally. Each deferred span is validated again by
+``json.loads`` when it is read.
+"""
+
+import json
+import re
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
+
+LOAD_KEYS: FrozenSet[str] = frozenset({"teachers", "lines", "allocations", "subjectSplits", "teacherLoadSettings"})
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+KEY_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+COLON_PATTERN = re.compile(r'[ \t\n\r]*:')
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return WHITESPACE.match(text, pos).end()
+
+
+def _find_key_end(text: str, start: int, end: int) -> int:
+    """Index of the first ``"`` followed by optional whitespace and ``:``, or -1.
+
+    Colons are rare in the deferred sections, so stepping from colon to colon with
+    ``str.find`` is much cheaper than a regex search that stops at every quote.
+    """
+    colon = text.find(":", start, end)
+    while colon != -1:
+        quote = colon - 1
+        while quote >= start and text[quote] in " \t\n\r":
+            quote -= 1
+        if quote >= start and text[quote] == '"':
+            return quote
+        colon = text.find(":", colon + 1, end)
+    return -1
+
+
+def _is_flat_value(span: str) -> bool:
+    """True when ``span`` is provably one flat JSON value, judged by counts alone.
+
+    Accepted shapes are arrays of scalars or of arrays of scalars (``csvData``,
+    ``subjects``), and objects of scalars (``subjectLineMapping``). Without ``\\"`` every
+    quote delimits a string, and a list holds no ``"`` before a ``:``, so these shapes
+    cannot hide a second top-level entry.
+    """
+    if not span or '\\"' in span or span.count('"') % 2:
+        return False
+    if span[0] == "[" and span[-1] == "]":
+        return (
+            _find_key_end(span, 0, len(span)) == -1
+            and "{" not in span
+            and "}" not in span
+            and span.count("[") == span.count("]")
+        )
+    if span[0] == "{" and span[-1] == "}":
+        return span.count("{") == 1 and span.count("}") == 1 and "[" not in span and "]" not in span
+    return False
+
+
+def _deferred_end(text: str, start: int, close: int) -> Optional[int]:
+    """Return the end of the value at ``start`` without decoding it, or None if unsure.
+
+    A list or scalar stops before the first following key, whatever its name, so an
+    unknown section is never folded into the span before it. A false match inside a
+    string leaves an unbalanced span, which ``_is_flat_value`` rejects.
+    """
+    if text.startswith("{", start):
+        span = text[start:text.find("}", start, close) + 1]
+        return start + len(span) if _is_flat_value(span) else None
+
+    key_end = _find_key_end(text, start, close)
+    if key_end == -1:
+        span = text[start:close].rstrip(" \t\n\r")
+    else:
+        span = text[start:text.rfind('"', start, key_end)].rstrip(" \t\n\r")
+        if not span.endswith(","):
+            return None
+        span = span[:-1].rstrip(" \t\n\r")
+    return start + len(span) if _is_flat_value(span) else None
+
+
+def scan_snapshot(
+    text: str, eager: FrozenSet[str] = LOAD_KEYS
+) -> Tuple[Dict[str, object], Dict[str, Tuple[int, int]], List[str]]:
+    """Split a snapshot's top-level object into decoded values and deferred spans.
+
+    Returns ``(values, spans, key order)``. Raises ``ValueError`` for malformed JSON or a
+    top level that is not an object.
+    """
+    pos = _skip_whitespace(text, 0)
+    if not text.startswith("{", pos):
+        raise ValueError("Snapshot JSON must be an object.")
+    close = len(text)
+    while close and text[close - 1] in " \t\n\r":
+        close -= 1
+    close -= 1
+
+    values: Dict[str, object] = {}
+    spans: Dict[str, Tuple[int, int]] = {}
+    order: List[str] = []
+    pos = _skip_whitespace(text, pos + 1)
+    if text.startswith("}", pos):
+        return values, spans, order
+
+    while True:
+        match = KEY_PATTERN.match(text, pos)
+        if not match:
+            raise ValueError(f"Expected a key at character {pos}.")
+        key = json.loads(match.group(0))
+        colon = COLON_PATTERN.match(text, match.end())
+        if not colon:
+            raise ValueError(f"Expected ':' after {key!r} at character {match.end()}.")
+        pos = _skip_whitespace(text, colon.end())
+
+        end = None
+        if key not in eager:
+            end = _deferred_end(text, pos, close)
+        if end is None:
+            value, end = _decoder.raw_decode(text, pos)
+            values[key] = value
+            spans.pop(key, None)
+        else:
+            spans[key] = (pos, end)
+            values.pop(key, None)
+        if key not in order:
+            order.append(key)
+
+        pos = _skip_whitespace(text, end)
+        if text.startswith(",", pos):
+            pos = _skip_whitespace(text, pos + 1)
+            continue
+        if text.startswith("}", pos) and not text[pos + 1:].strip():
+            return values, spans, order
+        raise ValueError(f"Expected ',' or '}}' at character {pos}.")
+
+
+class LazySnapshot(Mapping):
+    """Read-only mapping over a snapshot that decodes deferred sections on first access."""
+
+    def __init__(self, text: str, eager: FrozenSet[str] = LOAD_KEYS) -> None:
+        self._text = text
+        self._values, self._spans, self._order = scan_snapshot(text, eager)
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path], eager: FrozenSet[str] = LOAD_KEYS) -> "LazySnapshot":
+        return cls(Path(path).read_text(encoding="utf-8"), eager)
+
+    def __enter__(self) -> "LazySnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Nothing to release: the snapshot holds no file, only its text.
+
+        Present so JSON and columnar snapshots can both be used in a ``with`` block.
+        """
+
+    def is_decoded(self, key: str) -> bool:
+        return key in self._values
+
+    def __getitem__(self, key: str):
+        if key in self._values:
+            return self._values[key]
+        start, end = self._spans[key]
+        value = self._values[key] = json.loads(self._text[start:end])
+        del self._spans[key]
+        if not self._spans:
+            self._text = ""
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values or key in self._spans
+
+    def to_payload(self) -> Dict[str, object]:
+        return {key: self[key] for key in self._order}
+
+
+def load_lazy_snapshot(path: Union[str, Path], eager: FrozenSet[str] = LOAD_KEYS) -> LazySnapshot:
+    return LazySnapshot.from_path(path, eager)
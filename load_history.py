@@ -0,0 +1,559 @@
+"""SQLite history of allocation snapshots for time-series load queries.
+
+``ingest`` loads dated snapshots into one indexed SQLite file. Queries then read that
+file instead of re-parsing every export. The tables are:
+* teachers, lines and subjects, with each name stored once;
+* allocation cells, which hold each teacher's cells as a content-addressed cell set;
+* splits and load settings, each content-addressed in the same way;
+* loads, one row per distinct set of totals.
+
+Rows are keyed by a digest of their content, so a teacher whose cells, settings and
+load did not change between two snapshots adds only one small ``snapshot_teachers``
+row. A snapshot whose bytes are already in the store is skipped.
+
+Usage::
+
+    python load_history.py ingest history.db faculty-allocations-*.json
+    python load_history.py balance history.db "Steve Cowell"
+    python load_history.py moves history.db 12COV1
+    python load_history.py over history.db 2025-11-05 --tolerance 30
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from period_rules import PeriodRuleEngine
+from snapshot_cache import SnapshotCache, content_digest
+from verify_teacher_load import iter_allocation_cells, resolve_snapshot_paths
+
+SCHEMA_VERSION = 1
+SPLIT_MARKER = "▸"
+FILENAME_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS teachers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS split_sets (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS splits (
+    split_set_id INTEGER NOT NULL REFERENCES split_sets(id),
+    subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    base_subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    periods REAL,
+    PRIMARY KEY (split_set_id, subject_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    taken_at TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    split_set_id INTEGER NOT NULL REFERENCES split_sets(id)
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+CREATE TABLE IF NOT EXISTS cell_sets (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS allocation_cells (
+    cell_set_id INTEGER NOT NULL REFERENCES cell_sets(id),
+    line_position INTEGER NOT NULL,
+    line_id INTEGER NOT NULL REFERENCES lines(id),
+    subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    PRIMARY KEY (cell_set_id, line_position, subject_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS allocation_cells_subject ON allocation_cells (subject_id, cell_set_id);
+CREATE TABLE IF NOT EXISTS load_settings (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    fte TEXT,
+    period_allowance REAL,
+    assembly_full_count REAL,
+    assembly_short_count REAL,
+    additional_minutes REAL
+);
+CREATE TABLE IF NOT EXISTS loads (
+    id INTEGER PRIMARY KEY,
+    teaching_minutes REAL NOT NULL,
+    allowance_minutes REAL NOT NULL,
+    total_load_minutes REAL NOT NULL,
+    base_minutes REAL NOT NULL,
+    balance_minutes REAL NOT NULL,
+    UNIQUE (teaching_minutes, allowance_minutes, total_load_minutes, base_minutes, balance_minutes)
+);
+CREATE TABLE IF NOT EXISTS snapshot_teachers (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    position INTEGER NOT NULL,
+    teacher_id INTEGER NOT NULL REFERENCES teachers(id),
+    cell_set_id INTEGER NOT NULL REFERENCES cell_sets(id),
+    load_settings_id INTEGER REFERENCES load_settings(id),
+    load_id INTEGER NOT NULL REFERENCES loads(id),
+    PRIMARY KEY (snapshot_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshot_teachers_teacher ON snapshot_teachers (teacher_id, snapshot_id);
+CREATE INDEX IF NOT EXISTS snapshot_teachers_cell_set ON snapshot_teachers (cell_set_id);
+"""
+
+LOAD_COLUMNS = ("teaching_minutes", "allowance_minutes", "total_load_minutes", "base_minutes", "balance_minutes")
+
+
+def _digest(value) -> str:
+    return content_digest(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+
+
+def snapshot_taken_at(data, path: Optional[Path] = None) -> str:
+    """The snapshot's own ``timestamp``, else a date in its file name, else its modification time."""
+    timestamp = data.get("timestamp")
+    if isinstance(timestamp, str) and timestamp.strip():
+        return timestamp.strip()
+    if path is not None:
+        match = FILENAME_DATE.search(path.name)
+        if match:
+            return match.group(1)
+        return datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat(timespec="seconds")
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class LoadHistory:
+    """An open history store. ``rules`` is the period rule engine used for ingested loads."""
+
+    def __init__(self, path: Union[str, Path], rules=None) -> None:
+        self.path = str(path)
+        self.cache = SnapshotCache(max_snapshots=1, rules=rules)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"{self.path} has history schema {version}; expected {SCHEMA_VERSION}.")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._names: Dict[Tuple[str, str], int] = {}
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "LoadHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # Ingest
+
+    def _name_id(self, table: str, column: str, value: str) -> int:
+        key = (table, value)
+        row_id = self._names.get(key)
+        if row_id is None:
+            cursor = self.connection.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))
+            row = cursor.fetchone()
+            if row is None:
+                row_id = self.connection.execute(
+                    f"INSERT INTO {table} ({column}) VALUES (?)", (value,)
+                ).lastrowid
+            else:
+                row_id = row[0]
+            self._names[key] = row_id
+        return row_id
+
+    def _digest_id(self, table: str, digest: str) -> Tuple[int, bool]:
+        """Return ``(id, created)`` for the content-addressed row ``digest`` in ``table``."""
+        row = self.connection.execute(f"SELECT id FROM {table} WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            return row[0], False
+        return self.connection.execute(f"INSERT INTO {table} (digest) VALUES (?)", (digest,)).lastrowid, True
+
+    def _split_set_id(self, subject_splits) -> int:
+        entries = sorted(
+            (entry["code"], base, entry.get("periods"))
+            for base, parts in (subject_splits or {}).items()
+            if isinstance(parts, list)
+            for entry in parts
+            if isinstance(entry, dict) and entry.get("code")
+        )
+        split_set_id, created = self._digest_id("split_sets", _digest(entries))
+        if created:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO splits (split_set_id, subject_id, base_subject_id, periods) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        split_set_id,
+                        self._name_id("subjects", "code", code),
+                        self._name_id("subjects", "code", base),
+                        periods if isinstance(periods, (int, float)) else None,
+                    )
+                    for code, base, periods in entries
+                ],
+            )
+        return split_set_id
+
+    def _cell_set_id(self, cells: Sequence[Tuple[int, str, str]]) -> int:
+        entries = sorted(set(cells))
+        cell_set_id, created = self._digest_id("cell_sets", _digest(entries))
+        if created:
+            self.connection.executemany(
+                "INSERT INTO allocation_cells (cell_set_id, line_position, line_id, subject_id) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        cell_set_id,
+                        position,
+                        self._name_id("lines", "label", label),
+                        self._name_id("subjects", "code", subject),
+                    )
+                    for position, label, subject in entries
+                ],
+            )
+        return cell_set_id
+
+    def _load_settings_id(self, settings) -> Optional[int]:
+        if not isinstance(settings, dict):
+            return None
+        settings_id, created = self._digest_id("load_settings", _digest(settings))
+        if created:
+            self.connection.execute(
+                "UPDATE load_settings SET fte = ?, period_allowance = ?, assembly_full_count = ?, "
+                "assembly_short_count = ?, additional_minutes = ? WHERE id = ?",
+                (
+                    None if settings.get("fte") is None else str(settings.get("fte")),
+                    settings.get("periodAllowance"),
+                    settings.get("assemblyFullCount"),
+                    settings.get("assemblyShortCount"),
+                    settings.get("additionalMinutes"),
+                    settings_id,
+                ),
+            )
+        return settings_id
+
+    def _load_id(self, load) -> int:
+        values = tuple(float(load[column]) for column in LOAD_COLUMNS)
+        self.connection.execute(
+            f"INSERT OR IGNORE INTO loads ({', '.join(LOAD_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", values
+        )
+        return self.connection.execute(
+            f"SELECT id FROM loads WHERE {' AND '.join(f'{column} = ?' for column in LOAD_COLUMNS)}", values
+        ).fetchone()[0]
+
+    def ingest_bytes(self, raw: bytes, source: Union[str, Path]) -> Tuple[int, bool]:
+        """Store one snapshot. Returns ``(snapshot id, added)``; ``added`` is False for a known snapshot."""
+        digest = content_digest(raw)
+        row = self.connection.execute("SELECT id FROM snapshots WHERE digest = ?", (digest,)).fetchone()
+        if row is not None:
+            return row[0], False
+
+        path = Path(source)
+        # Consecutive snapshots mostly share teachers, whose loads the cache reuses.
+        entry = self.cache.load_bytes(raw, path)
+        data, load_index = entry.data, entry.load_index
+        lines = data.get("lines", [])
+
+        cells_by_teacher: Dict[int, List[Tuple[int, str, str]]] = {}
+        for line_idx, teacher_idx, subject_list in iter_allocation_cells(data):
+            label = lines[line_idx]
+            cells_by_teacher.setdefault(teacher_idx, []).extend(
+                (line_idx, label, subject) for subject in subject_list
+            )
+
+        try:
+            with self.connection:
+                snapshot_id = self._insert_snapshot(digest, source, path, data, load_index, cells_by_teacher)
+        except Exception:
+            # The transaction was rolled back, so cached name ids may no longer exist.
+            self._names.clear()
+            raise
+        return snapshot_id, True
+
+    def _insert_snapshot(self, digest, source, path, data, load_index, cells_by_teacher) -> int:
+        settings_map = data.get("teacherLoadSettings", {}) or {}
+        snapshot_id = self.connection.execute(
+            "INSERT INTO snapshots (digest, source, taken_at, ingested_at, split_set_id) VALUES (?, ?, ?, ?, ?)",
+            (
+                digest,
+                str(source),
+                snapshot_taken_at(data, path if path.exists() else None),
+                datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                self._split_set_id(data.get("subjectSplits", {})),
+            ),
+        ).lastrowid
+        self.connection.executemany(
+            "INSERT INTO snapshot_teachers "
+            "(snapshot_id, position, teacher_id, cell_set_id, load_settings_id, load_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    snapshot_id,
+                    position,
+                    self._name_id("teachers", "name", name),
+                    self._cell_set_id(cells_by_teacher.get(position, ())),
+                    self._load_settings_id(settings_map.get(name)),
+                    self._load_id(load_index[name]),
+                )
+                for position, name in enumerate(data.get("teachers", []))
+            ],
+        )
+        return snapshot_id
+
+    def ingest_path(self, path: Union[str, Path]) -> Tuple[int, bool]:
+        path = Path(path)
+        return self.ingest_bytes(path.read_bytes(), path)
+
+    # Queries
+
+    def snapshots(self) -> List[dict]:
+        rows = self.connection.execute(
+            "SELECT s.id, s.taken_at, s.source, COUNT(st.position) "
+            "FROM snapshots s LEFT JOIN snapshot_teachers st ON st.snapshot_id = s.id "
+            "GROUP BY s.id ORDER BY s.taken_at, s.id"
+        )
+        return [
+            {"snapshot_id": row[0], "taken_at": row[1], "source": row[2], "teachers": row[3]}
+            for row in rows
+        ]
+
+    def teacher_balances(self, teacher: str) -> List[dict]:
+        """The teacher's totals in every snapshot that lists them, oldest first."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT s.id, s.taken_at, s.source, "
+            f"{', '.join(f'l.{column}' for column in LOAD_COLUMNS)} "
+            "FROM teachers t "
+            "JOIN snapshot_teachers st ON st.teacher_id = t.id "
+            "JOIN snapshots s ON s.id = st.snapshot_id "
+            "JOIN loads l ON l.id = st.load_id "
+            "WHERE t.name = ? ORDER BY s.taken_at, s.id",
+            (teacher,),
+        )
+        return [
+            dict(zip(("snapshot_id", "taken_at", "source", *LOAD_COLUMNS), row))
+            for row in rows
+        ]
+
+    def subject_placements(self, subject: str) -> List[Tuple[dict, List[Tuple[str, str, str]]]]:
+        """Every snapshot, oldest first, with the ``(subject, line, teacher)`` cells of ``subject``.
+
+        Split parts such as ``12COV1▸4P(SPLIT1/2)`` count as placements of their base code.
+        """
+        placements: Dict[int, List[Tuple[str, str, str]]] = {}
+        rows = self.connection.execute(
+            "SELECT st.snapshot_id, sub.code, ln.label, t.name "
+            "FROM subjects sub "
+            "JOIN allocation_cells c ON c.subject_id = sub.id "
+            "JOIN snapshot_teachers st ON st.cell_set_id = c.cell_set_id "
+            "JOIN lines ln ON ln.id = c.line_id "
+            "JOIN teachers t ON t.id = st.teacher_id "
+            "WHERE sub.code = ? OR (sub.code >= ? AND sub.code < ?)",
+            (subject, subject + SPLIT_MARKER, subject + chr(ord(SPLIT_MARKER) + 1)),
+        )
+        for snapshot_id, code, label, name in rows:
+            placements.setdefault(snapshot_id, []).append((code, label, name))
+        return [
+            (snapshot, sorted(set(placements.get(snapshot["snapshot_id"], ()))))
+            for snapshot in self.snapshots()
+        ]
+
+    def subject_moves(self, subject: str) -> List[dict]:
+        """Snapshots where ``subject`` gained or lost a (line, teacher) placement."""
+        moves = []
+        previous: Optional[set] = None
+        for snapshot, placements in self.subject_placements(subject):
+            current = set(placements)
+            if previous is not None and current != previous:
+                moves.append(
+                    dict(
+                        snapshot,
+                        removed=sorted(previous - current),
+                        added=sorted(current - previous),
+                    )
+                )
+            elif previous is None and current:
+                moves.append(dict(snapshot, removed=[], added=sorted(current)))
+            previous = current
+        return moves
+
+    def snapshot_on(self, date: str) -> Optional[dict]:
+        """The latest snapshot taken on or before ``date`` (``YYYY-MM-DD`` or a full timestamp)."""
+        bound = date + "\uffff" if len(date) == 10 else date
+        row = self.connection.execute(
+            "SELECT id, taken_at, source FROM snapshots WHERE taken_at <= ? ORDER BY taken_at DESC, id DESC LIMIT 1",
+            (bound,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"snapshot_id": row[0], "taken_at": row[1], "source": row[2]}
+
+    def over_capacity(self, date: str, tolerance: float = 0.0) -> Tuple[Optional[dict], List[dict]]:
+        """Teachers whose balance is below ``-tolerance`` in the snapshot current on ``date``."""
+        snapshot = self.snapshot_on(date)
+        if snapshot is None:
+            return None, []
+        rows = self.connection.execute(
+            f"SELECT DISTINCT t.name, {', '.join(f'l.{column}' for column in LOAD_COLUMNS)} "
+            "FROM snapshot_teachers st "
+            "JOIN teachers t ON t.id = st.teacher_id "
+            "JOIN loads l ON l.id = st.load_id "
+            "WHERE st.snapshot_id = ? AND l.balance_minutes < ? "
+            "ORDER BY l.balance_minutes, t.name",
+            (snapshot["snapshot_id"], -tolerance),
+        )
+        return snapshot, [dict(zip(("teacher", *LOAD_COLUMNS), row)) for row in rows]
+
+    def row_counts(self) -> Dict[str, int]:
+        tables = ("snapshots", "teachers", "lines", "subjects", "allocation_cells", "splits", "load_settings", "loads", "snapshot_teachers")
+        return {
+            table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in tables
+        }
+
+
+def _snapshot_label(snapshot: dict) -> str:
+    return f"{snapshot['taken_at']} ({Path(snapshot['source']).name})"
+
+
+def format_balances(teacher: str, balances: Iterable[dict]) -> str:
+    lines = [
+        f"# Balance history: {teacher}",
+        "",
+        "| Snapshot | Teaching | Allowance | Total load | Capacity | Balance | Change |",
+        "| - | - | - | - | - | - | - |",
+    ]
+    previous = None
+    for row in balances:
+        change = "" if previous is None else f"{row['balance_minutes'] - previous:+.2f}"
+        lines.append(
+            f"| {_snapshot_label(row)} | {row['teaching_minutes']:.2f} | {row['allowance_minutes']:.2f} | "
+            f"{row['total_load_minutes']:.2f} | {row['base_minutes']:.2f} | {row['balance_minutes']:.2f} | {change} |"
+        )
+        previous = row["balance_minutes"]
+    if previous is None:
+        lines.append("| — | — | — | — | — | — | — |")
+    return "\n".join(lines) + "\n"
+
+
+def _format_placements(placements) -> str:
+    return "<br>".join(f"{code.replace(SPLIT_MARKER, '->')} on {label} with {name}" for code, label, name in placements) or "—"
+
+
+def format_moves(subject: str, moves: Iterable[dict]) -> str:
+    lines = [
+        f"# Placement history: {subject}",
+        "",
+        "| Snapshot | Removed | Added |",
+        "| - | - | - |",
+    ]
+    count = 0
+    for move in moves:
+        lines.append(f"| {_snapshot_label(move)} | {_format_placements(move['removed'])} | {_format_placements(move['added'])} |")
+        count += 1
+    if not count:
+        lines.append("| — | — | — |")
+    return "\n".join(lines) + "\n"
+
+
+def format_over_capacity(date: str, snapshot: Optional[dict], rows: Iterable[dict], tolerance: float = 0.0) -> str:
+    if snapshot is None:
+        return f"# Over capacity on {date}\n\nNo snapshot was taken on or before {date}.\n"
+    lines = [
+        f"# Over capacity on {date}",
+        "",
+        f"Snapshot: {_snapshot_label(snapshot)}; tolerance {tolerance:.2f} minutes.",
+        "",
+        "| Teacher | Total load | Capacity | Balance |",
+        "| - | - | - | - |",
+    ]
+    count = 0
+    for row in rows:
+        lines.append(
+            f"| {row['teacher']} | {row['total_load_minutes']:.2f} | {row['base_minutes']:.2f} | {row['balance_minutes']:.2f} |"
+        )
+        count += 1
+    if not count:
+        lines.append("| — | — | — | — |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Keep allocation snapshots in a SQLite history and query it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Add snapshots to the history store.")
+    ingest.add_argument("database", help="SQLite history file (created if missing).")
+    ingest.add_argument("sources", nargs="+", help="Snapshot files, directories or globs (.json or .mxc).")
+    ingest.add_argument("--period-profile", help="Optional JSON profile overriding the subject-period rules.")
+
+    listing = commands.add_parser("snapshots", help="List stored snapshots.")
+    listing.add_argument("database")
+
+    balance = commands.add_parser("balance", help="A teacher's balance in every snapshot.")
+    balance.add_argument("database")
+    balance.add_argument("teacher")
+
+    moves = commands.add_parser("moves", help="Snapshots where a subject changed line or teacher.")
+    moves.add_argument("database")
+    moves.add_argument("subject", help="Subject code; split parts of the code are included.")
+
+    over = commands.add_parser("over", help="Teachers over capacity in the snapshot current on a date.")
+    over.add_argument("database")
+    over.add_argument("date", help="YYYY-MM-DD or a full ISO timestamp.")
+    over.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Balance (minutes) below zero within which a teacher is not listed.",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command != "ingest" and not Path(args.database).exists():
+        parser.error(f"{args.database} does not exist; run 'ingest' first.")
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if getattr(args, "period_profile", None) else None
+    with LoadHistory(args.database, rules) as history:
+        if args.command == "ingest":
+            paths = []
+            for source in args.sources:
+                path = Path(source)
+                paths.extend([path] if path.is_file() else resolve_snapshot_paths(source))
+            failed = 0
+            for path in paths:
+                try:
+                    snapshot_id, added = history.ingest_path(path)
+                except (OSError, ValueError, KeyError, IndexError) as exc:
+                    print(f"{path}: could not be ingested ({exc})", file=sys.stderr)
+                    failed += 1
+                    continue
+                print(f"{'Added' if added else 'Already stored'} {path} as snapshot {snapshot_id}")
+            counts = history.row_counts()
+            print("Rows: " + ", ".join(f"{table} {count}" for table, count in counts.items()))
+            return 1 if failed else 0
+
+        if args.command == "snapshots":
+            for snapshot in history.snapshots():
+                print(f"{snapshot['snapshot_id']}\t{snapshot['taken_at']}\t{snapshot['teachers']} teachers\t{snapshot['source']}")
+        elif args.command == "balance":
+            sys.stdout.write(format_balances(args.teacher, history.teacher_balances(args.teacher)))
+        elif args.command == "moves":
+            sys.stdout.write(format_moves(args.subject, history.subject_moves(args.subject)))
+        elif args.command == "over":
+            snapshot, rows = history.over_capacity(args.date, args.tolerance)
+            sys.stdout.write(format_over_capacity(args.date, snapshot, rows, args.tolerance))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
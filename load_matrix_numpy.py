@@ -0,0 +1,233 @@
+"""Optional NumPy engine for teacher loads over a lines x teachers matrix.
+
+Each snapshot becomes a ``lines x teachers`` matrix of summed period values. Teaching
+minutes are then the per-line minutes vector times that matrix, allowances and
+capacity come from per-teacher settings vectors, and a stack of snapshots is handled
+with one ``einsum`` over a zero-padded ``snapshots x lines x teachers`` array.
+
+The pure-Python path in ``verify_teacher_load`` stays the reference implementation;
+``cross_check`` compares the two. NumPy is imported lazily so the rest of the tools
+keep working without it.
+"""
+
+import argparse
+import sys
+from contextlib import ExitStack
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from columnar_snapshot import CELL_WIDTH, ColumnarSnapshot
+from period_rules import DEFAULT_RULES, PeriodRuleEngine
+from verify_teacher_load import (
+    ASSEMBLY_FULL_MINUTES,
+    ASSEMBLY_SHORT_MINUTES,
+    STANDARD_PERIOD_MINUTES,
+    build_snapshot_loads,
+    build_split_lookup,
+    compute_base_minutes,
+    compute_line_minutes,
+    iter_allocation_cells,
+    load_snapshot,
+)
+
+SETTING_FIELDS = ("periodAllowance", "assemblyFullCount", "assemblyShortCount", "additionalMinutes")
+SETTING_MINUTES = (STANDARD_PERIOD_MINUTES, ASSEMBLY_FULL_MINUTES, ASSEMBLY_SHORT_MINUTES, 1.0)
+COMPARED_FIELDS = ("teaching_minutes", "allowance_minutes", "total_load_minutes", "base_minutes", "balance_minutes")
+
+
+class LoadArrays(NamedTuple):
+    """Per-teacher load vectors, aligned with ``teachers`` (unique names, first-seen order)."""
+
+    teachers: List[str]
+    teaching_minutes: "np.ndarray"
+    allowance_minutes: "np.ndarray"
+    total_load_minutes: "np.ndarray"
+    base_minutes: "np.ndarray"
+    balance_minutes: "np.ndarray"
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {field: float(getattr(self, field)[idx]) for field in COMPARED_FIELDS}
+            for idx, name in enumerate(self.teachers)
+        }
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("The NumPy load engine needs numpy; install it with `pip install numpy`.")
+    return np
+
+
+def unique_teacher_names(teachers: Sequence[str]):
+    """Return unique names and, for every teacher column, the index of its name."""
+    names: List[str] = []
+    ids: Dict[str, int] = {}
+    columns = []
+    for teacher in teachers:
+        if teacher not in ids:
+            ids[teacher] = len(names)
+            names.append(teacher)
+        columns.append(ids[teacher])
+    return names, columns
+
+
+def _columnar_period_matrix(data: ColumnarSnapshot, split_lookup, rules, shape):
+    """Scatter period values straight from the mapped ``int32`` cell array."""
+    cells = np.frombuffer(data.cells, dtype=np.int32).reshape(-1, CELL_WIDTH)
+    subject_periods = np.array(
+        [rules.period_value(code, split_lookup) for code in data.subject_table],
+        dtype=np.float64,
+    )
+    matrix = np.zeros(shape, dtype=np.float64)
+    if len(cells):
+        np.add.at(matrix, (cells[:, 0], cells[:, 1]), subject_periods[cells[:, 2]])
+    return matrix
+
+
+def build_period_matrix(data, rules: Optional[PeriodRuleEngine] = None):
+    """Return the ``lines x teachers`` matrix of period values allocated in ``data``."""
+    require_numpy()
+    rules = rules or DEFAULT_RULES
+    split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+    shape = (len(data["lines"]), len(data["teachers"]))
+    if isinstance(data, ColumnarSnapshot):
+        return _columnar_period_matrix(data, split_lookup, rules, shape)
+
+    period_values = {}
+    line_index, teacher_index, periods = [], [], []
+    for line_idx, teacher_idx, subject_list in iter_allocation_cells(data):
+        for subject in subject_list:
+            period_value = period_values.get(subject)
+            if period_value is None:
+                period_value = rules.period_value(subject, split_lookup)
+                period_values[subject] = period_value
+            line_index.append(line_idx)
+            teacher_index.append(teacher_idx)
+            periods.append(period_value)
+
+    matrix = np.zeros(shape, dtype=np.float64)
+    if periods:
+        np.add.at(matrix, (np.array(line_index), np.array(teacher_index)), np.array(periods))
+    return matrix
+
+
+def build_settings_vectors(names: Sequence[str], load_settings_map):
+    """Return ``(allowance, base)`` minute vectors for ``names``."""
+    load_settings_map = load_settings_map or {}
+    counts = np.zeros((len(names), len(SETTING_FIELDS)), dtype=np.float64)
+    base = np.empty(len(names), dtype=np.float64)
+    for idx, name in enumerate(names):
+        settings = load_settings_map.get(name, {}) or {}
+        counts[idx] = [settings.get(field, 0) for field in SETTING_FIELDS]
+        base[idx] = compute_base_minutes(settings.get("fte", "1.0"))
+    return counts @ np.array(SETTING_MINUTES), base
+
+
+def _assemble(names, teaching, load_settings_map) -> LoadArrays:
+    allowance, base = build_settings_vectors(names, load_settings_map)
+    total = teaching + allowance
+    return LoadArrays(names, teaching, allowance, total, base, base - total)
+
+
+def compute_loads(data, rules: Optional[PeriodRuleEngine] = None) -> LoadArrays:
+    """Compute every teacher's load for one snapshot in a handful of array operations."""
+    require_numpy()
+    matrix = build_period_matrix(data, rules)
+    line_minutes = np.array(compute_line_minutes(data["lines"], rules), dtype=np.float64)
+    per_column = line_minutes @ matrix
+
+    names, columns = unique_teacher_names(data["teachers"])
+    teaching = np.zeros(len(names), dtype=np.float64)
+    np.add.at(teaching, np.array(columns, dtype=np.intp), per_column)
+    return _assemble(names, teaching, data.get("teacherLoadSettings", {}))
+
+
+def compute_stack_loads(snapshots: Sequence, rules: Optional[PeriodRuleEngine] = None) -> List[LoadArrays]:
+    """Compute loads for several snapshots at once.
+
+    Each snapshot is scattered into a shared ``snapshots x lines x teachers`` array
+    (teachers are matched by name, shorter line lists are zero-padded), so the
+    teaching minutes for the whole stack come from a single contraction.
+    """
+    require_numpy()
+    all_names: List[str] = []
+    name_ids: Dict[str, int] = {}
+    for data in snapshots:
+        for teacher in data["teachers"]:
+            if teacher not in name_ids:
+                name_ids[teacher] = len(all_names)
+                all_names.append(teacher)
+
+    max_lines = max((len(data["lines"]) for data in snapshots), default=0)
+    stack = np.zeros((len(snapshots), max_lines, len(all_names)), dtype=np.float64)
+    line_minutes = np.zeros((len(snapshots), max_lines), dtype=np.float64)
+    for slot, data in enumerate(snapshots):
+        matrix = build_period_matrix(data, rules)
+        columns = np.array([name_ids[teacher] for teacher in data["teachers"]], dtype=np.intp)
+        if columns.size:
+            np.add.at(stack[slot, : matrix.shape[0]], (slice(None), columns), matrix)
+        line_minutes[slot, : len(data["lines"])] = compute_line_minutes(data["lines"], rules)
+
+    teaching = np.einsum("sl,slt->st", line_minutes, stack)
+
+    results = []
+    for slot, data in enumerate(snapshots):
+        names, _ = unique_teacher_names(data["teachers"])
+        ids = np.array([name_ids[name] for name in names], dtype=np.intp)
+        results.append(_assemble(names, teaching[slot, ids], data.get("teacherLoadSettings", {})))
+    return results
+
+
+def cross_check(data, rules: Optional[PeriodRuleEngine] = None, tolerance: float = 1e-6):
+    """Compare the NumPy engine with ``build_snapshot_loads``; return mismatch messages."""
+    reference = build_snapshot_loads(data, rules)
+    vectorized = compute_loads(data, rules).as_dict()
+    mismatches = []
+    for name in sorted(set(reference) | set(vectorized)):
+        if name not in reference or name not in vectorized:
+            mismatches.append(f"{name}: only present in the {'NumPy' if name in vectorized else 'Python'} engine")
+            continue
+        for field in COMPARED_FIELDS:
+            expected = reference[name][field]
+            actual = vectorized[name][field]
+            if abs(expected - actual) > tolerance:
+                mismatches.append(f"{name}: {field} python={expected:.4f} numpy={actual:.4f}")
+    return mismatches
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compute teacher loads with the NumPy engine and cross-check them against the reference."
+    )
+    parser.add_argument("snapshots", nargs="+", help="Snapshot files (.json or .mxc).")
+    parser.add_argument("--period-profile", help="JSON period rule profile.")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Allowed difference in minutes.")
+    args = parser.parse_args(argv)
+
+    try:
+        require_numpy()
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    failed = False
+    with ExitStack() as stack:
+        snapshots = [stack.enter_context(load_snapshot(path)) for path in args.snapshots]
+        for path, data, loads in zip(args.snapshots, snapshots, compute_stack_loads(snapshots, rules)):
+            over = int((loads.balance_minutes < 0).sum())
+            mismatches = cross_check(data, rules, args.tolerance)
+            status = "OK" if not mismatches else f"{len(mismatches)} mismatches"
+            print(f"{path}: {len(loads.teachers)} teachers, {over} over capacity, cross-check {status}")
+            for message in mismatches:
+                print(f"  {message}")
+            failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
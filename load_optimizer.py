@@ -0,0 +1,421 @@
+"""Propose a balanced allocation of classes to teachers with parallel local search.
+
+Every allocatable code in a Matrix payload (split parts count separately) becomes a
+unit pinned to its ``subjectLineMapping`` line; the solver only chooses the teacher.
+Candidate allocations are ranked lexicographically by:
+
+1. clashes: a teacher holding two different classes on the same line in the same
+   semester. ``S1``/``S2`` codes occupy one semester, everything else both, and split
+   parts of the same base subject count as one class;
+2. overload: minutes by which a teacher's load exceeds their FTE capacity;
+3. imbalance: the sum of squared deviations of capacity - load balances from their
+   mean, the same measure ``what_if`` uses.
+
+Each restart builds a randomised greedy allocation (restart 0 starts from the snapshot's
+own allocation) and improves it with single-class reassignments and same-line swaps
+until its iteration or time budget runs out. Restarts run in a process pool and the
+best allocation is returned as a standard payload.
+"""
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from clash_detector import SEMESTER_ONE, SEMESTER_TWO, semester_mask
+from columnar_snapshot import ColumnarSnapshot
+from period_rules import DEFAULT_RULES, PeriodRuleEngine
+from verify_teacher_load import (
+    build_split_lookup,
+    compute_allowance_minutes,
+    compute_base_minutes,
+    compute_line_minutes,
+    iter_allocation_cells,
+    load_snapshot,
+)
+
+OVERLOAD_TOLERANCE = 1e-6
+TIME_CHECK_INTERVAL = 256
+
+
+def mapped_line(code: str, base: Optional[str], line_mapping) -> Optional[int]:
+    for candidate in (code, base):
+        if candidate is not None and candidate in line_mapping:
+            try:
+                return int(line_mapping[candidate])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+@dataclass
+class Problem:
+    """Index-based view of a payload; teachers are unique names in first-seen order."""
+
+    codes: List[str]
+    lines: List[int]
+    minutes: List[float]
+    classes: List[int]
+    semesters: List[int]
+    teacher_names: List[str]
+    teacher_columns: List[int]
+    base_minutes: List[float]
+    allowance_minutes: List[float]
+    initial: List[int]
+    unplaced: List[str] = field(default_factory=list)
+
+    @property
+    def units_by_line(self) -> Dict[int, List[int]]:
+        grouped: Dict[int, List[int]] = {}
+        for unit, line_idx in enumerate(self.lines):
+            grouped.setdefault(line_idx, []).append(unit)
+        return grouped
+
+    def clash_lower_bound(self) -> int:
+        """Clashes no allocation can avoid: classes per line and semester beyond the teacher count."""
+        demand: Dict[Tuple[int, int], set] = {}
+        for unit, line_idx in enumerate(self.lines):
+            for semester in (SEMESTER_ONE, SEMESTER_TWO):
+                if self.semesters[unit] & semester:
+                    demand.setdefault((line_idx, semester), set()).add(self.classes[unit])
+        return sum(max(0, len(classes) - len(self.teacher_names)) for classes in demand.values())
+
+
+def build_problem(data, rules: Optional[PeriodRuleEngine] = None) -> Problem:
+    rules = rules or DEFAULT_RULES
+    split_lookup, base_map = build_split_lookup(data.get("subjectSplits", {}))
+    line_mapping = data.get("subjectLineMapping", {})
+    line_minutes = compute_line_minutes(data["lines"], rules)
+
+    teacher_names: List[str] = []
+    teacher_columns: List[int] = []
+    name_ids: Dict[str, int] = {}
+    for column, teacher in enumerate(data["teachers"]):
+        if teacher not in name_ids:
+            name_ids[teacher] = len(teacher_names)
+            teacher_names.append(teacher)
+            teacher_columns.append(column)
+
+    current_line: Dict[str, int] = {}
+    current_teacher: Dict[str, int] = {}
+    for line_idx, teacher_idx, subject_list in iter_allocation_cells(data):
+        for subject in subject_list:
+            current_line.setdefault(subject, line_idx)
+            current_teacher.setdefault(subject, name_ids[data["teachers"][teacher_idx]])
+
+    codes = list(dict.fromkeys(list(data.get("subjects", [])) + list(current_line)))
+    # A split base is represented by its parts.
+    codes = [code for code in codes if not (code in base_map and any(part in codes for part in base_map[code]))]
+
+    problem = Problem([], [], [], [], [], teacher_names, teacher_columns, [], [], [])
+    if not teacher_names:
+        # With nobody to assign to, every class is reported instead of silently dropped.
+        problem.unplaced.extend(codes)
+        return problem
+    class_ids: Dict[str, int] = {}
+    for code in codes:
+        base = split_lookup.get(code, {}).get("base")
+        line_idx = mapped_line(code, base, line_mapping)
+        if line_idx is None:
+            line_idx = current_line.get(code)
+        if line_idx is None or not 0 <= line_idx < len(line_minutes):
+            problem.unplaced.append(code)
+            continue
+        class_key = base or code
+        problem.codes.append(code)
+        problem.lines.append(line_idx)
+        problem.minutes.append(rules.period_value(code, split_lookup) * line_minutes[line_idx])
+        problem.classes.append(class_ids.setdefault(class_key, len(class_ids)))
+        problem.semesters.append(semester_mask(code))
+        problem.initial.append(current_teacher.get(code, -1))
+
+    load_settings_map = data.get("teacherLoadSettings", {})
+    for name in teacher_names:
+        settings = load_settings_map.get(name, {}) or {}
+        problem.base_minutes.append(compute_base_minutes(settings.get("fte", "1.0")))
+        problem.allowance_minutes.append(compute_allowance_minutes(settings))
+    return problem
+
+
+class AllocationState:
+    """Mutable allocation with incrementally maintained clash, overload and imbalance."""
+
+    def __init__(self, problem: Problem, assignment: Sequence[int]) -> None:
+        self.problem = problem
+        self.assignment = [-1] * len(problem.codes)
+        self.balances = [base - allowance for base, allowance in zip(problem.base_minutes, problem.allowance_minutes)]
+        self.slots: Dict[Tuple[int, int, int], Dict[int, int]] = {}
+        self.clashes = 0
+        self.overload = sum(max(0.0, -balance) for balance in self.balances)
+        self.balance_sum = sum(self.balances)
+        self.balance_squares = sum(balance * balance for balance in self.balances)
+        for unit, teacher in enumerate(assignment):
+            if teacher >= 0:
+                self.assign(unit, teacher)
+
+    @property
+    def imbalance(self) -> float:
+        count = len(self.balances)
+        if not count:
+            return 0.0
+        return max(self.balance_squares - self.balance_sum * self.balance_sum / count, 0.0)
+
+    def cost(self) -> Tuple[int, float, float]:
+        return self.clashes, round(self.overload, 6), self.imbalance
+
+    def _shift_balance(self, teacher: int, delta: float) -> None:
+        old = self.balances[teacher]
+        new = old + delta
+        self.balances[teacher] = new
+        self.balance_sum += delta
+        self.balance_squares += new * new - old * old
+        self.overload += max(0.0, -new) - max(0.0, -old)
+
+    def _occupy(self, unit: int, teacher: int, step: int) -> None:
+        problem = self.problem
+        class_id = problem.classes[unit]
+        for semester in (SEMESTER_ONE, SEMESTER_TWO):
+            if not problem.semesters[unit] & semester:
+                continue
+            slot = self.slots.setdefault((teacher, problem.lines[unit], semester), {})
+            before = len(slot)
+            count = slot.get(class_id, 0) + step
+            if count:
+                slot[class_id] = count
+            else:
+                del slot[class_id]
+            self.clashes += max(0, len(slot) - 1) - max(0, before - 1)
+
+    def assign(self, unit: int, teacher: int) -> None:
+        self._occupy(unit, teacher, 1)
+        self._shift_balance(teacher, -self.problem.minutes[unit])
+        self.assignment[unit] = teacher
+
+    def unassign(self, unit: int) -> int:
+        teacher = self.assignment[unit]
+        self._occupy(unit, teacher, -1)
+        self._shift_balance(teacher, self.problem.minutes[unit])
+        self.assignment[unit] = -1
+        return teacher
+
+    def move(self, unit: int, teacher: int) -> int:
+        previous = self.unassign(unit)
+        self.assign(unit, teacher)
+        return previous
+
+
+def is_better(candidate: Tuple[int, float, float], current: Tuple[int, float, float]) -> bool:
+    if candidate[0] != current[0]:
+        return candidate[0] < current[0]
+    if abs(candidate[1] - current[1]) > OVERLOAD_TOLERANCE:
+        return candidate[1] < current[1]
+    return candidate[2] < current[2] - 1e-9
+
+
+def greedy_assignment(problem: Problem, rng: random.Random, start: Optional[Sequence[int]] = None) -> List[int]:
+    """Assign every unit, keeping ``start`` where given and filling the rest greedily."""
+    state = AllocationState(problem, start or [])
+    teachers = range(len(problem.teacher_names))
+    pending = [unit for unit, teacher in enumerate(state.assignment) if teacher < 0]
+    rng.shuffle(pending)
+    for unit in pending:
+        best_teacher, best_cost, best_tiebreak = -1, None, 0.0
+        for teacher in teachers:
+            state.assign(unit, teacher)
+            cost = state.cost()
+            state.unassign(unit)
+            tiebreak = rng.random()
+            if best_cost is None or is_better(cost, best_cost) or (
+                not is_better(best_cost, cost) and tiebreak < best_tiebreak
+            ):
+                best_teacher, best_cost, best_tiebreak = teacher, cost, tiebreak
+        state.assign(unit, best_teacher)
+    return list(state.assignment)
+
+
+def local_search(
+    problem: Problem,
+    seed: int,
+    iterations: int = 200_000,
+    time_budget: float = 10.0,
+    start_from_snapshot: bool = False,
+):
+    """Run one restart and return ``(cost, assignment, seed, iterations run)``."""
+    deadline = time.monotonic() + time_budget
+    rng = random.Random(seed)
+    teacher_count = len(problem.teacher_names)
+    if not problem.codes or not teacher_count:
+        return (0, 0.0, 0.0), [], seed, 0
+
+    start = problem.initial if start_from_snapshot else None
+    state = AllocationState(problem, greedy_assignment(problem, rng, start))
+    cost = state.cost()
+    units_by_line = problem.units_by_line
+
+    step = 0
+    for step in range(1, iterations + 1):
+        if step % TIME_CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+            break
+        unit = rng.randrange(len(problem.codes))
+        if teacher_count > 1 and rng.random() < 0.5:
+            teacher = rng.randrange(teacher_count - 1)
+            if teacher >= state.assignment[unit]:
+                teacher += 1
+            previous = state.move(unit, teacher)
+            candidate = state.cost()
+            if is_better(candidate, cost):
+                cost = candidate
+            else:
+                state.move(unit, previous)
+            continue
+
+        other = rng.choice(units_by_line[problem.lines[unit]])
+        first, second = state.assignment[unit], state.assignment[other]
+        if first == second:
+            continue
+        state.move(unit, second)
+        state.move(other, first)
+        candidate = state.cost()
+        if is_better(candidate, cost):
+            cost = candidate
+        else:
+            state.move(other, second)
+            state.move(unit, first)
+
+    # Recompute from scratch so accumulated float drift never leaks into the result.
+    final = AllocationState(problem, state.assignment)
+    return final.cost(), list(final.assignment), seed, step
+
+
+def allocation_payload(data, problem: Problem, assignment: Sequence[int]) -> Dict[str, object]:
+    """Return ``data`` with ``assignment`` as its allocations, in the export's cell shape."""
+    payload = data.to_payload() if isinstance(data, ColumnarSnapshot) else dict(data)
+    cells: Dict[Tuple[int, int], List[str]] = {}
+    for unit, teacher in enumerate(assignment):
+        column = problem.teacher_columns[teacher]
+        cells.setdefault((problem.lines[unit], column), []).append(problem.codes[unit])
+    # A single subject is stored as a string, several as a list, like the Matrix export.
+    payload["allocations"] = {
+        f"{line}-{column}": codes[0] if len(codes) == 1 else codes
+        for (line, column), codes in sorted(cells.items())
+    }
+    mapping = dict(payload.get("subjectLineMapping", {}))
+    for code, line_idx in zip(problem.codes, problem.lines):
+        mapping.setdefault(code, line_idx)
+    payload["subjectLineMapping"] = mapping
+    payload["timestamp"] = datetime.now(timezone.utc).isoformat()
+    return payload
+
+
+@dataclass
+class OptimizationResult:
+    payload: Dict[str, object]
+    clashes: int
+    overload_minutes: float
+    imbalance: float
+    balances: Dict[str, float]
+    seed: int
+    restarts: int
+    iterations: int
+    unplaced: List[str]
+    clash_lower_bound: int
+
+    @property
+    def valid(self) -> bool:
+        return self.clashes == 0 and self.overload_minutes <= OVERLOAD_TOLERANCE and not self.unplaced
+
+
+def optimize(
+    data,
+    restarts: int = 4,
+    workers: Optional[int] = None,
+    time_budget: float = 10.0,
+    iterations: int = 200_000,
+    seed: int = 0,
+    rules: Optional[PeriodRuleEngine] = None,
+) -> OptimizationResult:
+    """Search for a balanced allocation and return the best one found."""
+    problem = build_problem(data, rules)
+    seeds = [seed + offset for offset in range(max(restarts, 1))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(local_search, problem, restart_seed, iterations, time_budget, index == 0)
+            for index, restart_seed in enumerate(seeds)
+        ]
+        outcomes = [future.result() for future in futures]
+
+    best_cost, best_assignment, best_seed, _ = outcomes[0]
+    for outcome in outcomes[1:]:
+        if is_better(outcome[0], best_cost):
+            best_cost, best_assignment, best_seed, _ = outcome
+
+    state = AllocationState(problem, best_assignment)
+    return OptimizationResult(
+        payload=allocation_payload(data, problem, best_assignment),
+        clashes=best_cost[0],
+        overload_minutes=best_cost[1],
+        imbalance=best_cost[2],
+        balances=dict(zip(problem.teacher_names, state.balances)),
+        seed=best_seed,
+        restarts=len(seeds),
+        iterations=sum(outcome[3] for outcome in outcomes),
+        unplaced=problem.unplaced,
+        clash_lower_bound=problem.clash_lower_bound(),
+    )
+
+
+def format_result(result: OptimizationResult) -> str:
+    balances = list(result.balances.values())
+    spread = max(balances) - min(balances) if balances else 0.0
+    lines = [
+        f"Restarts: {result.restarts} ({result.iterations} moves tried), best seed {result.seed}",
+        f"Clashes: {result.clashes} (at least {result.clash_lower_bound} unavoidable with these line mappings)",
+        f"Overload minutes: {result.overload_minutes:.2f}",
+        f"Balance spread (max - min): {spread:.2f}",
+    ]
+    if result.unplaced:
+        reason = "no line mapping" if result.balances else "no teachers"
+        lines.append(f"Unplaced ({reason}): {', '.join(result.unplaced)}")
+    lines.append("Valid allocation" if result.valid else "No allocation satisfying every hard constraint was found")
+    for name, balance in result.balances.items():
+        lines.append(f"  {name}: {balance:.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Propose a load-balanced allocation for a Matrix snapshot.")
+    parser.add_argument("snapshot", help="Snapshot file (.json or .mxc).")
+    parser.add_argument("-o", "--output", default="optimized-allocations.json", help="Path for the proposed payload.")
+    parser.add_argument("--restarts", type=int, default=4, help="Number of random restarts.")
+    parser.add_argument("--workers", type=int, help="Worker processes. Defaults to the CPU count.")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="Seconds each restart may run.")
+    parser.add_argument("--iterations", type=int, default=200_000, help="Maximum moves tried per restart.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first restart.")
+    parser.add_argument("--period-profile", help="JSON period rule profile.")
+    args = parser.parse_args(argv)
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    with load_snapshot(args.snapshot) as data:
+        result = optimize(
+            data,
+            restarts=args.restarts,
+            workers=args.workers,
+            time_budget=args.time_budget,
+            iterations=args.iterations,
+            seed=args.seed,
+            rules=rules,
+        )
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(result.payload, handle, ensure_ascii=False, separators=(",", ":"))
+        handle.write("\n")
+    print(format_result(result))
+    print(f"Wrote {args.output}")
+    return 0 if result.valid else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
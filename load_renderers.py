@@ -0,0 +1,204 @@
+"""Stream teacher load reports as markdown, CSV, JSON Lines or HTML.
+
+Each renderer writes a teacher's section to the output handle as soon as it is given
+the load, so a report never has to fit in memory as one string. Markdown output is
+byte-for-byte the report ``verify_teacher_load`` has always written.
+"""
+
+import csv
+import html
+import json
+from typing import Dict, Iterable, Optional, TextIO, Type
+
+SUMMARY_FIELDS = (
+    "teaching_minutes",
+    "period_allowance_minutes",
+    "assembly_full_minutes",
+    "assembly_short_minutes",
+    "additional_minutes",
+    "allowance_minutes",
+    "total_load_minutes",
+    "base_minutes",
+    "balance_minutes",
+)
+
+
+def render_teacher_summary(load):
+    teacher_records = load["records"]
+
+    lines = [
+        f"### {load['teacher']}",
+        "",
+        "| Line | Subject | Periods | Line Minutes | Load (min) |",
+        "| - | - | - | - | - |",
+    ]
+    for rec in teacher_records:
+        subject_display = rec.subject.replace("▸", "->")
+        lines.append(
+            f"| {rec.line_label} | {subject_display} | "
+            f"{rec.period_value:.2f} | {rec.line_minutes:.0f} | {rec.minutes:.2f} |"
+        )
+    if not teacher_records:
+        lines.append("| — | — | — | — | — |")
+
+    lines.extend(
+        [
+            "",
+            "**Teaching minutes:** {:.2f}".format(load["teaching_minutes"]),
+            "**Allowances:**",
+            f"- Period allowance: {load['period_allowance_minutes']:.2f}",
+            f"- Full assemblies: {load['assembly_full_minutes']:.2f}",
+            f"- TLC / short assemblies: {load['assembly_short_minutes']:.2f}",
+            f"- Additional minutes: {load['additional_minutes']:.2f}",
+            "**Total allowance minutes:** {:.2f}".format(load["allowance_minutes"]),
+            "",
+            "**Total load:** {:.2f}".format(load["total_load_minutes"]),
+            "**Capacity (base minutes):** {:.2f}".format(load["base_minutes"]),
+            "**Balance (capacity - load):** {:.2f}".format(load["balance_minutes"]),
+            "",
+            "---",
+            "",
+        ]
+    )
+
+    return "\n".join(lines)
+
+
+class ReportRenderer:
+    """Write one report to ``handle``: ``start()``, ``write_load()`` per teacher, ``finish()``."""
+
+    extension = ".txt"
+
+    def __init__(self, handle: TextIO, title: Optional[str] = None) -> None:
+        self.handle = handle
+        self.title = title
+        self.count = 0
+
+    def start(self) -> None:
+        pass
+
+    def write_load(self, load) -> None:
+        self.count += 1
+
+    def finish(self) -> None:
+        pass
+
+
+class MarkdownRenderer(ReportRenderer):
+    extension = ".md"
+
+    def write_load(self, load) -> None:
+        if self.count:
+            self.handle.write("\n")
+        self.handle.write(render_teacher_summary(load))
+        super().write_load(load)
+
+    def finish(self) -> None:
+        if not self.count:
+            self.handle.write("\n")
+
+
+class CsvRenderer(ReportRenderer):
+    """One row of totals per teacher."""
+
+    extension = ".csv"
+
+    def start(self) -> None:
+        self.writer = csv.writer(self.handle, lineterminator="\n")
+        self.writer.writerow(("teacher", *SUMMARY_FIELDS, "allocations"))
+
+    def write_load(self, load) -> None:
+        self.writer.writerow(
+            (load["teacher"], *(f"{load[field]:.2f}" for field in SUMMARY_FIELDS), len(load["records"]))
+        )
+        super().write_load(load)
+
+
+class JsonLinesRenderer(ReportRenderer):
+    """One JSON object per teacher with totals and allocation records, rounded to 2dp like the CSV."""
+
+    extension = ".jsonl"
+
+    def write_load(self, load) -> None:
+        entry = {"teacher": load["teacher"]}
+        entry.update((field, round(load[field], 2)) for field in SUMMARY_FIELDS)
+        entry["records"] = [
+            {
+                "line_index": rec.line_index,
+                "line": rec.line_label,
+                "subject": rec.subject,
+                "period_value": round(rec.period_value, 2),
+                "line_minutes": round(rec.line_minutes, 2),
+                "minutes": round(rec.minutes, 2),
+            }
+            for rec in load["records"]
+        ]
+        self.handle.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        self.handle.write("\n")
+        super().write_load(load)
+
+
+class HtmlRenderer(ReportRenderer):
+    extension = ".html"
+
+    def start(self) -> None:
+        title = html.escape(self.title or "Teacher load report")
+        self.handle.write(
+            "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{title}</title>\n"
+            "<style>table{border-collapse:collapse}th,td{border:1px solid #4f81bd;padding:2px 6px}"
+            "td.num{text-align:right}.over{color:#c00}</style>\n"
+            f"</head>\n<body>\n<h1>{title}</h1>\n"
+        )
+
+    def write_load(self, load) -> None:
+        write = self.handle.write
+        write(f"<section>\n<h3>{html.escape(load['teacher'])}</h3>\n<table>\n")
+        write("<tr><th>Line</th><th>Subject</th><th>Periods</th><th>Line Minutes</th><th>Load (min)</th></tr>\n")
+        for rec in load["records"]:
+            write(
+                f"<tr><td>{html.escape(rec.line_label)}</td><td>{html.escape(rec.subject)}</td>"
+                f"<td class=\"num\">{rec.period_value:.2f}</td><td class=\"num\">{rec.line_minutes:.0f}</td>"
+                f"<td class=\"num\">{rec.minutes:.2f}</td></tr>\n"
+            )
+        if not load["records"]:
+            write("<tr><td colspan=\"5\">No allocations</td></tr>\n")
+        balance_class = " class=\"over\"" if load["balance_minutes"] < 0 else ""
+        write(
+            "</table>\n<dl>\n"
+            f"<dt>Teaching minutes</dt><dd>{load['teaching_minutes']:.2f}</dd>\n"
+            f"<dt>Total allowance minutes</dt><dd>{load['allowance_minutes']:.2f}</dd>\n"
+            f"<dt>Total load</dt><dd>{load['total_load_minutes']:.2f}</dd>\n"
+            f"<dt>Capacity (base minutes)</dt><dd>{load['base_minutes']:.2f}</dd>\n"
+            f"<dt>Balance (capacity - load)</dt><dd{balance_class}>{load['balance_minutes']:.2f}</dd>\n"
+            "</dl>\n</section>\n"
+        )
+        super().write_load(load)
+
+    def finish(self) -> None:
+        self.handle.write("</body>\n</html>\n")
+
+
+RENDERERS: Dict[str, Type[ReportRenderer]] = {
+    "markdown": MarkdownRenderer,
+    "csv": CsvRenderer,
+    "jsonl": JsonLinesRenderer,
+    "html": HtmlRenderer,
+}
+
+
+def get_renderer(report_format: str) -> Type[ReportRenderer]:
+    try:
+        return RENDERERS[report_format]
+    except KeyError:
+        raise ValueError(f"Unknown report format {report_format!r}; choose from {', '.join(RENDERERS)}.")
+
+
+def render_loads(loads: Iterable[dict], handle: TextIO, report_format: str = "markdown", title=None) -> int:
+    """Stream ``loads`` to ``handle`` in ``report_format`` and return the number written."""
+    renderer = get_renderer(report_format)(handle, title)
+    renderer.start()
+    for load in loads:
+        renderer.write_load(load)
+    renderer.finish()
+    return renderer.count
@@ -0,0 +1,303 @@
+"""Local HTTP service for teacher loads, clashes and CSV conversion.
+
+A small asyncio server built on the standard library. Snapshots are posted once and kept
+parsed in a ``SnapshotCache`` keyed by the SHA-256 of their bytes; every later request
+refers to them by that digest, so nothing is re-read from disk. Computation runs in
+worker threads so slow requests do not stall the event loop, and concurrent uploads of
+the same snapshot share one parse.
+
+Endpoints (all responses are JSON unless noted):
+
+* ``GET  /health`` - status and cache counters;
+* ``POST /snapshots`` - body is a snapshot JSON; returns its digest and sizes;
+* ``GET  /snapshots/<digest>/loads`` - per-teacher totals for every teacher;
+* ``GET  /snapshots/<digest>/teachers/<name>`` - one teacher's load with its records;
+* ``GET  /snapshots/<digest>/report`` - the markdown report (``?teacher=`` to filter);
+* ``GET  /snapshots/<digest>/clashes`` - teacher, line and room clashes;
+* ``POST /loads`` - body is a snapshot JSON; returns its digest and per-teacher totals;
+* ``POST /convert`` - body is a matrix CSV or XLSX; returns the Matrix payload, which is
+  also cached under the digest given in the ``X-Snapshot-Digest`` header.
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+from http import HTTPStatus
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from clash_detector import detect_clashes
+from convert_csv_to_json import convert_rows_to_payload
+from period_rules import PeriodRuleEngine
+from snapshot_cache import CachedSnapshot, SnapshotCache, content_digest
+from xlsx_reader import iter_xlsx_rows
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_HEADER_LINES = 100
+XLSX_MAGIC = b"PK\x03\x04"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> None:
+        parts = urlsplit(target)
+        self.method = method
+        self.path = [unquote(segment) for segment in parts.path.split("/") if segment]
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+
+    headers: Dict[str, str] = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers.")
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Bodies are limited to {MAX_BODY_BYTES} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body)
+
+
+def encode_response(
+    status: HTTPStatus,
+    body: bytes,
+    content_type: str,
+    keep_alive: bool,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> bytes:
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+        **(extra_headers or {}),
+    }
+    head = f"HTTP/1.1 {status.value} {status.phrase}\r\n" + "".join(
+        f"{name}: {value}\r\n" for name, value in headers.items()
+    )
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+def json_body(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def rows_from_upload(raw: bytes):
+    if raw.startswith(XLSX_MAGIC):
+        return iter_xlsx_rows(io.BytesIO(raw))
+    return csv.reader(io.StringIO(raw.decode("utf-8-sig"), newline=""))
+
+
+class LoadService:
+    def __init__(self, cache: Optional[SnapshotCache] = None) -> None:
+        self.cache = cache or SnapshotCache()
+        self._pending: Dict[str, "asyncio.Future[CachedSnapshot]"] = {}
+
+    async def add_snapshot(self, raw: bytes) -> CachedSnapshot:
+        """Parse and cache ``raw`` once, however many requests post it at the same time."""
+        digest = content_digest(raw)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return cached
+        pending = self._pending.get(digest)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[digest] = future
+        try:
+            entry = await asyncio.to_thread(self.cache.load_bytes, raw)
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved when nobody else was waiting on it.
+            future.exception()
+            raise
+        finally:
+            del self._pending[digest]
+        future.set_result(entry)
+        return entry
+
+    def snapshot(self, digest: str) -> CachedSnapshot:
+        entry = self.cache.get(digest)
+        if entry is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown snapshot {digest}; POST it to /snapshots first.")
+        return entry
+
+    async def handle(self, request: Request) -> Tuple[HTTPStatus, bytes, str, Dict[str, str]]:
+        route = (request.method, *request.path[:1])
+        path = request.path
+
+        if route == ("GET", "health") and len(path) == 1:
+            return self.ok({"status": "ok", "cache": self.cache.stats()})
+
+        if route == ("POST", "snapshots") and len(path) == 1:
+            entry = await self.add_snapshot(self.require_body(request))
+            return self.ok(
+                {
+                    "digest": entry.digest,
+                    "teachers": len(entry.teachers),
+                    "allocations": len(entry.data.get("allocations", {})),
+                },
+                HTTPStatus.CREATED,
+            )
+
+        if route == ("POST", "loads") and len(path) == 1:
+            entry = await self.add_snapshot(self.require_body(request))
+            return self.ok(entry.summary())
+
+        if route == ("POST", "convert") and len(path) == 1:
+            return await self.convert(request)
+
+        if route == ("GET", "snapshots") and len(path) >= 3:
+            entry = self.snapshot(path[1])
+            action = path[2]
+            if action == "loads" and len(path) == 3:
+                return self.ok(entry.summary())
+            if action == "teachers" and len(path) == 4:
+                name = path[3]
+                if name not in entry.load_index:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown teacher {name!r}.")
+                load = entry.teacher_load(name)
+                return self.ok(dict(load, records=[rec.as_dict() for rec in load["records"]]))
+            if action == "report" and len(path) == 3:
+                teacher = request.query.get("teacher")
+                text = await asyncio.to_thread(entry.report, teacher)
+                return HTTPStatus.OK, text.encode("utf-8"), "text/markdown; charset=utf-8", {}
+            if action == "clashes" and len(path) == 3:
+                report = await asyncio.to_thread(detect_clashes, entry.data)
+                return self.ok(
+                    {"counts": report.counts(), "clashes": [clash.as_dict() for clash in report.clashes]}
+                )
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {request.method} /{'/'.join(path)}.")
+
+    async def convert(self, request: Request) -> Tuple[HTTPStatus, bytes, str, Dict[str, str]]:
+        raw = self.require_body(request)
+        include_csv_data = request.query.get("csv_data", "1").lower() not in ("0", "false", "no")
+
+        def run() -> bytes:
+            return json_body(convert_rows_to_payload(rows_from_upload(raw), include_csv_data))
+
+        try:
+            body = await asyncio.to_thread(run)
+        except (ValueError, KeyError) as exc:
+            raise HTTPError(HTTPStatus.UNPROCESSABLE_ENTITY, str(exc))
+        entry = await self.add_snapshot(body)
+        return HTTPStatus.OK, body, "application/json", {"X-Snapshot-Digest": entry.digest}
+
+    @staticmethod
+    def require_body(request: Request) -> bytes:
+        if not request.body:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is empty.")
+        return request.body
+
+    @staticmethod
+    def ok(value, status: HTTPStatus = HTTPStatus.OK) -> Tuple[HTTPStatus, bytes, str, Dict[str, str]]:
+        return status, json_body(value), "application/json", {}
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request.headers.get("connection", "").lower() != "close"
+                    status, body, content_type, headers = await self.handle(request)
+                except HTTPError as exc:
+                    status, body, content_type, headers = exc.status, json_body({"error": str(exc)}), "application/json", {}
+                except ValueError as exc:
+                    status, body, content_type, headers = (
+                        HTTPStatus.UNPROCESSABLE_ENTITY,
+                        json_body({"error": str(exc)}),
+                        "application/json",
+                        {},
+                    )
+                except Exception as exc:  # Keep serving; report the failure to this client only.
+                    status, body, content_type, headers = (
+                        HTTPStatus.INTERNAL_SERVER_ERROR,
+                        json_body({"error": f"{type(exc).__name__}: {exc}"}),
+                        "application/json",
+                        {},
+                    )
+                writer.write(encode_response(status, body, content_type, keep_alive, headers))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def serve(host: str, port: int, service: LoadService) -> None:
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    addresses = ", ".join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+    print(f"Serving on {addresses}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve teacher loads, clashes and CSV conversion over local HTTP.")
+    parser.add_argument("snapshots", nargs="*", help="Snapshot files (.json or .mxc) to load at startup.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT}).")
+    parser.add_argument("--period-profile", help="Optional JSON profile overriding the subject-period rules.")
+    parser.add_argument("--cache-size", type=int, default=16, help="Parsed snapshots to keep in memory.")
+    args = parser.parse_args(argv)
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    service = LoadService(SnapshotCache(max_snapshots=args.cache_size, rules=rules))
+    for path in args.snapshots:
+        try:
+            entry = service.cache.load_path(path)
+        except (OSError, ValueError) as exc:
+            print(f"{path}: could not be loaded ({exc})", file=sys.stderr)
+            return 2
+        print(f"Loaded {path} as {entry.digest}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
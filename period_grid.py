@@ -0,0 +1,206 @@
+"""Period grid: the day and period slots each line occupies, with bell times.
+
+A grid is described by the ``periodGrid`` key of a period profile (see
+``period_rules``)::
+
+    "periodGrid": {
+      "days": [
+        {"name": "Mon", "periods": [{"name": "P1", "start": "08:50", "end": "09:49"}, ...]},
+        ...
+      ],
+      "lines": {"Line 1": ["Mon/P1", "Wed/P3", ...], "WedA1": ["Wed A/P1"], ...}
+    }
+
+Slots are numbered in day and period order. Any set of slots is an ``int`` bitset with
+bit ``n`` set for slot ``n``. A line is therefore one mask, a teacher's or room's
+timetable is the OR of its lines' masks, and clash and free-period checks are single
+``&`` and ``~`` operations.
+
+``Period Matrix.html`` shows each line as ``PERIODS_PER_LINE`` period cells but holds
+no bell times. ``template_grid_profile`` lays out a grid with that shape, timed so each
+line's minutes equal today's per-line constants; edit its bell times to the school's
+real ones.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+PERIODS_PER_LINE = 7
+SLOT_SEPARATOR = "/"
+CLOCK_PATTERN = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*$")
+WEDNESDAY_LINE_PATTERN = re.compile(r"^wed\s*([a-z]?)\s*(\d+)$", re.IGNORECASE)
+
+
+def parse_clock(value: str) -> int:
+    """``"08:50"`` -> minutes after midnight."""
+    match = CLOCK_PATTERN.match(str(value))
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise ValueError(f"Expected a HH:MM time, got {value!r}.")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def format_clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def normalize_line_label(label: str) -> str:
+    return " ".join(str(label or "").split()).lower()
+
+
+@dataclass(frozen=True)
+class PeriodSlot:
+    index: int
+    day: str
+    period: str
+    start: int
+    end: int
+
+    @property
+    def minutes(self) -> int:
+        return self.end - self.start
+
+    @property
+    def name(self) -> str:
+        return f"{self.day}{SLOT_SEPARATOR}{self.period}"
+
+    def describe(self) -> str:
+        return f"{self.day} {self.period} ({format_clock(self.start)}-{format_clock(self.end)})"
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Indices of the set bits of ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PeriodGrid:
+    def __init__(self, slots: Sequence[PeriodSlot], line_slots: Mapping[str, Iterable[int]]) -> None:
+        self.slots = list(slots)
+        self.full_mask = (1 << len(self.slots)) - 1
+        self.slot_ids = {slot.name: slot.index for slot in self.slots}
+        self.labels: Dict[str, str] = {}
+        self.line_masks: Dict[str, int] = {}
+        for label, indices in line_slots.items():
+            mask = 0
+            for index in indices:
+                mask |= 1 << index
+            self.labels[normalize_line_label(label)] = label
+            self.line_masks[normalize_line_label(label)] = mask
+
+    @classmethod
+    def from_profile(cls, profile: Mapping) -> "PeriodGrid":
+        """Build a grid from a ``periodGrid`` mapping; raises ``ValueError`` if it is inconsistent."""
+        slots: List[PeriodSlot] = []
+        for day in profile.get("days", []):
+            day_name = str(day["name"])
+            for period in day.get("periods", []):
+                start, end = parse_clock(period["start"]), parse_clock(period["end"])
+                if end <= start:
+                    raise ValueError(f"{day_name} {period['name']} ends before it starts.")
+                slots.append(PeriodSlot(len(slots), day_name, str(period["name"]), start, end))
+        slot_ids = {slot.name: slot.index for slot in slots}
+        if len(slot_ids) != len(slots):
+            raise ValueError("Period grid has two periods with the same day and name.")
+
+        line_slots: Dict[str, List[int]] = {}
+        for label, names in profile.get("lines", {}).items():
+            try:
+                line_slots[label] = [slot_ids[name] for name in names]
+            except KeyError as exc:
+                raise ValueError(f"Line {label!r} refers to unknown slot {exc.args[0]!r}.") from None
+        return cls(slots, line_slots)
+
+    def to_profile(self) -> Dict[str, object]:
+        days: Dict[str, List[Dict[str, str]]] = {}
+        for slot in self.slots:
+            days.setdefault(slot.day, []).append(
+                {"name": slot.period, "start": format_clock(slot.start), "end": format_clock(slot.end)}
+            )
+        return {
+            "days": [{"name": day, "periods": periods} for day, periods in days.items()],
+            "lines": {
+                self.labels[key]: [self.slots[index].name for index in iter_bits(mask)]
+                for key, mask in self.line_masks.items()
+            },
+        }
+
+    def has_line(self, label: str) -> bool:
+        return normalize_line_label(label) in self.line_masks
+
+    def line_mask(self, label: str) -> int:
+        return self.line_masks.get(normalize_line_label(label), 0)
+
+    def slots_in(self, mask: int) -> List[PeriodSlot]:
+        return [self.slots[index] for index in iter_bits(mask & self.full_mask)]
+
+    def minutes_in(self, mask: int) -> int:
+        return sum(self.slots[index].minutes for index in iter_bits(mask & self.full_mask))
+
+    def line_minutes(self, label: str) -> Optional[float]:
+        """Average minutes of one period on ``label``, or None if the grid does not place it."""
+        mask = self.line_mask(label)
+        if not mask:
+            return None
+        return self.minutes_in(mask) / bin(mask).count("1")
+
+    def free_mask(self, *busy_masks: int) -> int:
+        """Slots in which none of ``busy_masks`` is busy."""
+        busy = 0
+        for mask in busy_masks:
+            busy |= mask
+        return self.full_mask & ~busy
+
+
+def template_grid_profile(
+    lines: Sequence[str],
+    is_wednesday_line: Callable[[str], bool],
+    standard_minutes: int,
+    wednesday_minutes: int,
+    periods_per_line: int = PERIODS_PER_LINE,
+    day_start: str = "08:50",
+) -> Dict[str, object]:
+    """A starting ``periodGrid`` for ``lines`` to be edited with real bell times.
+
+    Standard lines rotate through ``periods_per_line`` days of back-to-back periods, so
+    each line meets once a day at a different time. Wednesday lines such as ``WedA1``
+    become period 1 of a ``Wed A`` day. Period lengths are ``standard_minutes`` and
+    ``wednesday_minutes``, so line minutes match the built-in constants.
+    """
+    standard = [label for label in lines if not is_wednesday_line(label)]
+    wednesday = [label for label in lines if is_wednesday_line(label)]
+    start = parse_clock(day_start)
+
+    def periods(count: int, minutes: int) -> List[Dict[str, str]]:
+        return [
+            {
+                "name": f"P{number + 1}",
+                "start": format_clock(start + number * minutes),
+                "end": format_clock(start + (number + 1) * minutes),
+            }
+            for number in range(count)
+        ]
+
+    days: List[Dict[str, object]] = []
+    line_slots: Dict[str, List[str]] = {label: [] for label in lines}
+    if standard:
+        for day in range(periods_per_line):
+            day_name = f"Day {day + 1}"
+            days.append({"name": day_name, "periods": periods(len(standard), standard_minutes)})
+            for number in range(len(standard)):
+                label = standard[(number + day) % len(standard)]
+                line_slots[label].append(f"{day_name}{SLOT_SEPARATOR}P{number + 1}")
+
+    wednesday_days: Dict[str, List[str]] = {}
+    for label in wednesday:
+        match = WEDNESDAY_LINE_PATTERN.match(label.strip())
+        day_name = f"Wed {match.group(1).upper()}".strip() if match else "Wed"
+        wednesday_days.setdefault(day_name, []).append(label)
+    for day_name, day_lines in wednesday_days.items():
+        days.append({"name": day_name, "periods": periods(len(day_lines), wednesday_minutes)})
+        for number, label in enumerate(day_lines):
+            line_slots[label].append(f"{day_name}{SLOT_SEPARATOR}P{number + 1}")
+
+    return {"days": days, "lines": line_slots}
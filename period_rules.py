@@ -0,0 +1,202 @@
+"""Compiled subject-period rules that turn Matrix subject codes into periods per cycle.
+
+The rules are described by a per-school profile. The built-in profile matches the
+allocation used by the Matrix app; a school can replace any top-level key with a JSON
+file such as::
+
+    {
+      "name": "Example High",
+      "yearPeriods": {"12": 7, "11": 7, "10": 5, "9": 6},
+      "electiveYears": {"8": {"elective": 3, "mandatory": 5}},
+      "mandatoryYears": {"7": 5}
+    }
+
+An optional ``periodGrid`` key places each line on concrete day and period slots with
+bell times (see ``period_grid``). Lines the grid places then take their minutes from
+those slots instead of the built-in per-line constants.
+
+Each distinct subject code is classified once and the result is kept in a bounded
+LRU cache, so resolving a whole snapshot costs one classification per distinct code.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Union
+
+from period_grid import PeriodGrid
+
+YEAR_PERIOD_ALLOCATION = {
+    12: 7,
+    11: 7,
+    10: 5,
+    9: 6,
+}
+YEAR8_ELECTIVE_PERIODS = 3
+YEAR8_TECH_MANDATORY_PERIODS = 5
+YEAR7_TECH_MANDATORY_PERIODS = 5
+
+DEFAULT_PERIOD_PROFILE: Dict[str, object] = {
+    "name": "default",
+    "yearPeriods": {str(year): periods for year, periods in YEAR_PERIOD_ALLOCATION.items()},
+    "electiveYears": {
+        "8": {"elective": YEAR8_ELECTIVE_PERIODS, "mandatory": YEAR8_TECH_MANDATORY_PERIODS},
+    },
+    "mandatoryYears": {"7": YEAR7_TECH_MANDATORY_PERIODS},
+    "mandatoryPatterns": [r"\bTECH\b", r"(^|\s)MAND(?:ATORY)?\b"],
+    "mandatoryCompactPatterns": [r"^TM", r"TECHMAND"],
+    "wednesdayMarker": "_wed",
+    "wednesdayPeriods": 1,
+    "splitMarker": "▸",
+    "cacheSize": 4096,
+    "periodGrid": None,
+}
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SEMESTER_PREFIX_PATTERN = re.compile(r"^S[12]\s*:?\s*")
+YEAR_PREFIX_PATTERN = re.compile(r"^(?:YEAR|YR)\s*")
+YEAR_NUMBER_PATTERN = re.compile(r"^(\d{1,2})")
+
+
+class SubjectClassification(NamedTuple):
+    normalized: str
+    year: Optional[int]
+    category: str
+    wednesday: bool
+    split: bool
+    periods: float
+
+
+def load_period_profile(path: Union[str, Path]) -> Dict[str, object]:
+    profile = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(profile, dict):
+        raise ValueError(f"Period profile must be a JSON object: {path}")
+    return profile
+
+
+def _year_table(values: Mapping[str, object]) -> Dict[int, object]:
+    return {int(year): value for year, value in (values or {}).items()}
+
+
+class PeriodRuleEngine:
+    """Resolve periods per cycle for subject codes using a compiled profile."""
+
+    def __init__(self, profile: Optional[Mapping[str, object]] = None) -> None:
+        merged = dict(DEFAULT_PERIOD_PROFILE)
+        merged.update(profile or {})
+        self.profile = merged
+        self.name = str(merged.get("name", "custom"))
+
+        self.year_periods = {
+            year: float(periods) for year, periods in _year_table(merged["yearPeriods"]).items()
+        }
+        self.elective_years = {
+            year: (float(rule.get("elective", 0)), float(rule.get("mandatory", 0)))
+            for year, rule in _year_table(merged["electiveYears"]).items()
+        }
+        self.mandatory_years = {
+            year: float(periods) for year, periods in _year_table(merged["mandatoryYears"]).items()
+        }
+        self.mandatory_patterns = [re.compile(p) for p in merged["mandatoryPatterns"]]
+        self.mandatory_compact_patterns = [
+            re.compile(p) for p in merged["mandatoryCompactPatterns"]
+        ]
+        self.wednesday_marker = str(merged["wednesdayMarker"]).lower()
+        self.wednesday_periods = float(merged["wednesdayPeriods"])
+        self.split_marker = str(merged["splitMarker"])
+        self.grid = PeriodGrid.from_profile(merged["periodGrid"]) if merged["periodGrid"] else None
+
+        self.classify = lru_cache(maxsize=int(merged["cacheSize"]))(self._classify)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "PeriodRuleEngine":
+        return cls(load_period_profile(path))
+
+    def line_minutes(self, label: str) -> Optional[float]:
+        """Minutes of one period on ``label`` from the grid, or None to use the built-in constants."""
+        return self.grid.line_minutes(label) if self.grid is not None else None
+
+    def is_wednesday_subject(self, code: str) -> bool:
+        return bool(code and self.wednesday_marker in code.lower())
+
+    def normalize(self, subject_code: str) -> str:
+        if not subject_code:
+            return ""
+        normalized = WHITESPACE_PATTERN.sub(" ", str(subject_code).upper()).strip()
+        normalized = SEMESTER_PREFIX_PATTERN.sub("", normalized)
+        return YEAR_PREFIX_PATTERN.sub("", normalized)
+
+    def _is_mandatory(self, remainder: str) -> bool:
+        compact = WHITESPACE_PATTERN.sub("", remainder)
+        return any(p.search(compact) for p in self.mandatory_compact_patterns) or any(
+            p.search(remainder) for p in self.mandatory_patterns
+        )
+
+    def _classify(self, subject_code: str) -> SubjectClassification:
+        wednesday = self.is_wednesday_subject(subject_code)
+        split = self.split_marker in subject_code
+        normalized = self.normalize(subject_code)
+        if wednesday:
+            return SubjectClassification(
+                normalized, None, "wednesday", True, split, self.wednesday_periods
+            )
+
+        match = YEAR_NUMBER_PATTERN.match(normalized)
+        if not match:
+            return SubjectClassification(normalized, None, "unknown", False, split, 0.0)
+
+        year = int(match.group(1))
+        if year in self.year_periods:
+            return SubjectClassification(
+                normalized, year, "fixed", False, split, self.year_periods[year]
+            )
+
+        remainder = normalized[len(match.group(1)) :].strip()
+        if year in self.elective_years:
+            elective, mandatory = self.elective_years[year]
+            if self._is_mandatory(remainder):
+                return SubjectClassification(normalized, year, "mandatory", False, split, mandatory)
+            return SubjectClassification(normalized, year, "elective", False, split, elective)
+
+        if year in self.mandatory_years:
+            return SubjectClassification(
+                normalized, year, "mandatory", False, split, self.mandatory_years[year]
+            )
+
+        return SubjectClassification(normalized, year, "unknown", False, split, 0.0)
+
+    def period_value(self, subject_code: str, split_lookup: Optional[Mapping] = None) -> float:
+        if not subject_code:
+            return 0.0
+
+        classification = self.classify(subject_code)
+        if classification.wednesday:
+            return classification.periods
+
+        split_info = split_lookup.get(subject_code) if split_lookup else None
+        if split_info:
+            return parse_period_value(split_info.get("periods"))
+
+        return classification.periods
+
+    def resolve_periods(
+        self, subject_codes: Iterable[str], split_lookup: Optional[Mapping] = None
+    ) -> Dict[str, float]:
+        resolved: Dict[str, float] = {}
+        for code in subject_codes:
+            if code not in resolved:
+                resolved[code] = self.period_value(code, split_lookup)
+        return resolved
+
+
+def parse_period_value(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+DEFAULT_RULES = PeriodRuleEngine()
@@ -0,0 +1,224 @@
+"""Teacher and room timetables as bitsets on a period grid.
+
+The period profile's ``periodGrid`` maps each line to a slot mask. One pass over a
+snapshot's allocations ORs those masks into one integer per teacher and per room:
+* a clash is a non-zero ``&`` between two different lines held by the same teacher or
+  room;
+* free periods are the bits left in ``grid.free_mask(...)``;
+* scheduled minutes are summed from the slots' bell times.
+
+Usage::
+
+    python period_schedule.py template snapshot.json --output school-profile.json
+    python period_schedule.py check snapshot.json --period-profile school-profile.json
+    python period_schedule.py free snapshot.json --period-profile school-profile.json \\
+        --teacher "Steve Cowell" --teacher "Louis Orr"
+
+Clashes within a single line (two classes in one cell, or a room shared on one line)
+are left to ``clash_detector``.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from clash_detector import build_room_indexes, normalize_subject_code
+from period_grid import PeriodGrid, template_grid_profile
+from period_rules import PeriodRuleEngine, load_period_profile
+from verify_teacher_load import (
+    STANDARD_PERIOD_MINUTES,
+    WEDNESDAY_PERIOD_MINUTES,
+    build_split_lookup,
+    is_wednesday_line,
+    iter_allocation_cells,
+    load_snapshot,
+)
+
+
+@dataclass
+class SlotClash:
+    kind: str
+    name: str
+    lines: Tuple[str, str]
+    mask: int
+
+    def as_dict(self, grid: PeriodGrid) -> Dict[str, object]:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "lines": list(self.lines),
+            "slots": [slot.name for slot in grid.slots_in(self.mask)],
+        }
+
+
+@dataclass
+class ScheduleIndex:
+    """Slot masks per teacher and per room for one snapshot."""
+
+    grid: PeriodGrid
+    teacher_masks: Dict[str, int] = field(default_factory=dict)
+    room_masks: Dict[str, int] = field(default_factory=dict)
+    clashes: List[SlotClash] = field(default_factory=list)
+    unplaced_lines: Set[str] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, data, grid: PeriodGrid) -> "ScheduleIndex":
+        index = cls(grid)
+        teachers = data.get("teachers", [])
+        lines = data.get("lines", [])
+        line_masks = [grid.line_mask(label) for label in lines]
+        split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+        subject_rooms, override_rooms = build_room_indexes(data, split_lookup)
+
+        # Per owner, the lines already placed and their masks, to name both sides of a clash.
+        teacher_lines: Dict[str, Dict[int, int]] = {}
+        room_lines: Dict[str, Dict[int, int]] = {}
+
+        def place(kind: str, name: str, line_idx: int, masks: Dict[str, int], placed: Dict[str, Dict[int, int]]):
+            mask = line_masks[line_idx]
+            owner_lines = placed.setdefault(name, {})
+            if line_idx in owner_lines:
+                return
+            if masks.get(name, 0) & mask:
+                for other_idx, other_mask in owner_lines.items():
+                    overlap = other_mask & mask
+                    if overlap:
+                        index.clashes.append(SlotClash(kind, name, (lines[other_idx], lines[line_idx]), overlap))
+            owner_lines[line_idx] = mask
+            masks[name] = masks.get(name, 0) | mask
+
+        for line_idx, teacher_idx, subjects in iter_allocation_cells(data):
+            if not 0 <= line_idx < len(lines) or not 0 <= teacher_idx < len(teachers):
+                continue
+            if not line_masks[line_idx]:
+                index.unplaced_lines.add(lines[line_idx])
+                continue
+            place("teacher", teachers[teacher_idx], line_idx, index.teacher_masks, teacher_lines)
+            key = f"{line_idx}-{teacher_idx}"
+            for subject in subjects:
+                normalized = normalize_subject_code(subject)
+                for room in override_rooms.get((key, normalized)) or subject_rooms.get(normalized, []):
+                    place("room", room, line_idx, index.room_masks, room_lines)
+        return index
+
+    def scheduled_minutes(self, teacher: str) -> int:
+        return self.grid.minutes_in(self.teacher_masks.get(teacher, 0))
+
+    def free_mask(self, teachers: Sequence[str] = (), rooms: Sequence[str] = ()) -> int:
+        return self.grid.free_mask(
+            *(self.teacher_masks.get(name, 0) for name in teachers),
+            *(self.room_masks.get(room.strip().upper(), 0) for room in rooms),
+        )
+
+
+def grid_from_profile(path) -> PeriodGrid:
+    rules = PeriodRuleEngine.from_file(path)
+    if rules.grid is None:
+        raise ValueError(f"{path} has no periodGrid; create one with the 'template' command.")
+    return rules.grid
+
+
+def format_check(path: str, index: ScheduleIndex) -> str:
+    grid = index.grid
+    lines = [f"{path}: {len(index.clashes)} slot clashes"]
+    for clash in index.clashes:
+        slots = ", ".join(slot.describe() for slot in grid.slots_in(clash.mask))
+        lines.append(f"  {clash.kind}: {clash.name} on {clash.lines[0]} and {clash.lines[1]} at {slots}")
+    if index.unplaced_lines:
+        lines.append(f"  Lines not on the grid: {', '.join(sorted(index.unplaced_lines))}")
+    lines.append("")
+    lines.append("| Teacher | Periods | Scheduled minutes | Free periods |")
+    lines.append("| - | - | - | - |")
+    for teacher, mask in index.teacher_masks.items():
+        lines.append(
+            f"| {teacher} | {bin(mask).count('1')} | {index.scheduled_minutes(teacher)} | "
+            f"{bin(grid.free_mask(mask)).count('1')} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Timetable checks on a period grid with bell times.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    template = commands.add_parser("template", help="Write a period profile with a starting grid for a snapshot's lines.")
+    template.add_argument("snapshot", help="Snapshot (.json or .mxc) whose lines the grid should place.")
+    template.add_argument("--output", type=Path, required=True, help="Profile JSON to write.")
+    template.add_argument("--base-profile", help="Existing period profile to add the grid to.")
+    template.add_argument("--day-start", default="08:50", help="First bell of each day (default 08:50).")
+
+    check = commands.add_parser("check", help="Report teacher and room slot clashes and scheduled minutes.")
+    check.add_argument("snapshot")
+    check.add_argument("--period-profile", required=True, help="Period profile containing a periodGrid.")
+    check.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    free = commands.add_parser("free", help="List slots in which every given teacher and room is free.")
+    free.add_argument("snapshot")
+    free.add_argument("--period-profile", required=True, help="Period profile containing a periodGrid.")
+    free.add_argument("--teacher", action="append", default=[], help="Teacher name (repeatable).")
+    free.add_argument("--room", action="append", default=[], help="Room code (repeatable).")
+
+    args = parser.parse_args(argv)
+
+    try:
+        data = load_snapshot(args.snapshot)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read the snapshot or profile: {exc}", file=sys.stderr)
+        return 2
+
+    with data:
+        try:
+            if args.command == "template":
+                profile = load_period_profile(args.base_profile) if args.base_profile else {"name": "custom"}
+                profile["periodGrid"] = template_grid_profile(
+                    data.get("lines", []),
+                    is_wednesday_line,
+                    STANDARD_PERIOD_MINUTES,
+                    WEDNESDAY_PERIOD_MINUTES,
+                    day_start=args.day_start,
+                )
+                args.output.write_text(json.dumps(profile, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+                print(f"Wrote {args.output}; edit its bell times to match the school day.")
+                return 0
+
+            grid = grid_from_profile(args.period_profile)
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"Could not read the snapshot or profile: {exc}", file=sys.stderr)
+            return 2
+
+        index = ScheduleIndex.build(data, grid)
+    if args.command == "check":
+        if args.json:
+            result = {
+                "clashes": [clash.as_dict(grid) for clash in index.clashes],
+                "unplacedLines": sorted(index.unplaced_lines),
+                "teachers": {
+                    teacher: {
+                        "slots": [slot.name for slot in grid.slots_in(mask)],
+                        "scheduledMinutes": index.scheduled_minutes(teacher),
+                    }
+                    for teacher, mask in index.teacher_masks.items()
+                },
+            }
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            sys.stdout.write(format_check(args.snapshot, index))
+        return 1 if index.clashes else 0
+
+    if not args.teacher and not args.room:
+        parser.error("free needs at least one --teacher or --room")
+    unknown = [name for name in args.teacher if name not in index.teacher_masks]
+    for name in unknown:
+        print(f"Note: {name} has no placed allocations, so is free throughout.", file=sys.stderr)
+    slots = grid.slots_in(index.free_mask(args.teacher, args.room))
+    print(f"{len(slots)} free slots for {', '.join(args.teacher + args.room)}:")
+    for slot in slots:
+        print(f"  {slot.describe()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,400 @@
+"""Delta-compressed archive of successive Matrix snapshots.
+
+An archive (``.mxa``) is one append-only file. Most records are structural patches
+against the previous version. A full base is written every ``base_interval`` versions,
+so rebuilding any version decodes at most one base and ``base_interval - 1`` patches.
+
+Patches are per top-level section:
+* mapping sections (``allocations``, ``subjectSplits``, ``teacherLoadSettings`` and the
+  subject mappings) record changed and removed keys;
+* ``csvData`` records changed cells, or whole rows when most of a row changed;
+* other sections are replaced when they change.
+
+Each record is zlib-compressed JSON behind a small binary header, so listing an archive
+reads only the headers. Versions are checked against a SHA-256 of their JSON rendering,
+which is byte-for-byte the Matrix app's own export format.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from columnar_snapshot import ColumnarSnapshot, is_columnar_snapshot
+from snapshot_cache import content_digest
+from verify_teacher_load import resolve_snapshot_paths
+
+MAGIC = b"MXARC\x00\x00\x01"
+RECORD_HEADER = struct.Struct("<BII")
+KIND_BASE = 0
+KIND_PATCH = 1
+DEFAULT_BASE_INTERVAL = 30
+ARCHIVE_SUFFIX = ".mxa"
+# A changed row is stored whole once more than this share of its cells changed.
+ROW_REWRITE_RATIO = 0.5
+
+
+@dataclass
+class ArchiveRecord:
+    version: int
+    kind: int
+    offset: int
+    length: int
+
+
+def render_snapshot(payload: Mapping) -> str:
+    """The snapshot as the Matrix app exports it."""
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
+def snapshot_digest(payload: Mapping) -> str:
+    return content_digest(render_snapshot(payload).encode("utf-8"))
+
+
+def read_snapshot_payload(path: Union[str, Path]) -> Dict[str, object]:
+    if is_columnar_snapshot(path):
+        with ColumnarSnapshot(path) as snapshot:
+            return snapshot.to_payload()
+    payload = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+    if not isinstance(payload, dict):
+        raise ValueError(f"{path}: snapshot JSON must be an object.")
+    return payload
+
+
+def _is_grid(value) -> bool:
+    return isinstance(value, list) and all(isinstance(row, list) for row in value)
+
+
+def diff_mapping(old: Mapping, new: Mapping) -> dict:
+    changes = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    patch = {}
+    if changes:
+        patch["set"] = changes
+    removed = [key for key in old if key not in new]
+    if removed:
+        patch["del"] = removed
+    # Updated keys keep their place and new keys are appended; record any other order.
+    kept = [key for key in old if key in new]
+    if kept + [key for key in new if key not in old] != list(new):
+        patch["order"] = list(new)
+    return patch
+
+
+def apply_mapping(old: Mapping, patch: dict) -> dict:
+    removed = set(patch.get("del", ()))
+    result = {key: value for key, value in old.items() if key not in removed}
+    result.update(patch.get("set", {}))
+    order = patch.get("order")
+    if order is not None:
+        result = {key: result[key] for key in order}
+    return result
+
+
+def diff_grid(old: List[list], new: List[list]) -> dict:
+    rows: Dict[str, list] = {}
+    cells: List[list] = []
+    for row_idx, row in enumerate(new):
+        if row_idx >= len(old):
+            rows[str(row_idx)] = row
+            continue
+        old_row = old[row_idx]
+        if row == old_row:
+            continue
+        if len(row) != len(old_row):
+            rows[str(row_idx)] = row
+            continue
+        changed = [[row_idx, col_idx, value] for col_idx, value in enumerate(row) if old_row[col_idx] != value]
+        if len(changed) > len(row) * ROW_REWRITE_RATIO:
+            rows[str(row_idx)] = row
+        else:
+            cells.extend(changed)
+    patch: dict = {"length": len(new)}
+    if rows:
+        patch["rows"] = rows
+    if cells:
+        patch["cells"] = cells
+    return patch
+
+
+def apply_grid(old: List[list], patch: dict) -> List[list]:
+    result = list(old[: patch["length"]])
+    result.extend([] for _ in range(patch["length"] - len(result)))
+    for row_idx, row in patch.get("rows", {}).items():
+        result[int(row_idx)] = row
+    copied = set()
+    for row_idx, col_idx, value in patch.get("cells", ()):
+        if row_idx not in copied:
+            result[row_idx] = list(result[row_idx])
+            copied.add(row_idx)
+        result[row_idx][col_idx] = value
+    return result
+
+
+def diff_snapshots(old: Mapping, new: Mapping) -> dict:
+    """Structural patch turning ``old`` into ``new``; ``apply_patch`` reverses it."""
+    changes = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if key in old and previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            changes[key] = {"mapping": diff_mapping(previous, value)}
+        elif key == "csvData" and _is_grid(previous) and _is_grid(value):
+            changes[key] = {"grid": diff_grid(previous, value)}
+        else:
+            changes[key] = {"replace": value}
+    patch: dict = {"changes": changes}
+    if list(new) != list(old):
+        patch["keys"] = list(new)
+    return patch
+
+
+def apply_patch(old: Mapping, patch: dict) -> Dict[str, object]:
+    """Return the next version; sections the patch does not touch are shared with ``old``."""
+    result = dict(old)
+    for key, change in patch["changes"].items():
+        if "mapping" in change:
+            result[key] = apply_mapping(old[key], change["mapping"])
+        elif "grid" in change:
+            result[key] = apply_grid(old[key], change["grid"])
+        else:
+            result[key] = change["replace"]
+    keys = patch.get("keys")
+    if keys is not None:
+        result = {key: result[key] for key in keys}
+    return result
+
+
+class SnapshotArchive:
+    """An archive file of snapshot versions, numbered from 1."""
+
+    def __init__(self, path: Union[str, Path], base_interval: int = DEFAULT_BASE_INTERVAL) -> None:
+        if base_interval < 1:
+            raise ValueError("The base interval must be at least 1.")
+        self.path = Path(path)
+        self.base_interval = base_interval
+        self.records: List[ArchiveRecord] = []
+        self._end = len(MAGIC)
+        self._latest: Optional[Tuple[int, Dict[str, object], str]] = None
+        if self.path.exists():
+            self._scan()
+
+    def _scan(self) -> None:
+        with self.path.open("rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot archive.")
+            size = self.path.stat().st_size
+            offset = len(MAGIC)
+            while offset + RECORD_HEADER.size <= size:
+                handle.seek(offset)
+                kind, version, length = RECORD_HEADER.unpack(handle.read(RECORD_HEADER.size))
+                body = offset + RECORD_HEADER.size
+                if body + length > size:
+                    # A record cut short by an interrupted write; the next append replaces it.
+                    break
+                if version != len(self.records) + 1 or kind not in (KIND_BASE, KIND_PATCH):
+                    raise ValueError(f"{self.path} is corrupt at byte {offset}.")
+                self.records.append(ArchiveRecord(version, kind, body, length))
+                offset = body + length
+        self._end = offset
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _read_body(self, record: ArchiveRecord) -> dict:
+        with self.path.open("rb") as handle:
+            handle.seek(record.offset)
+            return json.loads(zlib.decompress(handle.read(record.length)))
+
+    def _record(self, version: int) -> ArchiveRecord:
+        if version < 0:
+            version += len(self.records) + 1
+        if not 1 <= version <= len(self.records):
+            raise ValueError(f"{self.path} has no version {version}; it holds 1 to {len(self.records)}.")
+        return self.records[version - 1]
+
+    def chain_length(self) -> int:
+        """Patches written since the last base."""
+        count = 0
+        for record in reversed(self.records):
+            if record.kind == KIND_BASE:
+                break
+            count += 1
+        return count
+
+    def entries(self) -> Iterator[dict]:
+        for record in self.records:
+            body = self._read_body(record)
+            yield {
+                "version": record.version,
+                "kind": "base" if record.kind == KIND_BASE else "patch",
+                "bytes": record.length + RECORD_HEADER.size,
+                "label": body.get("label"),
+                "timestamp": body.get("timestamp"),
+                "digest": body["digest"],
+            }
+
+    def payload(self, version: int = -1) -> Dict[str, object]:
+        """Rebuild one version from its nearest base and check it against its digest."""
+        target = self._record(version)
+        if self._latest is not None and self._latest[0] == target.version:
+            return self._latest[1]
+        start = target.version - 1
+        while self.records[start].kind != KIND_BASE:
+            start -= 1
+        payload: Dict[str, object] = {}
+        digest = ""
+        for record in self.records[start : target.version]:
+            body = self._read_body(record)
+            payload = body["payload"] if record.kind == KIND_BASE else apply_patch(payload, body["patch"])
+            digest = body["digest"]
+        if snapshot_digest(payload) != digest:
+            raise ValueError(f"{self.path}: version {target.version} does not match its digest.")
+        if target.version == len(self.records):
+            self._latest = (target.version, payload, digest)
+        return payload
+
+    def _latest_state(self) -> Tuple[Dict[str, object], str]:
+        if self._latest is None or self._latest[0] != len(self.records):
+            self.payload(-1)
+        return self._latest[1], self._latest[2]
+
+    def append(self, payload: Mapping, label: Optional[str] = None) -> Tuple[int, bool]:
+        """Add ``payload`` as the next version. Returns ``(version, added)``.
+
+        A payload equal to the latest version is not stored again.
+        """
+        payload = dict(payload)
+        digest = snapshot_digest(payload)
+        body: dict = {"label": label, "timestamp": payload.get("timestamp"), "digest": digest}
+        if self.records:
+            previous, previous_digest = self._latest_state()
+            if digest == previous_digest:
+                return len(self.records), False
+        if not self.records or self.chain_length() + 1 >= self.base_interval:
+            kind, body["payload"] = KIND_BASE, payload
+        else:
+            kind, body["patch"] = KIND_PATCH, diff_snapshots(previous, payload)
+
+        blob = zlib.compress(json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+        version = len(self.records) + 1
+        mode = "r+b" if self.path.exists() else "wb"
+        with self.path.open(mode) as handle:
+            if mode == "wb":
+                handle.write(MAGIC)
+            handle.seek(self._end)
+            handle.truncate()
+            handle.write(RECORD_HEADER.pack(kind, version, len(blob)))
+            handle.write(blob)
+        offset = self._end + RECORD_HEADER.size
+        self.records.append(ArchiveRecord(version, kind, offset, len(blob)))
+        self._end = offset + len(blob)
+        self._latest = (version, payload, digest)
+        return version, True
+
+    def iter_versions(self) -> Iterator[Tuple[dict, Dict[str, object]]]:
+        """Walk every version in order, applying each patch once."""
+        payload: Dict[str, object] = {}
+        for record in self.records:
+            body = self._read_body(record)
+            payload = body["payload"] if record.kind == KIND_BASE else apply_patch(payload, body["patch"])
+            yield body, payload
+
+    def compact(self, base_interval: Optional[int] = None, keep: Optional[int] = None) -> "SnapshotArchive":
+        """Rewrite the archive with a base every ``base_interval`` versions.
+
+        With ``keep``, only the newest ``keep`` versions survive and they are renumbered
+        from 1; ``keep`` must be at least 1. The new file replaces the old one only once
+        it is complete.
+        """
+        if keep is not None and keep < 1:
+            raise ValueError("Compaction must keep at least 1 version.")
+        base_interval = base_interval or self.base_interval
+        first = max(0, len(self.records) - keep) if keep is not None else 0
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_bytes(MAGIC)
+        compacted = SnapshotArchive(temp_path, base_interval)
+        for index, (body, payload) in enumerate(self.iter_versions()):
+            if index < first:
+                continue
+            if snapshot_digest(payload) != body["digest"]:
+                raise ValueError(f"{self.path}: version {index + 1} does not match its digest.")
+            compacted.append(payload, body.get("label"))
+        os.replace(temp_path, self.path)
+        compacted.path = self.path
+        return compacted
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Store successive snapshots as a base plus structural patches.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Append snapshots to an archive (created if missing).")
+    add.add_argument("archive")
+    add.add_argument("sources", nargs="+", help="Snapshot files, directories or globs (.json or .mxc).")
+    add.add_argument(
+        "--base-interval",
+        type=int,
+        default=DEFAULT_BASE_INTERVAL,
+        help=f"Write a full base after this many versions (default {DEFAULT_BASE_INTERVAL}).",
+    )
+
+    listing = commands.add_parser("list", help="List the versions in an archive.")
+    listing.add_argument("archive")
+
+    extract = commands.add_parser("extract", help="Write one version as a Matrix JSON snapshot.")
+    extract.add_argument("archive")
+    extract.add_argument("version", nargs="?", type=int, default=-1, help="Version number; negative counts from the newest.")
+    extract.add_argument("--output", type=Path, help="Output path (default: stdout).")
+
+    compact = commands.add_parser("compact", help="Rewrite an archive with fresh bases.")
+    compact.add_argument("archive")
+    compact.add_argument("--base-interval", type=int, default=DEFAULT_BASE_INTERVAL)
+    compact.add_argument("--keep", type=int, help="Keep only the newest N versions.")
+
+    args = parser.parse_args(argv)
+    if args.command != "add" and not Path(args.archive).exists():
+        parser.error(f"{args.archive} does not exist.")
+    if getattr(args, "base_interval", 1) < 1:
+        parser.error("--base-interval must be at least 1")
+    if getattr(args, "keep", None) is not None and args.keep < 1:
+        parser.error("--keep must be at least 1")
+
+    try:
+        archive = SnapshotArchive(args.archive, getattr(args, "base_interval", DEFAULT_BASE_INTERVAL))
+        if args.command == "add":
+            source_bytes = 0
+            for source in args.sources:
+                path = Path(source)
+                for snapshot_path in [path] if path.is_file() else resolve_snapshot_paths(source):
+                    source_bytes += snapshot_path.stat().st_size
+                    version, added = archive.append(read_snapshot_payload(snapshot_path), snapshot_path.name)
+                    print(f"{'Added' if added else 'Unchanged'} {snapshot_path} as version {version}")
+            print(f"{args.archive}: {len(archive)} versions, {archive.path.stat().st_size} bytes ({source_bytes} bytes read)")
+        elif args.command == "list":
+            for entry in archive.entries():
+                print(f"{entry['version']}\t{entry['kind']}\t{entry['bytes']} bytes\t{entry['timestamp']}\t{entry['label']}")
+        elif args.command == "extract":
+            text = render_snapshot(archive.payload(args.version))
+            if args.output:
+                args.output.write_text(text, encoding="utf-8")
+            else:
+                sys.stdout.write(text + "\n")
+        elif args.command == "compact":
+            before = archive.path.stat().st_size
+            archive = archive.compact(args.base_interval, args.keep)
+            print(f"{args.archive}: {len(archive)} versions, {before} -> {archive.path.stat().st_size} bytes")
+    except (OSError, ValueError, zlib.error) as exc:
+        print(f"{args.archive}: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
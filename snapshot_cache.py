@@ -0,0 +1,251 @@
+"""In-memory cache of parsed snapshots and teacher loads, keyed by content hash.
+
+Snapshots are identified by the SHA-256 of their bytes, so a file that is saved again
+unchanged, or copied under a new name, is served from memory. Teacher loads are cached
+separately, keyed by everything a teacher's load depends on (their cells, load settings
+and the snapshot's lines and splits). When a new export changes a handful of cells, only
+the teachers holding those cells are recomputed and re-rendered.
+
+Both levels evict least recently used entries once they reach their limits.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from columnar_snapshot import ColumnarSnapshot, is_columnar_snapshot
+from lazy_snapshot import LazySnapshot
+from load_renderers import render_teacher_summary
+from verify_teacher_load import (
+    build_allocation_records,
+    build_split_lookup,
+    compute_teacher_load,
+    get_teacher_load,
+    group_records_by_teacher,
+    iter_allocation_cells,
+)
+
+DEFAULT_MAX_SNAPSHOTS = 16
+DEFAULT_MAX_TEACHERS = 20000
+
+
+def content_digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+class LRUCache:
+    """A small thread-safe LRU mapping with hit and miss counters."""
+
+    def __init__(self, max_entries: int) -> None:
+        if max_entries < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[object, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass
+class CachedSnapshot:
+    digest: str
+    data: Dict[str, object]
+    load_index: Dict[str, dict]
+    sections: Dict[str, str]
+    reused_teachers: int = 0
+    computed_teachers: int = 0
+    source: Optional[str] = field(default=None, compare=False)
+
+    @property
+    def teachers(self) -> List[str]:
+        return self.data.get("teachers", [])
+
+    def teacher_load(self, name: str) -> dict:
+        return get_teacher_load(self.load_index, name, self.data.get("teacherLoadSettings", {}))
+
+    def teacher_section(self, name: str) -> str:
+        section = self.sections.get(name)
+        if section is None:
+            section = render_teacher_summary(self.teacher_load(name))
+        return section
+
+    def report(self, teacher: Optional[str] = None) -> str:
+        """Return the same markdown as ``format_load_report``."""
+        names = [teacher] if teacher else self.teachers
+        return "\n".join(self.teacher_section(name) for name in names).strip() + "\n"
+
+    def summary(self) -> Dict[str, object]:
+        """Return the per-teacher totals in the shape ``verify_snapshot`` reports."""
+        return {
+            "snapshot": self.source or self.digest,
+            "digest": self.digest,
+            "teachers": [
+                {
+                    "teacher": load["teacher"],
+                    "total_load_minutes": load["total_load_minutes"],
+                    "base_minutes": load["base_minutes"],
+                    "balance_minutes": load["balance_minutes"],
+                }
+                for load in self.load_index.values()
+            ],
+        }
+
+
+def parse_snapshot_bytes(raw: bytes, path: Optional[Union[str, Path]] = None):
+    """Parse snapshot bytes; columnar snapshots are read from ``path`` and materialised.
+
+    JSON snapshots come back as a ``LazySnapshot``, so sections the loads never read
+    (``csvData`` above all) stay undecoded while cached.
+    """
+    if path is not None and is_columnar_snapshot(path):
+        with ColumnarSnapshot(path) as snapshot:
+            return snapshot.to_payload()
+    return LazySnapshot(raw.decode("utf-8-sig"))
+
+
+def _context_key(data) -> str:
+    """Digest of the snapshot-wide inputs every teacher's load depends on."""
+    context = json.dumps([data.get("lines", []), data.get("subjectSplits", {})], sort_keys=True)
+    return content_digest(context.encode("utf-8"))
+
+
+def _cells_by_teacher(data) -> Dict[int, List[Tuple[int, int, List[str]]]]:
+    grouped: Dict[int, List[Tuple[int, int, List[str]]]] = {}
+    for cell in iter_allocation_cells(data):
+        grouped.setdefault(cell[1], []).append(cell)
+    return grouped
+
+
+class SnapshotCache:
+    """Parsed snapshots by content hash, plus reusable per-teacher loads and report sections.
+
+    ``rules`` is the period rule engine used for every load in this cache.
+    """
+
+    def __init__(
+        self,
+        max_snapshots: int = DEFAULT_MAX_SNAPSHOTS,
+        max_teachers: int = DEFAULT_MAX_TEACHERS,
+        rules=None,
+    ) -> None:
+        self.rules = rules
+        self.snapshots = LRUCache(max_snapshots)
+        self.teachers = LRUCache(max_teachers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "snapshots": len(self.snapshots),
+            "snapshot_hits": self.snapshots.hits,
+            "snapshot_misses": self.snapshots.misses,
+            "teachers": len(self.teachers),
+            "teacher_hits": self.teachers.hits,
+            "teacher_misses": self.teachers.misses,
+        }
+
+    def get(self, digest: str) -> Optional[CachedSnapshot]:
+        return self.snapshots.get(digest)
+
+    def discard(self, digest: str) -> None:
+        """Drop a parsed snapshot; its teachers' loads stay cached for other snapshots."""
+        self.snapshots.discard(digest)
+
+    def load_path(self, path: Union[str, Path]) -> CachedSnapshot:
+        return self.load_bytes(Path(path).read_bytes(), path)
+
+    def load_bytes(self, raw: bytes, path: Optional[Union[str, Path]] = None) -> CachedSnapshot:
+        digest = content_digest(raw)
+        cached = self.snapshots.get(digest)
+        if cached is not None:
+            return cached
+        return self.add_payload(parse_snapshot_bytes(raw, path), digest, str(path) if path else None)
+
+    def add_payload(self, data, digest: str, source: Optional[str] = None) -> CachedSnapshot:
+        entry = self.build_entry(data, digest, source)
+        self.snapshots.put(digest, entry)
+        return entry
+
+    def build_entry(self, data, digest: str, source: Optional[str] = None) -> CachedSnapshot:
+        teachers = data.get("teachers", [])
+        settings_map = data.get("teacherLoadSettings", {}) or {}
+        context = _context_key(data)
+        cells = _cells_by_teacher(data)
+
+        indices_by_name: Dict[str, List[int]] = {}
+        for teacher_idx, name in enumerate(teachers):
+            indices_by_name.setdefault(name, []).append(teacher_idx)
+
+        load_index: Dict[str, dict] = {}
+        sections: Dict[str, str] = {}
+        pending: Dict[str, Tuple[tuple, List[Tuple[int, int, List[str]]]]] = {}
+        for name, indices in indices_by_name.items():
+            teacher_cells = [cell for teacher_idx in indices for cell in cells.get(teacher_idx, ())]
+            key = (
+                context,
+                name,
+                tuple((line_idx, tuple(subjects)) for line_idx, _, subjects in teacher_cells),
+                json.dumps(settings_map.get(name, {}), sort_keys=True),
+            )
+            cached = self.teachers.get(key)
+            if cached is not None:
+                load_index[name], sections[name] = cached
+            else:
+                pending[name] = (key, teacher_cells)
+
+        if pending:
+            split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+            changed_cells = [cell for _, teacher_cells in pending.values() for cell in teacher_cells]
+            records = build_allocation_records(data, split_lookup, self.rules, changed_cells)
+            grouped = group_records_by_teacher(records)
+            for name, (key, _) in pending.items():
+                teacher_records = [rec for teacher_idx in indices_by_name[name] for rec in grouped.get(teacher_idx, ())]
+                load = compute_teacher_load(name, teacher_records, settings_map.get(name, {}))
+                load_index[name] = load
+                sections[name] = render_teacher_summary(load)
+                self.teachers.put(key, (load, sections[name]))
+
+        # Keep the teacher order of ``build_teacher_load_index``.
+        ordered = {name: load_index[name] for name in indices_by_name}
+        return CachedSnapshot(
+            digest=digest,
+            data=data,
+            load_index=ordered,
+            sections=sections,
+            reused_teachers=len(indices_by_name) - len(pending),
+            computed_teachers=len(pending),
+            source=source,
+        )
@@ -0,0 +1,380 @@
+"""Compare two Matrix snapshots and report how teacher loads changed between them.
+
+Only teachers whose inputs changed are recomputed. Every teacher's inputs (their
+allocation cells, the split entries they hold, their load settings and the period
+profile) are hashed, and computed loads are stored in a persistent JSON cache keyed
+by that hash, so unchanged teachers are never recomputed across runs. The cache keeps
+the most recently used ``--cache-size`` entries and drops the rest when it is saved.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+from collections import defaultdict
+
+from period_rules import DEFAULT_RULES, PeriodRuleEngine
+from verify_teacher_load import (
+    build_allocation_records,
+    build_split_lookup,
+    build_teacher_load_index,
+    load_snapshot,
+)
+
+DEFAULT_CACHE_PATH = ".teacher-load-cache.json"
+DEFAULT_CACHE_ENTRIES = 20000
+CACHE_VERSION = 1
+LOAD_FIELDS = (
+    "teaching_minutes",
+    "allowance_minutes",
+    "total_load_minutes",
+    "base_minutes",
+    "balance_minutes",
+)
+
+
+def parse_allocation_key(key):
+    line_idx_str, teacher_idx_str = key.split("-")
+    return int(line_idx_str), int(teacher_idx_str)
+
+
+def subject_list(subjects):
+    if subjects is None:
+        return []
+    return subjects if isinstance(subjects, list) else [subjects]
+
+
+def describe_key(data, key):
+    line_idx, teacher_idx = parse_allocation_key(key)
+    lines = data.get("lines", [])
+    teachers = data.get("teachers", [])
+    line_label = lines[line_idx] if line_idx < len(lines) else f"Line index {line_idx}"
+    teacher = teachers[teacher_idx] if teacher_idx < len(teachers) else f"Teacher {teacher_idx}"
+    return line_label, teacher
+
+
+def subject_placements(data):
+    placements = defaultdict(list)
+    for key, subjects in data.get("allocations", {}).items():
+        placement = describe_key(data, key)
+        for subject in subject_list(subjects):
+            placements[subject].append(placement)
+    return placements
+
+
+def diff_mapping(old, new):
+    added = sorted(key for key in new if key not in old)
+    removed = sorted(key for key in old if key not in new)
+    changed = sorted(key for key in new if key in old and old[key] != new[key])
+    return added, removed, changed
+
+
+def diff_snapshots(old, new):
+    old_allocations = old.get("allocations", {})
+    new_allocations = new.get("allocations", {})
+    added, removed, changed = diff_mapping(old_allocations, new_allocations)
+
+    cells = []
+    for key in sorted(set(added) | set(removed) | set(changed), key=parse_allocation_key):
+        cells.append(
+            {
+                "key": key,
+                "before": subject_list(old_allocations.get(key)),
+                "after": subject_list(new_allocations.get(key)),
+            }
+        )
+
+    old_placements = subject_placements(old)
+    new_placements = subject_placements(new)
+    moves = []
+    for subject in sorted(set(old_placements) | set(new_placements)):
+        before = sorted(old_placements.get(subject, []))
+        after = sorted(new_placements.get(subject, []))
+        if before != after:
+            moves.append({"subject": subject, "before": before, "after": after})
+
+    old_splits = old.get("subjectSplits", {})
+    new_splits = new.get("subjectSplits", {})
+    old_settings = old.get("teacherLoadSettings", {})
+    new_settings = new.get("teacherLoadSettings", {})
+
+    settings = []
+    for teacher in sorted(set(old_settings) | set(new_settings)):
+        before = old_settings.get(teacher, {})
+        after = new_settings.get(teacher, {})
+        for field in sorted(set(before) | set(after)):
+            if before.get(field) != after.get(field):
+                settings.append(
+                    {
+                        "teacher": teacher,
+                        "field": field,
+                        "before": before.get(field),
+                        "after": after.get(field),
+                    }
+                )
+
+    split_added, split_removed, split_changed = diff_mapping(old_splits, new_splits)
+    return {
+        "cells": cells,
+        "moves": moves,
+        "splits": {"added": split_added, "removed": split_removed, "changed": split_changed},
+        "settings": settings,
+        "lines_changed": old.get("lines", []) != new.get("lines", []),
+        "teachers_added": [t for t in new.get("teachers", []) if t not in old.get("teachers", [])],
+        "teachers_removed": [t for t in old.get("teachers", []) if t not in new.get("teachers", [])],
+    }
+
+
+def teacher_input_signatures(data, split_lookup, rules=None):
+    rules = rules or DEFAULT_RULES
+    teachers = data.get("teachers", [])
+    lines = data.get("lines", [])
+    load_settings_map = data.get("teacherLoadSettings", {})
+
+    cells_by_teacher = defaultdict(list)
+    for key, subjects in data.get("allocations", {}).items():
+        line_idx, teacher_idx = parse_allocation_key(key)
+        subjects = subject_list(subjects)
+        splits = [split_lookup[s].get("periods") for s in subjects if s in split_lookup]
+        cells_by_teacher[teachers[teacher_idx]].append([lines[line_idx], subjects, splits])
+
+    profile_digest = json.dumps(rules.profile, sort_keys=True, ensure_ascii=False)
+    signatures = {}
+    for teacher in teachers:
+        material = json.dumps(
+            [
+                CACHE_VERSION,
+                profile_digest,
+                teacher,
+                cells_by_teacher.get(teacher, []),
+                load_settings_map.get(teacher, {}),
+            ],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        signatures[teacher] = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    return signatures
+
+
+class LoadCache:
+    """Teacher load totals persisted on disk and keyed by input content hash.
+
+    Entries are kept in least-recently-used order; ``save`` writes at most
+    ``max_entries`` of them, dropping the ones unused for longest.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_CACHE_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.path = pathlib.Path(path) if path else None
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = False
+        if self.path and self.path.exists():
+            stored = json.loads(self.path.read_text(encoding="utf-8"))
+            if stored.get("version") == CACHE_VERSION:
+                self.entries = stored.get("entries", {})
+                self.dirty = len(self.entries) > max_entries
+
+    def get(self, digest):
+        load = self.entries.get(digest)
+        if load is not None and next(reversed(self.entries)) != digest:
+            # Move it to the recent end so it outlives entries this run did not use.
+            self.entries[digest] = self.entries.pop(digest)
+            self.dirty = True
+        return load
+
+    def put(self, digest, load):
+        self.entries.pop(digest, None)
+        self.entries[digest] = {field: load[field] for field in LOAD_FIELDS}
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        excess = len(self.entries) - self.max_entries
+        if excess > 0:
+            for digest in list(self.entries)[:excess]:
+                del self.entries[digest]
+        payload = {"version": CACHE_VERSION, "entries": self.entries}
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
+def compute_loads_incremental(data, cache, rules=None):
+    """Return per-teacher load totals, recomputing only teachers missing from ``cache``."""
+    split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+    signatures = teacher_input_signatures(data, split_lookup, rules)
+
+    loads = {}
+    stale = set()
+    for teacher, digest in signatures.items():
+        cached = cache.get(digest)
+        if cached is None:
+            stale.add(teacher)
+        else:
+            loads[teacher] = dict(cached)
+
+    if stale:
+        teachers = data.get("teachers", [])
+        stale_cells = []
+        for key, subjects in data.get("allocations", {}).items():
+            line_idx, teacher_idx = parse_allocation_key(key)
+            if teachers[teacher_idx] in stale:
+                stale_cells.append((line_idx, teacher_idx, subject_list(subjects)))
+        records = build_allocation_records(data, split_lookup, rules, stale_cells)
+        load_index = build_teacher_load_index(
+            records, teachers, data.get("teacherLoadSettings", {})
+        )
+        for teacher in stale:
+            cache.put(signatures[teacher], load_index[teacher])
+            loads[teacher] = dict(cache.get(signatures[teacher]))
+
+    return loads, stale
+
+
+def format_placements(placements):
+    if not placements:
+        return "—"
+    return "; ".join(f"{teacher} ({line})" for line, teacher in placements)
+
+
+def format_delta_report(diff, old_loads, new_loads, recomputed, old_name, new_name):
+    lines = [
+        "# Teacher load delta",
+        "",
+        f"From `{old_name}` to `{new_name}`",
+        "",
+        f"- Allocation cells changed: {len(diff['cells'])}",
+        f"- Subjects moved: {len(diff['moves'])}",
+        "- Splits added / removed / changed: {} / {} / {}".format(
+            len(diff["splits"]["added"]),
+            len(diff["splits"]["removed"]),
+            len(diff["splits"]["changed"]),
+        ),
+        f"- Load settings changed: {len(diff['settings'])}",
+        f"- Teachers recomputed: {len(recomputed)}",
+        "",
+    ]
+    if diff["lines_changed"]:
+        lines.extend(["Line list changed between snapshots.", ""])
+    if diff["teachers_added"]:
+        lines.extend([f"Teachers added: {', '.join(diff['teachers_added'])}", ""])
+    if diff["teachers_removed"]:
+        lines.extend([f"Teachers removed: {', '.join(diff['teachers_removed'])}", ""])
+
+    lines.extend(
+        [
+            "## Balance changes",
+            "",
+            "| Teacher | Load Before | Load After | Balance Before | Balance After | Change |",
+            "| - | - | - | - | - | - |",
+        ]
+    )
+    changed_teachers = 0
+    for teacher in list(new_loads) + [t for t in old_loads if t not in new_loads]:
+        before = old_loads.get(teacher)
+        after = new_loads.get(teacher)
+        if before and after and before == after:
+            continue
+        changed_teachers += 1
+        load_before = f"{before['total_load_minutes']:.2f}" if before else "—"
+        load_after = f"{after['total_load_minutes']:.2f}" if after else "—"
+        balance_before = f"{before['balance_minutes']:.2f}" if before else "—"
+        balance_after = f"{after['balance_minutes']:.2f}" if after else "—"
+        if before and after:
+            delta = f"{after['balance_minutes'] - before['balance_minutes']:+.2f}"
+        else:
+            delta = "—"
+        lines.append(
+            f"| {teacher} | {load_before} | {load_after} | "
+            f"{balance_before} | {balance_after} | {delta} |"
+        )
+    if not changed_teachers:
+        lines.append("| — | — | — | — | — | — |")
+
+    lines.extend(["", "## Subject moves", "", "| Subject | Before | After |", "| - | - | - |"])
+    for move in diff["moves"]:
+        subject_display = move["subject"].replace("▸", "->")
+        lines.append(
+            f"| {subject_display} | {format_placements(move['before'])} | "
+            f"{format_placements(move['after'])} |"
+        )
+    if not diff["moves"]:
+        lines.append("| — | — | — |")
+
+    if diff["settings"]:
+        lines.extend(["", "## Load settings", "", "| Teacher | Setting | Before | After |"])
+        lines.append("| - | - | - | - |")
+        for change in diff["settings"]:
+            lines.append(
+                f"| {change['teacher']} | {change['field']} | "
+                f"{change['before']} | {change['after']} |"
+            )
+
+    splits = diff["splits"]
+    if any(splits.values()):
+        lines.extend(["", "## Splits", ""])
+        for label in ("added", "removed", "changed"):
+            if splits[label]:
+                lines.append(f"- {label.capitalize()}: {', '.join(splits[label])}")
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare two allocation snapshots and report teacher load changes."
+    )
+    parser.add_argument("old", help="Path to the earlier allocation JSON file.")
+    parser.add_argument("new", help="Path to the later allocation JSON file.")
+    parser.add_argument(
+        "--output",
+        default="teacher_load_delta.md",
+        help="Output file for the delta report (markdown).",
+    )
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE_PATH,
+        help="Persistent teacher load cache. Pass an empty string to disable.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_ENTRIES,
+        help=f"Most recently used teacher loads to keep in the cache (default {DEFAULT_CACHE_ENTRIES}).",
+    )
+    parser.add_argument(
+        "--period-profile",
+        help="Optional JSON profile overriding the subject-period rules for a school.",
+    )
+    args = parser.parse_args()
+    if args.cache_size < 1:
+        parser.error("--cache-size must be at least 1")
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    with load_snapshot(args.old) as old, load_snapshot(args.new) as new:
+        cache = LoadCache(args.cache or None, args.cache_size)
+        old_loads, _ = compute_loads_incremental(old, cache, rules)
+        new_loads, recomputed = compute_loads_incremental(new, cache, rules)
+        cache.save()
+
+        diff = diff_snapshots(old, new)
+    report = format_delta_report(
+        diff,
+        old_loads,
+        new_loads,
+        recomputed,
+        pathlib.Path(args.old).name,
+        pathlib.Path(args.new).name,
+    )
+    pathlib.Path(args.output).write_text(report, encoding="utf-8")
+    print(f"Recomputed {len(recomputed)} of {len(new_loads)} teacher load(s)")
+    print(f"Wrote delta report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Per-stage wall time, item counts and peak memory for the command-line tools.
+
+A ``StageMetrics`` instance is threaded through the converter and the load checker.
+Stages can be timed as blocks (``with metrics.stage("render")``) or accumulated across
+a stream (``metrics.timed_iter("read", rows)``). Time is exclusive, so a stage that
+pulls rows from another timed stream is not charged for the reading. Peak memory is
+the highest ``tracemalloc`` reading while the stage ran; tracing slows the run, so
+compare timings only against other metrics runs.
+
+``NULL_METRICS`` has the same interface and does nothing, so instrumented code costs
+next to nothing when metrics are not requested.
+"""
+
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+METRICS_VERSION = 1
+
+
+class StageRecord:
+    __slots__ = ("name", "seconds", "calls", "items", "peak_bytes")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.items = 0
+        self.peak_bytes = 0
+
+    def count(self, items: int) -> None:
+        self.items += items
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "seconds": round(self.seconds, 6),
+            "calls": self.calls,
+            "items": self.items,
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class StageMetrics:
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageRecord] = {}
+        self._stack: List[List[float]] = []
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._peak_bytes = 0
+        self._owns_tracing = False
+
+    def start(self) -> "StageMetrics":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        self._finished = time.perf_counter()
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[1])
+            if self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+    def record(self, name: str) -> StageRecord:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageRecord(name)
+        return stage
+
+    def _traced_peak(self) -> int:
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1]
+        return 0
+
+    def _enter(self) -> float:
+        if self._stack:
+            parent = self._stack[-1]
+            parent[1] = max(parent[1], self._traced_peak())
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._stack.append([0.0, 0])
+        return time.perf_counter()
+
+    def _exit(self, name: str, started: float, items: int) -> StageRecord:
+        elapsed = time.perf_counter() - started
+        child_seconds, peak = self._stack.pop()
+        peak = max(peak, self._traced_peak())
+        if self._stack:
+            parent = self._stack[-1]
+            parent[0] += elapsed
+            parent[1] = max(parent[1], peak)
+        stage = self.record(name)
+        stage.seconds += elapsed - child_seconds
+        stage.calls += 1
+        stage.items += items
+        stage.peak_bytes = max(stage.peak_bytes, int(peak))
+        self._peak_bytes = max(self._peak_bytes, int(peak))
+        return stage
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[StageRecord]:
+        stage = self.record(name)
+        started = self._enter()
+        try:
+            yield stage
+        finally:
+            self._exit(name, started, items)
+
+    def timed_iter(
+        self,
+        name: str,
+        iterable: Iterable[T],
+        stage_for: Optional[Callable[[T], str]] = None,
+    ) -> Iterator[T]:
+        """Yield from ``iterable``, charging the time spent producing each item to a stage.
+
+        ``stage_for`` picks the stage per item; otherwise everything goes to ``name``.
+        """
+        iterator = iter(iterable)
+        while True:
+            started = self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._exit(name, started, 0)
+                return
+            self._exit(stage_for(item) if stage_for else name, started, 1)
+            yield item
+
+    def as_dict(self, **context) -> Dict[str, object]:
+        finished = self._finished if self._finished is not None else time.perf_counter()
+        total = finished - self._started if self._started is not None else 0.0
+        return {
+            "version": METRICS_VERSION,
+            **context,
+            "total_seconds": round(total, 6),
+            "peak_bytes": max(self._peak_bytes, self._traced_peak()),
+            "stages": [stage.as_dict() for stage in self.stages.values()],
+        }
+
+    def write_json(self, path: Union[str, Path], **context) -> Path:
+        output_path = Path(path)
+        output_path.write_text(json.dumps(self.as_dict(**context), indent=2) + "\n", encoding="utf-8")
+        return output_path
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def count(self, items: int) -> None:
+        pass
+
+
+class NullMetrics:
+    """Drop-in ``StageMetrics`` that records nothing."""
+
+    _stage = _NullStage()
+
+    def start(self) -> "NullMetrics":
+        return self
+
+    def stop(self) -> None:
+        pass
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[_NullStage]:
+        yield self._stage
+
+    def timed_iter(self, name: str, iterable: Iterable[T], stage_for=None) -> Iterable[T]:
+        return iterable
+
+
+NULL_METRICS = NullMetrics()
+
+
+@contextmanager
+def profile_to(path: Optional[Union[str, Path]]) -> Iterator[Optional[cProfile.Profile]]:
+    """Run the block under cProfile and dump the stats to ``path``; no-op when ``path`` is None."""
+    if not path:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(path))
@@ -0,0 +1,278 @@
+"""Generate synthetic Matrix schools for benchmarking and load testing.
+
+A synthetic school has the same shape as a real faculty export: teachers with FTE and
+allowance settings, ordinary lines plus the six Wednesday lines, Year 8 ``S1``/``S2``
+pairs sharing a cell, ``_WED`` classes and classes split between two teachers on the
+same line. It can be written as a Matrix CSV (the layout ``convert_csv_to_json``
+reads) and as a JSON snapshot (the layout the web app saves).
+
+The CSV format cannot carry everything the snapshot does: it has no Wednesday line
+columns, so Wednesday classes stay in the snapshot only, and split parts are written
+with their base code because split codes contain the ``/`` the converter splits on.
+"""
+
+import argparse
+import csv
+import json
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from period_rules import YEAR_PERIOD_ALLOCATION
+
+WEDNESDAY_LINE_LABELS = ["WedA1", "WedA5", "WedA6", "WedB1", "WedB5", "WedB6"]
+YEARS = [12, 11, 10, 9, 8, 7]
+SUBJECT_STEMS = [
+    "ENG", "MAT", "SCI", "HIS", "GEO", "ART", "PDH", "MUS", "BUS", "LAN",
+    "COV", "DAT", "HOV", "PIV", "AGRE", "FOTE", "METE", "WOTE", "TEXE", "ENSE",
+]
+YEAR8_ELECTIVE_STEMS = ["AGRE", "FOTE", "METE", "WOTE", "TEXE", "JEWE", "MUME", "ANIE"]
+FIRST_NAMES = [
+    "Alex", "Sam", "Jordan", "Taylor", "Casey", "Morgan", "Riley", "Jamie", "Avery", "Quinn",
+    "Harper", "Rowan", "Emerson", "Reese", "Parker", "Hayden", "Drew", "Kai", "Logan", "Skyler",
+]
+LAST_NAMES = [
+    "Nguyen", "Smith", "Brown", "Wilson", "Taylor", "Martin", "Clarke", "Walker", "Harris", "Lee",
+    "King", "Wright", "Scott", "Young", "Green", "Baker", "Hill", "Adams", "Mitchell", "Campbell",
+]
+FTE_WEIGHTS = [("1.0", 70), ("0.8", 15), ("0.6", 8), ("0.4", 5), ("0.2", 2)]
+
+
+@dataclass
+class SchoolSpec:
+    teachers: int
+    lines: int
+    fill: float = 0.65
+    semester_pair_share: float = 0.12
+    split_share: float = 0.05
+    wednesday_share: float = 0.3
+    seed: int = 0
+
+
+PRESETS: Dict[str, SchoolSpec] = {
+    "sample": SchoolSpec(teachers=10, lines=7),
+    "small": SchoolSpec(teachers=60, lines=12),
+    "medium": SchoolSpec(teachers=400, lines=40),
+    "large": SchoolSpec(teachers=2000, lines=200),
+    "xlarge": SchoolSpec(teachers=5000, lines=400, fill=0.5),
+}
+
+
+@dataclass
+class SyntheticSchool:
+    teachers: List[str]
+    lines: List[str]
+    regular_lines: int
+    allocations: Dict[str, List[str]] = field(default_factory=dict)
+    line_mapping: Dict[str, int] = field(default_factory=dict)
+    year_mapping: Dict[str, str] = field(default_factory=dict)
+    splits: Dict[str, List[Dict[str, object]]] = field(default_factory=dict)
+    csv_codes: Dict[str, List[str]] = field(default_factory=dict)
+    load_settings: Dict[str, Dict[str, object]] = field(default_factory=dict)
+
+    @property
+    def subjects(self) -> List[str]:
+        return sorted(self.line_mapping)
+
+
+def teacher_names(count: int, rng: random.Random) -> List[str]:
+    names = []
+    seen = set()
+    for index in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name in seen:
+            name = f"{name} {index + 1}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+class CodeFactory:
+    """Hand out unique class codes per year and subject stem."""
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {}
+
+    def next(self, stem: str) -> str:
+        number = self.counters.get(stem, 0) + 1
+        self.counters[stem] = number
+        return f"{stem}{number}"
+
+
+def year_periods(year: int) -> int:
+    return YEAR_PERIOD_ALLOCATION.get(year, 5)
+
+
+def generate_school(spec: SchoolSpec) -> SyntheticSchool:
+    rng = random.Random(spec.seed)
+    school = SyntheticSchool(
+        teachers=teacher_names(spec.teachers, rng),
+        lines=[f"Line {index + 1}" for index in range(spec.lines)] + WEDNESDAY_LINE_LABELS,
+        regular_lines=spec.lines,
+    )
+    codes = CodeFactory()
+
+    def place(line_idx: int, teacher_idx: int, code: str, year: int, csv_code: Optional[str] = None) -> None:
+        key = f"{line_idx}-{teacher_idx}"
+        school.allocations.setdefault(key, []).append(code)
+        school.csv_codes.setdefault(key, []).append(csv_code or code)
+        school.line_mapping.setdefault(code, line_idx)
+        school.year_mapping.setdefault(code, f"Year {year}")
+
+    for line_idx in range(spec.lines):
+        for teacher_idx in range(spec.teachers):
+            if f"{line_idx}-{teacher_idx}" in school.allocations or rng.random() >= spec.fill:
+                continue
+            roll = rng.random()
+            if roll < spec.semester_pair_share:
+                first, second = rng.sample(YEAR8_ELECTIVE_STEMS, 2)
+                place(line_idx, teacher_idx, f"S1 {codes.next(f'8{first}')}", 8)
+                place(line_idx, teacher_idx, f"S2 {codes.next(f'8{second}')}", 8)
+                continue
+
+            partner = rng.randrange(spec.teachers)
+            partner_key = f"{line_idx}-{partner}"
+            if roll < spec.semester_pair_share + spec.split_share and partner != teacher_idx and partner_key not in school.allocations:
+                year = rng.choice([12, 11, 10, 9])
+                base = codes.next(f"{year}{rng.choice(SUBJECT_STEMS)}")
+                total = year_periods(year)
+                first_periods = rng.randint(1, total - 1)
+                entries = []
+                for index, (owner, periods) in enumerate([(teacher_idx, first_periods), (partner, total - first_periods)]):
+                    code = f"{base}▸{periods}P(SPLIT{index + 1}/2)"
+                    entries.append({"code": code, "periods": periods, "index": index, "totalSplits": 2})
+                    place(line_idx, owner, code, year, csv_code=base)
+                school.splits[base] = entries
+                continue
+
+            year = rng.choice(YEARS)
+            base = codes.next(f"{year}{rng.choice(SUBJECT_STEMS)}")
+            place(line_idx, teacher_idx, base, year)
+
+    for offset, label in enumerate(WEDNESDAY_LINE_LABELS):
+        line_idx = spec.lines + offset
+        for teacher_idx in range(spec.teachers):
+            if rng.random() >= spec.wednesday_share:
+                continue
+            year = rng.choice([11, 7])
+            base = codes.next(f"{year}{rng.choice(SUBJECT_STEMS)}")
+            place(line_idx, teacher_idx, f"{base}_{label.upper()}_R{offset + 1:02d}", year)
+
+    fte_values = [value for value, _ in FTE_WEIGHTS]
+    fte_weights = [weight for _, weight in FTE_WEIGHTS]
+    for name in school.teachers:
+        school.load_settings[name] = {
+            "fte": rng.choices(fte_values, fte_weights)[0],
+            "periodAllowance": rng.choice([0, 0, 2, 4, 6]),
+            "assemblyFullCount": 1,
+            "assemblyShortCount": rng.choice([1, 3, 7]),
+            "additionalMinutes": 0,
+        }
+    return school
+
+
+def iter_school_csv_rows(school: SyntheticSchool) -> Iterator[List[str]]:
+    """Yield the school as Matrix CSV rows: year grids, then the Teacher Matrix."""
+    line_labels = school.lines[: school.regular_lines]
+    width = 6 + len(line_labels)
+
+    def padded(cells: List[str]) -> List[str]:
+        return cells + [""] * (width - len(cells))
+
+    yield padded(["Timetable Matrix Template"])
+    # Dicts keep first-seen order and drop the repeated base code of split classes.
+    cells_by_year: Dict[int, List[Dict[str, None]]] = {year: [{} for _ in line_labels] for year in YEARS}
+    for key, codes in school.csv_codes.items():
+        line_idx = int(key.split("-")[0])
+        if line_idx >= school.regular_lines:
+            continue
+        year = int(school.year_mapping[school.allocations[key][0]].split()[-1])
+        cells_by_year[year][line_idx]["/".join(codes)] = None
+
+    for year in YEARS:
+        per_line = [list(cells) for cells in cells_by_year[year]]
+        yield padded(["", "", "", "", "", f"Year {year}"])
+        yield padded(["", "", "", "", "", ""] + line_labels)
+        for row_number in range(max((len(cells) for cells in per_line), default=0) or 1):
+            yield ["", "", "", "", "", f"Row {row_number + 1}"] + [
+                cells[row_number] if row_number < len(cells) else "" for cells in per_line
+            ]
+        yield padded([])
+        yield padded([])
+
+    yield padded(["Teacher Matrix (Lines aligned)"])
+    yield ["Teacher", "Loads", "Allowance", "Plus/minus", "Current", ""] + line_labels
+    for teacher_idx, name in enumerate(school.teachers):
+        allowance = school.load_settings[name]["periodAllowance"]
+        cells = ["/".join(school.csv_codes.get(f"{line_idx}-{teacher_idx}", [])) for line_idx in range(school.regular_lines)]
+        filled = sum(1 for cell in cells if cell)
+        yield [name, str(filled), str(allowance), "0", str(filled + allowance), ""] + cells
+
+
+def school_payload(school: SyntheticSchool, include_csv_data: bool = True) -> Dict[str, object]:
+    return {
+        "allocations": {key: list(codes) for key, codes in school.allocations.items()},
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "subjects": school.subjects,
+        "teachers": list(school.teachers),
+        "lines": list(school.lines),
+        "csvData": list(iter_school_csv_rows(school)) if include_csv_data else [],
+        "subjectLineMapping": dict(school.line_mapping),
+        "subjectSplits": school.splits,
+        "subjectYearMapping": dict(school.year_mapping),
+        "teacherLoadSettings": school.load_settings,
+        "subjectRoomAssignments": {},
+        "allocationRoomOverrides": {},
+    }
+
+
+def write_school(school: SyntheticSchool, output_dir: Path, name: str, include_csv_data: bool = True) -> Tuple[Path, Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    csv_path = output_dir / f"{name}.csv"
+    json_path = output_dir / f"{name}.json"
+    with csv_path.open("w", newline="", encoding="utf-8") as handle:
+        csv.writer(handle).writerows(iter_school_csv_rows(school))
+    with json_path.open("w", encoding="utf-8") as handle:
+        json.dump(school_payload(school, include_csv_data), handle, ensure_ascii=False, separators=(",", ":"))
+        handle.write("\n")
+    return csv_path, json_path
+
+
+def resolve_spec(preset: Optional[str], teachers: Optional[int], lines: Optional[int], seed: int) -> SchoolSpec:
+    base = PRESETS[preset or "small"]
+    return SchoolSpec(
+        teachers=teachers or base.teachers,
+        lines=lines or base.lines,
+        fill=base.fill,
+        semester_pair_share=base.semester_pair_share,
+        split_share=base.split_share,
+        wednesday_share=base.wednesday_share,
+        seed=seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Matrix CSV and JSON snapshot.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Size preset.")
+    parser.add_argument("--teachers", type=int, help="Override the preset's teacher count.")
+    parser.add_argument("--lines", type=int, help="Override the preset's regular line count.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same school.")
+    parser.add_argument("--output-dir", type=Path, default=Path("synthetic"), help="Directory for the files.")
+    parser.add_argument("--name", help="Base file name (defaults to the preset name).")
+    parser.add_argument("--omit-csv-data", action="store_true", help="Leave csvData empty in the snapshot.")
+    args = parser.parse_args()
+
+    spec = resolve_spec(args.preset, args.teachers, args.lines, args.seed)
+    school = generate_school(spec)
+    csv_path, json_path = write_school(school, args.output_dir, args.name or args.preset, not args.omit_csv_data)
+    print(
+        f"Generated {len(school.teachers)} teachers, {len(school.lines)} lines, "
+        f"{len(school.line_mapping)} subjects, {len(school.allocations)} allocated cells"
+    )
+    print(f"Wrote {csv_path} and {json_path}")
+
+
+if __name__ == "__main__":
+    main()
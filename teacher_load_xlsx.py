@@ -0,0 +1,138 @@
+"""Export teacher load summaries and allocation records to an .xlsx workbook.
+
+The workbook has a Summary sheet with one row per teacher, followed by one sheet per
+teacher listing their allocation records and allowance breakdown. Rows are streamed
+into the workbook through ``xlsx_writer`` rather than rendered to text first.
+"""
+
+from xlsx_writer import Cell, Row, WorkbookWriter
+
+HEADER_COLOR = "FF1F4E78"
+BORDER_COLOR = "FF4F81BD"
+TWO_DECIMALS = 2
+
+SUMMARY_HEADERS = [
+    "Teacher",
+    "FTE",
+    "Teaching Minutes",
+    "Allowance Minutes",
+    "Total Load",
+    "Capacity (base minutes)",
+    "Balance (capacity - load)",
+    "Sheet",
+]
+RECORD_HEADERS = ["Line", "Subject", "Periods", "Line Minutes", "Load (min)"]
+
+
+def register_report_styles(styles):
+    return {
+        "header": styles.add(
+            font={"color": "FFFFFFFF", "bold": True},
+            fill=HEADER_COLOR,
+            border=BORDER_COLOR,
+            horizontal="center",
+            vertical="center",
+            wrap=True,
+        ),
+        "text": styles.add(border=BORDER_COLOR, horizontal="left", vertical="center"),
+        "number": styles.add(border=BORDER_COLOR, number_format=TWO_DECIMALS),
+        "label": styles.add(font={"bold": True}),
+        "over": styles.add(
+            font={"color": "FF9C0006", "bold": True},
+            border=BORDER_COLOR,
+            number_format=TWO_DECIMALS,
+        ),
+    }
+
+
+def teacher_sheet_rows(load, styles):
+    yield Row([Cell(header, styles["header"]) for header in RECORD_HEADERS], height=18)
+    for rec in load["records"]:
+        yield [
+            Cell(rec.line_label, styles["text"]),
+            Cell(rec.subject, styles["text"]),
+            Cell(rec.period_value, styles["number"]),
+            Cell(rec.line_minutes, styles["number"]),
+            Cell(rec.minutes, styles["number"]),
+        ]
+
+    yield []
+    breakdown = [
+        ("Teaching minutes", "teaching_minutes"),
+        ("Period allowance", "period_allowance_minutes"),
+        ("Full assemblies", "assembly_full_minutes"),
+        ("TLC / short assemblies", "assembly_short_minutes"),
+        ("Additional minutes", "additional_minutes"),
+        ("Total allowance minutes", "allowance_minutes"),
+        ("Total load", "total_load_minutes"),
+        ("Capacity (base minutes)", "base_minutes"),
+        ("Balance (capacity - load)", "balance_minutes"),
+    ]
+    for label, field in breakdown:
+        style = styles["over"] if field == "balance_minutes" and load[field] < 0 else styles["number"]
+        yield [Cell(label, styles["label"]), Cell(load[field], style)]
+
+
+def summary_sheet_rows(summary_rows, styles):
+    yield Row([Cell(header, styles["header"]) for header in SUMMARY_HEADERS], height=18)
+    for load, fte, sheet_name in summary_rows:
+        balance_style = styles["over"] if load["balance_minutes"] < 0 else styles["number"]
+        yield [
+            Cell(load["teacher"], styles["text"]),
+            Cell(fte, styles["text"]),
+            Cell(load["teaching_minutes"], styles["number"]),
+            Cell(load["allowance_minutes"], styles["number"]),
+            Cell(load["total_load_minutes"], styles["number"]),
+            Cell(load["base_minutes"], styles["number"]),
+            Cell(load["balance_minutes"], balance_style),
+            Cell(sheet_name, styles["text"]),
+        ]
+
+
+class TeacherLoadWorkbook:
+    """Workbook that takes teacher loads one at a time; use it in a ``with`` block.
+
+    ``add_load`` writes the teacher's sheet straight away and keeps only their totals.
+    The Summary sheet is written from those totals when the block exits, then moved to
+    the front.
+    """
+
+    def __init__(self, path, load_settings_map=None):
+        self.path = path
+        self.load_settings_map = load_settings_map or {}
+        self.summary_rows = []
+        self.book = WorkbookWriter(path, creator="Teacher Load Verification")
+        self.styles = register_report_styles(self.book.styles)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.book.add_sheet(
+                "Summary",
+                summary_sheet_rows(self.summary_rows, self.styles),
+                column_widths=[30, 8, 18, 18, 14, 22, 24, 30],
+                freeze_header=True,
+            )
+            self.book.move_sheet_to_front(len(self.book.sheet_names) - 1)
+        self.book.__exit__(exc_type, exc, traceback)
+
+    def add_load(self, load):
+        sheet_name = self.book.add_sheet(
+            load["teacher"],
+            teacher_sheet_rows(load, self.styles),
+            column_widths=[28, 28, 12, 14, 14],
+            freeze_header=True,
+        )
+        fte = str(self.load_settings_map.get(load["teacher"], {}).get("fte", "1.0"))
+        totals = {key: value for key, value in load.items() if key != "records"}
+        self.summary_rows.append((totals, fte, sheet_name))
+
+
+def write_teacher_load_workbook(path, loads, load_settings_map=None):
+    """Write ``loads`` (an iterable of teacher load dicts) to ``path`` and return it."""
+    with TeacherLoadWorkbook(path, load_settings_map) as workbook:
+        for load in loads:
+            workbook.add_load(load)
+    return path
@@ -0,0 +1,33 @@
+"""Tests for teacher, line, room and key clash detection; run with ``python -m pytest``."""
+
+from clash_detector import detect_clashes
+
+
+def snapshot(allocations, **extra):
+    payload = {
+        "teachers": ["Steve Cowell", "Louis Orr"],
+        "lines": ["Line 1", "Line 2"],
+        "allocations": allocations,
+        "subjectLineMapping": {"12ENG1": 0, "11MAT1": 0, "S1 10HIS1": 1, "S2 10GEO1": 1},
+    }
+    payload.update(extra)
+    return payload
+
+
+def test_string_and_list_cells_without_clashes():
+    report = detect_clashes(snapshot({"0-0": "12ENG1", "0-1": ["11MAT1"], "1-0": ["S1 10HIS1", "S2 10GEO1"]}))
+    assert not report
+    assert report.counts()["teacher"] == 0
+
+
+def test_teacher_line_and_key_clashes():
+    report = detect_clashes(snapshot({"0-0": ["12ENG1", "11MAT1"], "1-1": "12ENG1", "bad": "11MAT1"}))
+    assert [clash.cells for clash in report.of_kind("teacher")] == [["0-0"]]
+    assert [clash.subjects for clash in report.of_kind("line")] == [["12ENG1"]]
+    assert [clash.cells for clash in report.of_kind("key")] == [["bad"]]
+
+
+def test_room_shared_by_two_classes():
+    rooms = {"12ENG1": [{"room": "B12"}], "11MAT1": [{"room": " b12 "}]}
+    report = detect_clashes(snapshot({"0-0": "12ENG1", "0-1": "11MAT1"}, subjectRoomAssignments=rooms))
+    assert [clash.cells for clash in report.of_kind("room")] == [["0-0", "0-1"]]
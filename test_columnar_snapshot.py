@@ -0,0 +1,61 @@
+"""Round-trip tests for the ``.mxc`` columnar snapshot format; run with ``python -m pytest``."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from columnar_snapshot import ColumnarSnapshot, write_columnar_snapshot
+from verify_teacher_load import iter_allocation_cells, load_snapshot
+
+SNAPSHOTS = sorted(Path(__file__).parent.glob("faculty-allocations-*.json"))
+
+
+def write_and_read(payload, path):
+    write_columnar_snapshot(payload, path)
+    with ColumnarSnapshot(path) as snapshot:
+        return snapshot.to_payload()
+
+
+@pytest.mark.parametrize("source", SNAPSHOTS, ids=lambda path: path.name)
+def test_bundled_snapshots_round_trip(tmp_path, source):
+    payload = json.loads(source.read_text(encoding="utf-8"))
+    restored = write_and_read(payload, tmp_path / "snapshot.mxc")
+    assert restored == payload
+    assert list(restored) == list(payload)
+
+
+def test_split_entries_and_irregular_values_are_kept(tmp_path):
+    payload = {
+        "allocations": {"0-0": "12ENG1", "1-0": ["12MAT1"], "2-1": [], "note": "moved", "3-1": ["A", "B"]},
+        "teachers": ["Steve Cowell", "Louis Orr"],
+        "lines": ["Line 1", "Line 2", "Line 3", "Line 4"],
+        "subjectSplits": {
+            "12MAT1": [
+                {"code": "12MAT1▸1", "periods": 3, "index": 0, "totalSplits": 2},
+                {"code": "12MAT1▸2", "periods": 4, "index": 1, "totalSplits": 2, "room": "B12"},
+                {"code": "12MAT1▸3", "periods": 1},
+            ],
+            "12ENG1": {"legacy": True},
+        },
+        "teacherLoadSettings": {"Louis Orr": {"fte": "0.8"}},
+        "subjectRoomAssignments": {"12ENG1": ["B12"]},
+    }
+    assert write_and_read(payload, tmp_path / "snapshot.mxc") == payload
+
+
+def test_allocation_cells_match_json(tmp_path):
+    source = SNAPSHOTS[-1]
+    payload = json.loads(source.read_text(encoding="utf-8"))
+    path = tmp_path / "snapshot.mxc"
+    write_columnar_snapshot(payload, path)
+    with load_snapshot(path) as snapshot:
+        assert list(iter_allocation_cells(snapshot)) == list(iter_allocation_cells(payload))
+
+
+def test_load_snapshot_closes_the_map(tmp_path):
+    path = tmp_path / "snapshot.mxc"
+    write_columnar_snapshot({"teachers": ["T"], "lines": ["Line 1"], "allocations": {"0-0": "X"}}, path)
+    with load_snapshot(path) as snapshot:
+        assert snapshot["allocations"] == {"0-0": "X"}
+    assert snapshot._map.closed
@@ -0,0 +1,35 @@
+"""Tests for choosing the matrix layout when converting; run with ``python -m pytest``."""
+
+from pathlib import Path
+
+import pytest
+
+from convert_csv_to_json import convert_matrix_file, main
+
+ROOT = Path(__file__).parent
+WORKBOOKS = sorted(ROOT.glob("TAS matrix*.xlsx"))
+PERIOD_ROWS = ",Line 1,Line 2\nRow 1,12ENG1,11MAT1\n"
+
+
+def test_csv_without_teacher_matrix_is_rejected(tmp_path):
+    path = tmp_path / "lines.csv"
+    path.write_text(PERIOD_ROWS, encoding="utf-8")
+    with pytest.raises(ValueError, match="Could not locate the Teacher Matrix section"):
+        convert_matrix_file(path)
+    with pytest.raises(SystemExit, match="Teacher Matrix"):
+        main([str(path), "-o", str(tmp_path / "out.json")])
+
+
+def test_csv_period_matrix_layout_is_opt_in(tmp_path):
+    path = tmp_path / "lines.csv"
+    path.write_text(PERIOD_ROWS, encoding="utf-8")
+    payload = convert_matrix_file(path, layout="period-matrix")
+    assert payload["lines"] == ["Line 1", "Line 2"]
+    assert payload["subjectLineMapping"] == {"12ENG1": 0, "11MAT1": 1}
+    assert payload["teachers"] == [] and payload["allocations"] == {}
+
+
+@pytest.mark.parametrize("path", WORKBOOKS, ids=lambda path: path.name)
+def test_period_matrix_workbooks_convert(path):
+    payload = convert_matrix_file(path, include_csv_data=False)
+    assert payload["lines"] and payload["subjects"]
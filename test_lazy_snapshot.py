@@ -0,0 +1,52 @@
+"""Regression tests for the lazy snapshot scanner; run with ``python -m pytest``."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from lazy_snapshot import LazySnapshot
+
+SNAPSHOTS = sorted(Path(__file__).parent.glob("faculty-allocations-*.json"))
+
+
+def assert_matches_json(text: str) -> LazySnapshot:
+    snapshot = LazySnapshot(text)
+    expected = json.loads(text)
+    assert list(snapshot) == list(expected)
+    assert snapshot.to_payload() == expected
+    return snapshot
+
+
+def test_unknown_key_after_deferred_list_is_kept():
+    snapshot = assert_matches_json('{"csvData": [["a"]], "extra" : ["x"], "teachers": []}')
+    assert snapshot["extra"] == ["x"]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"csvData": [["a"]],\n  "extra"\n  :\t"x", "teachers": []}',
+        '{"subjects": ["A"], "extra": {"k": 1}, "lines": ["Line 1"]}',
+        '{"subjectLineMapping": {"A": 0}, "extra": ["y"], "teachers": []}',
+        '{"csvData": [["a,", ":"], ["b"]], "extra": [1], "teachers": []}',
+        '{"csvData": [["RED:12 ENG1", "x :y"]], "teachers": ["T"]}',
+        '{"csvData": [["}"]], "subjectYearMapping": {"A": "}"}, "lines": []}',
+        '{"subjects": ["a\\"b"], "extra": [], "teachers": []}',
+        '{"teachers": [], "extra": ["last"]}',
+    ],
+)
+def test_scanner_matches_json_loads(text):
+    assert_matches_json(text)
+
+
+def test_csv_data_is_deferred():
+    snapshot = LazySnapshot('{"csvData": [["a", "b"], ["c"]], "teachers": ["T"]}')
+    assert not snapshot.is_decoded("csvData")
+    assert snapshot.is_decoded("teachers")
+    assert snapshot["csvData"] == [["a", "b"], ["c"]]
+
+
+@pytest.mark.parametrize("path", SNAPSHOTS, ids=lambda path: path.name)
+def test_real_snapshots_match_json_loads(path):
+    assert_matches_json(path.read_text(encoding="utf-8"))
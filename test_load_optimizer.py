@@ -0,0 +1,47 @@
+"""Tests for the load-balancing optimizer; run with ``python -m pytest``."""
+
+from clash_detector import detect_clashes
+from load_optimizer import build_problem, format_result, optimize
+
+
+def snapshot(teachers):
+    return {
+        "teachers": teachers,
+        "lines": ["Line 1", "Line 2"],
+        "subjects": ["12ENG1", "11MAT1", "10HIS1"],
+        "subjectLineMapping": {"12ENG1": 0, "11MAT1": 1, "10HIS1": 0},
+        "allocations": {},
+        "teacherLoadSettings": {},
+    }
+
+
+def run(data):
+    return optimize(data, restarts=1, workers=1, time_budget=1.0, iterations=200)
+
+
+def test_no_teachers_reports_every_class_unplaced():
+    data = snapshot([])
+    assert build_problem(data).unplaced == ["12ENG1", "11MAT1", "10HIS1"]
+
+    result = run(data)
+    assert not result.valid
+    assert result.unplaced == ["12ENG1", "11MAT1", "10HIS1"]
+    assert result.payload["allocations"] == {}
+    assert "Unplaced (no teachers): 12ENG1, 11MAT1, 10HIS1" in format_result(result)
+
+
+def test_single_subject_cells_are_strings():
+    result = run(snapshot(["Steve Cowell", "Louis Orr"]))
+    allocations = result.payload["allocations"]
+    assert result.valid
+    assert all(isinstance(cell, str) for cell in allocations.values())
+    assert sorted(allocations.values()) == ["10HIS1", "11MAT1", "12ENG1"]
+    assert not detect_clashes(result.payload)
+
+
+def test_shared_cells_stay_lists():
+    data = snapshot(["Steve Cowell"])
+    data["subjectLineMapping"]["10HIS1"] = 1
+    allocations = run(data).payload["allocations"]
+    assert allocations["0-0"] == "12ENG1"
+    assert sorted(allocations["1-0"]) == ["10HIS1", "11MAT1"]
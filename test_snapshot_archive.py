@@ -0,0 +1,127 @@
+"""Round-trip tests for the ``.mxa`` snapshot archive; run with ``python -m pytest``."""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from snapshot_archive import KIND_BASE, KIND_PATCH, SnapshotArchive, main, render_snapshot
+
+SNAPSHOTS = sorted(Path(__file__).parent.glob("faculty-allocations-2025-1*.json"))
+
+
+def base_payload():
+    return {
+        "allocations": {"0-0": "12ENG1", "1-0": ["12MAT1", "12MAT2"], "2-1": "11SCI"},
+        "timestamp": "2025-11-04T01:00:00.000Z",
+        "teachers": ["Steve Cowell", "Louis Orr"],
+        "lines": ["Line 1", "Line 2", "Line 3"],
+        "csvData": [["Year 12", "", ""], ["", "Line 1", "Line 2"], ["Row 1", "12ENG1", "12MAT1"]],
+        "subjectSplits": {"12MAT1": [{"code": "12MAT1▸1", "periods": 3}]},
+        "teacherLoadSettings": {"Steve Cowell": {"fte": "1.0", "periodAllowance": 2}},
+    }
+
+
+def versions():
+    first = base_payload()
+
+    moved = copy.deepcopy(first)
+    moved["allocations"]["2-0"] = moved["allocations"].pop("2-1")
+    moved["timestamp"] = "2025-11-05T01:00:00.000Z"
+
+    removed = copy.deepcopy(moved)
+    del removed["subjectSplits"]
+    del removed["teacherLoadSettings"]["Steve Cowell"]
+
+    reordered = {key: removed[key] for key in reversed(list(removed))}
+    reordered["allocations"] = {key: reordered["allocations"][key] for key in sorted(reordered["allocations"])}
+
+    shorter = copy.deepcopy(reordered)
+    shorter["csvData"] = [row[:2] for row in shorter["csvData"][:2]]
+
+    longer = copy.deepcopy(shorter)
+    longer["csvData"] = [row + ["x", "y"] for row in longer["csvData"]] + [["Row 2", "12ENG1"], []]
+    longer["csvData"][0][0] = "Year 11"
+
+    return [first, moved, removed, reordered, shorter, longer]
+
+
+def assert_same_export(actual, expected):
+    assert render_snapshot(actual) == render_snapshot(expected)
+
+
+def test_base_and_patches_round_trip(tmp_path):
+    archive = SnapshotArchive(tmp_path / "school.mxa", base_interval=4)
+    expected = versions()
+    for payload in expected:
+        archive.append(payload)
+
+    assert [record.kind for record in archive.records] == [KIND_BASE, KIND_PATCH, KIND_PATCH, KIND_PATCH, KIND_BASE, KIND_PATCH]
+    reopened = SnapshotArchive(tmp_path / "school.mxa")
+    for version, payload in enumerate(expected, start=1):
+        assert_same_export(reopened.payload(version), payload)
+    assert [list(payload) for _, payload in reopened.iter_versions()] == [list(payload) for payload in expected]
+
+
+def test_unchanged_payload_is_not_stored_again(tmp_path):
+    archive = SnapshotArchive(tmp_path / "school.mxa")
+    assert archive.append(base_payload()) == (1, True)
+    assert archive.append(base_payload()) == (1, False)
+
+
+@pytest.mark.parametrize("keep", [1, 2, 4, 10])
+def test_compact_keeps_newest_versions(tmp_path, keep):
+    archive = SnapshotArchive(tmp_path / "school.mxa", base_interval=10)
+    expected = versions()
+    for payload in expected:
+        archive.append(payload)
+
+    compacted = archive.compact(base_interval=2, keep=keep)
+    kept = expected[-keep:]
+    assert len(compacted) == len(kept)
+    assert compacted.records[0].kind == KIND_BASE
+    reopened = SnapshotArchive(tmp_path / "school.mxa")
+    for version, payload in enumerate(kept, start=1):
+        assert_same_export(reopened.payload(version), payload)
+    assert not (tmp_path / ".school.mxa.tmp").exists()
+
+
+@pytest.mark.parametrize("keep", [0, -1])
+def test_compact_rejects_keeping_nothing(tmp_path, keep):
+    archive = SnapshotArchive(tmp_path / "school.mxa")
+    archive.append(base_payload())
+    with pytest.raises(ValueError):
+        archive.compact(keep=keep)
+    with pytest.raises(SystemExit):
+        main(["compact", str(tmp_path / "school.mxa"), "--keep", str(keep)])
+    assert len(SnapshotArchive(tmp_path / "school.mxa")) == 1
+
+
+def test_compact_empty_archive(tmp_path):
+    archive = SnapshotArchive(tmp_path / "empty.mxa")
+    assert len(archive.compact()) == 0
+    assert len(SnapshotArchive(tmp_path / "empty.mxa")) == 0
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    path = tmp_path / "school.mxa"
+    archive = SnapshotArchive(path)
+    for payload in versions()[:3]:
+        archive.append(payload)
+    path.write_bytes(path.read_bytes()[:-5])
+
+    reopened = SnapshotArchive(path)
+    assert len(reopened) == 2
+    reopened.append(versions()[2])
+    assert_same_export(SnapshotArchive(path).payload(3), versions()[2])
+
+
+@pytest.mark.skipif(not SNAPSHOTS, reason="no bundled snapshots")
+def test_bundled_snapshots_extract_byte_for_byte(tmp_path):
+    archive = SnapshotArchive(tmp_path / "faculty.mxa", base_interval=3)
+    texts = [path.read_text(encoding="utf-8") for path in SNAPSHOTS]
+    for text in texts:
+        archive.append(json.loads(text))
+    for version, text in enumerate(texts, start=1):
+        assert render_snapshot(archive.payload(version)) == text.rstrip("\n")
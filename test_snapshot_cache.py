@@ -0,0 +1,43 @@
+"""Tests for reusing teacher loads across snapshot versions; run with ``python -m pytest``."""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from snapshot_cache import SnapshotCache
+from verify_teacher_load import build_snapshot_loads, format_load_report, load_snapshot
+
+SNAPSHOTS = sorted(Path(__file__).parent.glob("faculty-allocations-2025-1*.json"))
+
+
+def fresh_report(data):
+    return format_load_report(data, build_snapshot_loads(data))
+
+
+@pytest.mark.skipif(not SNAPSHOTS, reason="no bundled snapshots")
+def test_changed_teachers_match_a_fresh_build():
+    cache = SnapshotCache()
+    for path in SNAPSHOTS:
+        entry = cache.load_path(path)
+        with load_snapshot(path) as data:
+            assert entry.report() == fresh_report(data)
+    assert cache.stats()["teacher_hits"] > 0
+
+
+def test_only_edited_teacher_is_recomputed():
+    first = {
+        "teachers": ["Steve Cowell", "Louis Orr", "Steve Cowell"],
+        "lines": ["Line 1", "Line 2"],
+        "allocations": {"0-0": "12ENG1", "1-1": ["12MAT1"], "1-2": "11SCI"},
+        "teacherLoadSettings": {"Louis Orr": {"fte": "0.8"}},
+    }
+    second = copy.deepcopy(first)
+    second["allocations"]["0-1"] = "10HIS1"
+
+    cache = SnapshotCache()
+    cache.add_payload(first, "first")
+    entry = cache.add_payload(second, "second")
+    assert (entry.computed_teachers, entry.reused_teachers) == (1, 1)
+    assert entry.report() == fresh_report(json.loads(json.dumps(second)))
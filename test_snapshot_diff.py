@@ -0,0 +1,46 @@
+"""Tests for the persistent teacher load cache; run with ``python -m pytest``."""
+
+import json
+
+import pytest
+
+from snapshot_diff import CACHE_VERSION, LOAD_FIELDS, LoadCache
+
+LOAD = {field: 1.0 for field in LOAD_FIELDS}
+
+
+def test_save_keeps_most_recently_used_entries(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = LoadCache(path, max_entries=3)
+    for digest in "abcd":
+        cache.put(digest, LOAD)
+    cache.get("b")
+    cache.save()
+
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    assert stored["version"] == CACHE_VERSION
+    assert list(stored["entries"]) == ["c", "d", "b"]
+    assert not (tmp_path / ".cache.json.tmp").exists()
+
+
+def test_oversized_cache_file_is_trimmed_on_load(tmp_path):
+    path = tmp_path / "cache.json"
+    entries = {str(index): LOAD for index in range(10)}
+    path.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}), encoding="utf-8")
+
+    LoadCache(path, max_entries=4).save()
+    assert list(json.loads(path.read_text(encoding="utf-8"))["entries"]) == ["6", "7", "8", "9"]
+
+
+def test_hits_alone_do_not_rewrite_when_order_is_unchanged(tmp_path):
+    cache = LoadCache(tmp_path / "cache.json")
+    cache.put("a", LOAD)
+    cache.save()
+    assert cache.get("a") == LOAD
+    assert cache.get("missing") is None
+    assert not cache.dirty
+
+
+def test_cache_size_must_be_positive():
+    with pytest.raises(ValueError):
+        LoadCache(None, max_entries=0)
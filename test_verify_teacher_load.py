@@ -0,0 +1,77 @@
+"""Tests for streamed teacher loads and report rounding; run with ``python -m pytest``."""
+
+import io
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from load_renderers import render_loads
+from stage_metrics import StageMetrics
+from verify_teacher_load import (
+    build_snapshot_loads,
+    iter_report_loads,
+    iter_teacher_loads,
+    load_snapshot,
+    verify_snapshot,
+)
+
+SNAPSHOTS = sorted(Path(__file__).parent.glob("faculty-allocations-2025-1*.json"))
+
+
+def render(loads, report_format):
+    buffer = io.StringIO()
+    render_loads(loads, buffer, report_format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("source", SNAPSHOTS, ids=lambda path: path.name)
+@pytest.mark.parametrize("report_format", ["markdown", "jsonl"])
+def test_streamed_loads_match_load_index(source, report_format):
+    with load_snapshot(source) as data:
+        load_index = build_snapshot_loads(data)
+        expected = render(iter_report_loads(data, load_index), report_format)
+        assert render(iter_teacher_loads(data), report_format) == expected
+
+
+def test_duplicate_and_unknown_teachers():
+    data = {
+        "teachers": ["Steve Cowell", "Louis Orr", "Steve Cowell"],
+        "lines": ["Line 1", "Line 2"],
+        "allocations": {"0-0": "12ENG1", "1-2": ["12MAT1"], "0-1": "11SCI"},
+        "teacherLoadSettings": {"Louis Orr": {"fte": "0.8"}},
+    }
+    load_index = build_snapshot_loads(data)
+    assert render(iter_teacher_loads(data), "markdown") == render(iter_report_loads(data, load_index), "markdown")
+    unknown = list(iter_teacher_loads(data, teacher="Nobody"))
+    assert [load["records"] for load in unknown] == [[]]
+
+
+def test_jsonl_rounds_like_csv():
+    data = {
+        "teachers": ["Steve Cowell"],
+        "lines": ["Line 1"],
+        "allocations": {"0-0": "12ENG1"},
+        "teacherLoadSettings": {"Steve Cowell": {"assemblyFullCount": 3, "additionalMinutes": 0.1 + 0.2}},
+    }
+    entry = json.loads(render(iter_teacher_loads(data), "jsonl"))
+    for value in [entry["balance_minutes"], entry["allowance_minutes"], *entry["records"][0].values()]:
+        if isinstance(value, float):
+            assert value == round(value, 2)
+
+
+@pytest.mark.skipif(not SNAPSHOTS, reason="no bundled snapshots")
+def test_xlsx_export_reuses_the_report_loads(tmp_path):
+    metrics = StageMetrics().start()
+    result = verify_snapshot(
+        SNAPSHOTS[-1], tmp_path / "report.md", xlsx_path=tmp_path / "report.xlsx", metrics=metrics
+    )
+    metrics.stop()
+
+    stages = {stage["name"]: stage for stage in metrics.as_dict()["stages"]}
+    assert stages["record_build"]["calls"] == 1
+    assert stages["load_index"]["items"] == len(result["teachers"])
+    with zipfile.ZipFile(tmp_path / "report.xlsx") as book:
+        sheets = [name for name in book.namelist() if name.startswith("xl/worksheets/sheet")]
+    assert len(sheets) == len(result["teachers"]) + 1
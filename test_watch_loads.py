@@ -0,0 +1,45 @@
+"""Tests for the snapshot directory watcher; run with ``python -m pytest``."""
+
+import json
+
+from watch_loads import INDEX_NAME, SnapshotWatcher
+
+
+def write_snapshot(path, teacher):
+    payload = {"teachers": [teacher], "lines": ["Line 1"], "allocations": {"0-0": "12ENG1"}}
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_removed_snapshot_drops_report_index_entry_and_cache(tmp_path):
+    source = tmp_path / "snapshots"
+    source.mkdir()
+    write_snapshot(source / "a.json", "Steve Cowell")
+    write_snapshot(source / "b.json", "Louis Orr")
+    watcher = SnapshotWatcher(str(source), tmp_path / "reports", tolerance=-1e9)
+
+    assert len(watcher.poll()) == 2
+    report_b = tmp_path / "reports" / "b-load-report.md"
+    digest_b = watcher.files[source / "b.json"].digest
+    assert report_b.exists()
+    assert watcher.cache.get(digest_b) is not None
+
+    (source / "b.json").unlink()
+    assert watcher.poll() == []
+    assert not report_b.exists()
+    assert (tmp_path / "reports" / "a-load-report.md").exists()
+    assert "Louis Orr" not in (tmp_path / "reports" / INDEX_NAME).read_text(encoding="utf-8")
+    assert watcher.cache.get(digest_b) is None
+
+
+def test_copy_keeps_shared_cache_entry(tmp_path):
+    source = tmp_path / "snapshots"
+    source.mkdir()
+    write_snapshot(source / "a.json", "Steve Cowell")
+    write_snapshot(source / "b.json", "Steve Cowell")
+    watcher = SnapshotWatcher(str(source), tmp_path / "reports")
+    watcher.poll()
+    digest = watcher.files[source / "a.json"].digest
+
+    (source / "b.json").unlink()
+    watcher.poll()
+    assert watcher.cache.get(digest) is not None
@@ -0,0 +1,28 @@
+"""Tests for applying what-if moves to an allocation; run with ``python -m pytest``."""
+
+from what_if import Move, MoveEvaluator, Swap
+
+
+def evaluator():
+    return MoveEvaluator(
+        {
+            "teachers": ["Steve Cowell", "Louis Orr", "Emma Fuller"],
+            "lines": ["Line 1", "Line 2"],
+            "allocations": {"0-0": ["12ENG1", "12MAT1"], "0-1": "11SCI"},
+        }
+    )
+
+
+def test_single_subject_cells_stay_strings():
+    moves = evaluator()
+    moves.apply(Move("12MAT1", "0-0", "0-2"))
+    assert moves.allocations == {"0-0": "12ENG1", "0-1": "11SCI", "0-2": "12MAT1"}
+
+    moves.apply(Move("11SCI", "0-1", "0-0"))
+    assert moves.allocations == {"0-0": ["12ENG1", "11SCI"], "0-2": "12MAT1"}
+
+
+def test_swap_keeps_cell_shapes():
+    moves = evaluator()
+    moves.apply(Swap("0-0", "12MAT1", "0-1", "11SCI"))
+    assert moves.allocations == {"0-0": ["12ENG1", "11SCI"], "0-1": "12MAT1"}
@@ -1,8 +1,18 @@
 import argparse
-import json
+import glob
+import io
 import pathlib
-import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+
+from allocation_model import AllocationRecord, RecordTables
+from columnar_snapshot import COLUMNAR_SUFFIX, ColumnarSnapshot, is_columnar_snapshot
+from lazy_snapshot import LazySnapshot
+from load_renderers import RENDERERS, get_renderer, render_loads, render_teacher_summary
+from period_rules import DEFAULT_RULES, PeriodRuleEngine
+from stage_metrics import NULL_METRICS, StageMetrics, profile_to
+from teacher_load_xlsx import TeacherLoadWorkbook
 
 STANDARD_PERIOD_MINUTES = 59
 WEDNESDAY_PERIOD_MINUTES = 38
@@ -15,16 +25,6 @@ WEDNESDAY_LINES = {
     "wedb6",
 }
 
-YEAR_PERIOD_ALLOCATION = {
-    12: 7,
-    11: 7,
-    10: 5,
-    9: 6,
-}
-YEAR8_ELECTIVE_PERIODS = 3
-YEAR8_TECH_MANDATORY_PERIODS = 5
-YEAR7_TECH_MANDATORY_PERIODS = 5
-
 FTE_BASE_PERIODS_MAPPING = {
     "1.0": 37.95,
     "0.8": 30.35,
@@ -46,14 +46,8 @@ def is_wednesday_subject(code: str) -> bool:
     return bool(code and "_wed" in code.lower())
 
 
-def normalize_subject_code_for_periods(subject_code: str) -> str:
-    if not subject_code:
-        return ""
-    normalized = str(subject_code).upper()
-    normalized = re.sub(r"\s+", " ", normalized).strip()
-    normalized = re.sub(r"^S[12]\s*:?\s*", "", normalized)
-    normalized = re.sub(r"^(?:YEAR|YR)\s*", "", normalized)
-    return normalized
+def normalize_subject_code_for_periods(subject_code: str, rules=None) -> str:
+    return (rules or DEFAULT_RULES).normalize(subject_code)
 
 
 def build_split_lookup(subject_splits):
@@ -77,101 +71,74 @@ def build_split_lookup(subject_splits):
     return lookup, base_map
 
 
-def parse_period_value(value):
-    if isinstance(value, (int, float)):
-        return float(value)
-    try:
-        return float(str(value))
-    except (TypeError, ValueError):
-        return 0.0
-
-
-def get_subject_period_value(subject_code, split_lookup):
-    if not subject_code:
-        return 0.0
-
-    if is_wednesday_subject(subject_code):
-        return 1.0
-
-    split_info = split_lookup.get(subject_code)
-    if split_info:
-        return parse_period_value(split_info.get("periods"))
-
-    normalized = normalize_subject_code_for_periods(subject_code)
-    if not normalized:
-        return 0.0
-
-    match = re.match(r"^(\d{1,2})", normalized)
-    if not match:
-        return 0.0
-
-    year = int(match.group(1))
-    if year in YEAR_PERIOD_ALLOCATION:
-        return float(YEAR_PERIOD_ALLOCATION[year])
+def get_subject_period_value(subject_code, split_lookup, rules=None):
+    return (rules or DEFAULT_RULES).period_value(subject_code, split_lookup)
 
-    remainder = normalized[len(match.group(1)) :].strip()
-    compact = re.sub(r"\s+", "", remainder)
 
-    if year == 8:
-        tech_keyword = bool(re.search(r"\bTECH\b", remainder))
-        mandatory_keyword = bool(re.search(r"(^|\s)MAND(?:ATORY)?\b", remainder))
-        is_tech_mandatory = (
-            compact.startswith("TM") or tech_keyword or mandatory_keyword or "TECHMAND" in compact
-        )
-        return float(YEAR8_TECH_MANDATORY_PERIODS if is_tech_mandatory else YEAR8_ELECTIVE_PERIODS)
-
-    if year == 7:
-        return float(YEAR7_TECH_MANDATORY_PERIODS)
-
-    return 0.0
-
-
-def compute_line_minutes(lines):
+def compute_line_minutes(lines, rules=None):
     minutes = []
     for label in lines:
+        grid_minutes = rules.line_minutes(label) if rules is not None else None
+        if grid_minutes is not None:
+            minutes.append(grid_minutes)
+            continue
         minutes.append(
             WEDNESDAY_PERIOD_MINUTES if is_wednesday_line(label) else STANDARD_PERIOD_MINUTES
         )
     return minutes
 
 
-def build_allocation_records(data, split_lookup):
-    records = []
-    teachers = data["teachers"]
-    lines = data["lines"]
-    line_minutes = compute_line_minutes(lines)
-
+def iter_allocation_cells(data):
+    if isinstance(data, ColumnarSnapshot):
+        yield from data.iter_allocation_cells()
+        return
     for key, subjects in data["allocations"].items():
         line_idx_str, teacher_idx_str = key.split("-")
-        line_idx = int(line_idx_str)
-        teacher_idx = int(teacher_idx_str)
-        line_label = lines[line_idx]
-        line_min = line_minutes[line_idx]
         subject_list = subjects if isinstance(subjects, list) else [subjects]
+        yield int(line_idx_str), int(teacher_idx_str), subject_list
+
+
+def build_allocation_records(data, split_lookup, rules=None, cells=None, tables=None):
+    """Build one ``AllocationRecord`` per allocated subject; ``cells`` limits the build to those cells.
+
+    Records of one call share a ``RecordTables`` (pass ``tables`` to share it across
+    calls), and equal (subject, line) pairs share one minutes value.
+    """
+    rules = rules or DEFAULT_RULES
+    if tables is None:
+        lines = data["lines"]
+        tables = RecordTables(data["teachers"], lines, compute_line_minutes(lines, rules))
+    subject_ids = tables.subjects.ids
+    minutes_by_pair = {}
+    records = []
+
+    for line_idx, teacher_idx, subject_list in cells if cells is not None else iter_allocation_cells(data):
+        line_min = tables.line_minutes[line_idx]
         for subject in subject_list:
-            period_value = get_subject_period_value(subject, split_lookup)
-            minutes = period_value * line_min
-            records.append(
-                {
-                    "teacher_index": teacher_idx,
-                    "teacher": teachers[teacher_idx],
-                    "line_index": line_idx,
-                    "line_label": line_label,
-                    "subject": subject,
-                    "period_value": period_value,
-                    "line_minutes": line_min,
-                    "minutes": minutes,
-                }
-            )
+            subject_idx = subject_ids.get(subject)
+            if subject_idx is None:
+                subject_idx = tables.add_subject(subject, rules.period_value(subject, split_lookup))
+            minutes = minutes_by_pair.get((subject_idx, line_idx))
+            if minutes is None:
+                minutes = tables.period_values[subject_idx] * line_min
+                minutes_by_pair[(subject_idx, line_idx)] = minutes
+            records.append(AllocationRecord(tables, teacher_idx, line_idx, subject_idx, minutes))
     return records
 
 
 def summarize_teacher(records, teacher_name):
-    teacher_records = [rec for rec in records if rec["teacher"] == teacher_name]
-    total_minutes = sum(rec["minutes"] for rec in teacher_records)
+    teacher_records = [rec for rec in records if rec.teacher == teacher_name]
+    total_minutes = sum(rec.minutes for rec in teacher_records)
     return teacher_records, total_minutes
 
 
+def group_records_by_teacher(records):
+    grouped = defaultdict(list)
+    for rec in records:
+        grouped[rec.teacher_index].append(rec)
+    return grouped
+
+
 def compute_allowance_minutes(settings):
     period_allowance = settings.get("periodAllowance", 0) * STANDARD_PERIOD_MINUTES
     assembly_full = settings.get("assemblyFullCount", 0) * ASSEMBLY_FULL_MINUTES
@@ -195,64 +162,300 @@ def compute_base_minutes(fte_value):
     return base_periods * STANDARD_PERIOD_MINUTES
 
 
-def format_teacher_summary(name, records, load_settings):
-    teacher_records, teaching_minutes = summarize_teacher(records, name)
-
+def compute_teacher_load(name, teacher_records, load_settings):
     load_settings = load_settings or {}
+    teaching_minutes = sum(rec.minutes for rec in teacher_records)
     allowance_minutes = compute_allowance_minutes(load_settings)
     total_load_minutes = teaching_minutes + allowance_minutes
     base_minutes = compute_base_minutes(load_settings.get("fte", "1.0"))
-    balance_minutes = base_minutes - total_load_minutes
 
-    period_allowance = load_settings.get("periodAllowance", 0) * STANDARD_PERIOD_MINUTES
-    assembly_full = load_settings.get("assemblyFullCount", 0) * ASSEMBLY_FULL_MINUTES
-    assembly_short = load_settings.get("assemblyShortCount", 0) * ASSEMBLY_SHORT_MINUTES
-    additional = load_settings.get("additionalMinutes", 0)
+    return {
+        "teacher": name,
+        "records": teacher_records,
+        "teaching_minutes": teaching_minutes,
+        "period_allowance_minutes": load_settings.get("periodAllowance", 0)
+        * STANDARD_PERIOD_MINUTES,
+        "assembly_full_minutes": load_settings.get("assemblyFullCount", 0) * ASSEMBLY_FULL_MINUTES,
+        "assembly_short_minutes": load_settings.get("assemblyShortCount", 0)
+        * ASSEMBLY_SHORT_MINUTES,
+        "additional_minutes": load_settings.get("additionalMinutes", 0),
+        "allowance_minutes": allowance_minutes,
+        "total_load_minutes": total_load_minutes,
+        "base_minutes": base_minutes,
+        "balance_minutes": base_minutes - total_load_minutes,
+    }
+
+
+def build_teacher_load_index(records, teachers, load_settings_map):
+    """Aggregate every teacher's load in a single pass over ``records``.
+
+    Records are grouped by teacher index, then merged per teacher name so that
+    duplicate names behave exactly like ``summarize_teacher``. The returned
+    mapping is keyed by teacher name and holds the precomputed totals used by
+    ``render_teacher_summary``.
+    """
+    grouped = group_records_by_teacher(records)
+    records_by_name = {}
+    for teacher_idx, teacher in enumerate(teachers):
+        teacher_records = records_by_name.setdefault(teacher, [])
+        teacher_records.extend(grouped.get(teacher_idx, ()))
+
+    load_settings_map = load_settings_map or {}
+    return {
+        teacher: compute_teacher_load(teacher, teacher_records, load_settings_map.get(teacher, {}))
+        for teacher, teacher_records in records_by_name.items()
+    }
+
+
+def get_teacher_load(load_index, name, load_settings_map=None):
+    load = load_index.get(name)
+    if load is None:
+        load = compute_teacher_load(name, [], (load_settings_map or {}).get(name, {}))
+    return load
+
+
+def format_teacher_summary(name, records, load_settings):
+    teacher_records, _ = summarize_teacher(records, name)
+    return render_teacher_summary(compute_teacher_load(name, teacher_records, load_settings))
+
+
+def load_snapshot(data_path):
+    """Open a JSON or columnar snapshot; use it in a ``with`` block so a columnar map is closed."""
+    if is_columnar_snapshot(data_path):
+        return ColumnarSnapshot(data_path)
+    return LazySnapshot.from_path(data_path)
+
+
+def build_snapshot_loads(data, rules=None, metrics=NULL_METRICS):
+    with metrics.stage("record_build") as stage:
+        split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+        allocation_records = build_allocation_records(data, split_lookup, rules)
+        stage.count(len(allocation_records))
+    with metrics.stage("load_index") as stage:
+        load_index = build_teacher_load_index(
+            allocation_records,
+            data.get("teachers", []),
+            data.get("teacherLoadSettings", {}),
+        )
+        stage.count(len(load_index))
+    return load_index
+
+
+def iter_teacher_loads(data, rules=None, teacher=None, metrics=NULL_METRICS):
+    """Yield report loads in report order, building each teacher's records only when asked.
+
+    Allocation cells are indexed by teacher first; records for one teacher are then built
+    and dropped once the load has been consumed, so memory beyond the snapshot and that
+    cell index does not grow with the number of teachers reported.
+    """
+    rules = rules or DEFAULT_RULES
+    teachers = data.get("teachers", [])
+    load_settings_map = data.get("teacherLoadSettings", {})
+    with metrics.stage("record_build") as stage:
+        split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+        lines = data["lines"]
+        tables = RecordTables(teachers, lines, compute_line_minutes(lines, rules))
+        cells_by_teacher = defaultdict(list)
+        for cell in iter_allocation_cells(data):
+            cells_by_teacher[cell[1]].append(cell)
+        positions = defaultdict(list)
+        for teacher_idx, name in enumerate(teachers):
+            positions[name].append(teacher_idx)
+        stage.count(sum(len(cells) for cells in cells_by_teacher.values()))
+
+    def loads():
+        for name in [teacher] if teacher else teachers:
+            cells = [cell for teacher_idx in positions.get(name, ()) for cell in cells_by_teacher.get(teacher_idx, ())]
+            records = build_allocation_records(data, split_lookup, rules, cells, tables)
+            yield compute_teacher_load(name, records, load_settings_map.get(name, {}))
+
+    return metrics.timed_iter("load_index", loads())
+
+
+def iter_report_loads(data, load_index, teacher=None):
+    load_settings_map = data.get("teacherLoadSettings", {})
+    target_teachers = [teacher] if teacher else data.get("teachers", [])
+    for name in target_teachers:
+        yield get_teacher_load(load_index, name, load_settings_map)
+
+
+def format_load_report(data, load_index, teacher=None):
+    buffer = io.StringIO()
+    render_loads(iter_report_loads(data, load_index, teacher), buffer)
+    return buffer.getvalue()
+
+
+def verify_snapshot(
+    data_path,
+    output_path,
+    teacher=None,
+    period_profile=None,
+    xlsx_path=None,
+    metrics=NULL_METRICS,
+    report_format="markdown",
+):
+    with metrics.stage("read"):
+        data = load_snapshot(data_path)
+    with data, ExitStack() as stack:
+        rules = PeriodRuleEngine.from_file(period_profile) if period_profile else None
+        workbook = None
+        if xlsx_path:
+            workbook = stack.enter_context(TeacherLoadWorkbook(xlsx_path, data.get("teacherLoadSettings", {})))
+        totals = {}
+
+        def collect_totals(loads):
+            # Each load is built once and goes to both the report and the workbook.
+            for load in loads:
+                totals.setdefault(
+                    load["teacher"],
+                    {
+                        "teacher": load["teacher"],
+                        "total_load_minutes": load["total_load_minutes"],
+                        "base_minutes": load["base_minutes"],
+                        "balance_minutes": load["balance_minutes"],
+                    },
+                )
+                if workbook is not None:
+                    with metrics.stage("xlsx"):
+                        workbook.add_load(load)
+                yield load
+
+        with metrics.stage("render") as stage:
+            with open(output_path, "w", encoding="utf-8") as handle:
+                stage.count(
+                    render_loads(
+                        collect_totals(iter_teacher_loads(data, rules, teacher, metrics)),
+                        handle,
+                        report_format,
+                        title=f"Teacher load report: {pathlib.Path(data_path).name}",
+                    )
+                )
+        if workbook is not None:
+            with metrics.stage("xlsx"):
+                stack.close()
+
+        return {
+            "snapshot": str(data_path),
+            "report": str(output_path),
+            "teachers": list(totals.values()),
+        }
+
+
+def resolve_snapshot_paths(source):
+    source_path = pathlib.Path(source)
+    if source_path.is_dir():
+        candidates = (
+            path for path in source_path.iterdir() if path.suffix in (".json", COLUMNAR_SUFFIX)
+        )
+    else:
+        candidates = (pathlib.Path(match) for match in glob.glob(source))
+    return sorted(path for path in candidates if path.is_file())
+
+
+def batch_report_paths(snapshot_paths, output_dir, extension=".md"):
+    report_paths = []
+    used = set()
+    for path in snapshot_paths:
+        stem = path.stem
+        candidate = f"{stem}-load-report{extension}"
+        suffix = 2
+        while candidate in used:
+            candidate = f"{stem}-{suffix}-load-report{extension}"
+            suffix += 1
+        used.add(candidate)
+        report_paths.append(pathlib.Path(output_dir) / candidate)
+    return report_paths
+
+
+def format_capacity_index(results, failures, tolerance=0.0):
+    over = []
+    under = []
+    for result in results:
+        for entry in result["teachers"]:
+            balance = entry["balance_minutes"]
+            if balance < -tolerance:
+                over.append((result, entry))
+            elif balance > tolerance:
+                under.append((result, entry))
+
+    over.sort(key=lambda item: item[1]["balance_minutes"])
+    under.sort(key=lambda item: -item[1]["balance_minutes"])
 
     lines = [
-        f"### {name}",
+        "# Teacher load index",
+        "",
+        f"Snapshots verified: {len(results)}",
+        f"Tolerance (minutes): {tolerance:.2f}",
         "",
-        "| Line | Subject | Periods | Line Minutes | Load (min) |",
-        "| - | - | - | - | - |",
     ]
-    for rec in teacher_records:
-        subject_display = rec["subject"].replace("▸", "->")
-        lines.append(
-            f"| {rec['line_label']} | {subject_display} | "
-            f"{rec['period_value']:.2f} | {rec['line_minutes']:.0f} | {rec['minutes']:.2f} |"
+    for title, entries in (("Over capacity", over), ("Under capacity", under)):
+        lines.extend(
+            [
+                f"## {title}",
+                "",
+                "| Snapshot | Teacher | Total Load | Capacity | Balance |",
+                "| - | - | - | - | - |",
+            ]
         )
-    if not teacher_records:
-        lines.append("| — | — | — | — | — |")
-
-    lines.extend(
-        [
-            "",
-            "**Teaching minutes:** {:.2f}".format(teaching_minutes),
-            "**Allowances:**",
-            f"- Period allowance: {period_allowance:.2f}",
-            f"- Full assemblies: {assembly_full:.2f}",
-            f"- TLC / short assemblies: {assembly_short:.2f}",
-            f"- Additional minutes: {additional:.2f}",
-            "**Total allowance minutes:** {:.2f}".format(allowance_minutes),
-            "",
-            "**Total load:** {:.2f}".format(total_load_minutes),
-            "**Capacity (base minutes):** {:.2f}".format(base_minutes),
-            "**Balance (capacity - load):** {:.2f}".format(balance_minutes),
-            "",
-            "---",
-            "",
-        ]
-    )
+        for result, entry in entries:
+            lines.append(
+                f"| {pathlib.Path(result['snapshot']).name} | {entry['teacher']} | "
+                f"{entry['total_load_minutes']:.2f} | {entry['base_minutes']:.2f} | "
+                f"{entry['balance_minutes']:.2f} |"
+            )
+        if not entries:
+            lines.append("| — | — | — | — | — |")
+        lines.append("")
+
+    if failures:
+        lines.extend(["## Failed snapshots", ""])
+        for path, error in failures:
+            lines.append(f"- {pathlib.Path(path).name}: {error}")
+        lines.append("")
 
     return "\n".join(lines)
 
 
+def run_batch(
+    snapshot_paths, output_dir, workers=None, period_profile=None, tolerance=0.0, report_format="markdown"
+):
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    failures = []
+    report_paths = batch_report_paths(snapshot_paths, output_dir, get_renderer(report_format).extension)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                verify_snapshot, path, report_path, None, period_profile, report_format=report_format
+            ): path
+            for path, report_path in zip(snapshot_paths, report_paths)
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as exc:  # noqa: BLE001 - reported in the index
+                failures.append((str(path), exc))
+
+    results.sort(key=lambda result: result["snapshot"])
+    failures.sort(key=lambda failure: failure[0])
+    index_path = output_dir / "load-index.md"
+    index_path.write_text(format_capacity_index(results, failures, tolerance), encoding="utf-8")
+    return index_path, results, failures
+
+
 def main():
     parser = argparse.ArgumentParser(description="Verify teacher load calculations.")
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--data",
-        default=r"C:\Users\scowell1\Downloads\matrix-main (10)\matrix-main\faculty-allocations with Wed Classes.json",
-        help="Path to the allocation JSON file.",
+        help="Path to the allocation JSON or columnar (.mxc) snapshot.",
+    )
+    source.add_argument(
+        "--batch",
+        help="Directory or glob of allocation snapshots to verify in parallel.",
     )
     parser.add_argument(
         "--teacher",
@@ -260,34 +463,82 @@ def main():
     )
     parser.add_argument(
         "--output",
-        default="teacher_load_report.md",
-        help="Output file for the formatted report (markdown).",
+        help="Output file for the report. Defaults to teacher_load_report with the format's extension.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(RENDERERS),
+        default="markdown",
+        help="Report format: markdown (default), csv (totals per teacher), jsonl or html.",
+    )
+    parser.add_argument(
+        "--xlsx",
+        help="Optional path for an XLSX export with a summary sheet and one sheet per teacher.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="load-reports",
+        help="Directory for per-snapshot reports and load-index.md in batch mode.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes for batch mode. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Balance (minutes) within which a teacher is not listed in the batch index.",
+    )
+    parser.add_argument(
+        "--period-profile",
+        help="Optional JSON profile overriding the subject-period rules for a school.",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Write per-stage wall time, record counts and peak memory to this JSON file (--data only).",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Write cProfile stats for the run to this file (--data only).",
     )
     args = parser.parse_args()
 
-    data_path = pathlib.Path(args.data)
-    data = json.loads(data_path.read_text(encoding="utf-8"))
-
-    split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
-    allocation_records = build_allocation_records(data, split_lookup)
-
-    report_sections = []
-    teachers = data.get("teachers", [])
-    load_settings_map = data.get("teacherLoadSettings", {})
-
-    target_teachers = [args.teacher] if args.teacher else teachers
-
-    for teacher in target_teachers:
-        summary = format_teacher_summary(
-            teacher,
-            allocation_records,
-            load_settings_map.get(teacher, {}),
+    if args.batch:
+        if args.metrics or args.profile:
+            parser.error("--metrics and --profile only apply to --data runs")
+        snapshot_paths = resolve_snapshot_paths(args.batch)
+        if not snapshot_paths:
+            raise SystemExit(f"No snapshots found for {args.batch}")
+        index_path, results, failures = run_batch(
+            snapshot_paths,
+            args.output_dir,
+            workers=args.workers,
+            period_profile=args.period_profile,
+            tolerance=args.tolerance,
+            report_format=args.format,
         )
-        report_sections.append(summary)
-
-    report_text = "\n".join(report_sections).strip() + "\n"
-    pathlib.Path(args.output).write_text(report_text, encoding="utf-8")
+        print(f"Verified {len(results)} snapshot(s), {len(failures)} failed")
+        print(f"Wrote index to {index_path}")
+        return
+
+    if args.output is None:
+        args.output = f"teacher_load_report{get_renderer(args.format).extension}"
+    metrics = StageMetrics().start() if args.metrics else NULL_METRICS
+    with profile_to(args.profile):
+        verify_snapshot(
+            args.data, args.output, args.teacher, args.period_profile, args.xlsx, metrics, args.format
+        )
+    metrics.stop()
     print(f"Wrote report to {args.output}")
+    if args.xlsx:
+        print(f"Wrote workbook to {args.xlsx}")
+    if args.metrics:
+        metrics.write_json(args.metrics, command="verify_teacher_load", input=args.data, output=args.output)
+        print(f"Wrote metrics to {args.metrics}")
+    if args.profile:
+        print(f"Wrote profile to {args.profile}")
 
 
 if __name__ == "__main__":
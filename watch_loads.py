@@ -0,0 +1,192 @@
+"""Watch a directory of snapshots and keep their load reports up to date.
+
+The directory is polled (every half second by default) so the watcher needs nothing
+beyond the standard library. A snapshot is only re-read when its size or modification
+time changes, and only re-reported when its content hash changes. Parsed snapshots and
+per-teacher loads are kept in a ``SnapshotCache``, so re-saving an export with a few
+edited cells recomputes just the teachers holding those cells.
+
+Reports are named like ``verify_teacher_load --batch`` names them, and ``load-index.md``
+is rewritten whenever any report changes. When a snapshot is removed, its report, its
+index entry and its parsed snapshot in the cache are removed too.
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from period_rules import PeriodRuleEngine
+from snapshot_cache import CachedSnapshot, SnapshotCache, content_digest
+from verify_teacher_load import batch_report_paths, format_capacity_index, resolve_snapshot_paths
+
+DEFAULT_INTERVAL = 0.5
+INDEX_NAME = "load-index.md"
+
+
+@dataclass
+class WatchedFile:
+    mtime_ns: int
+    size: int
+    digest: Optional[str] = None
+    summary: Optional[dict] = None
+
+
+def write_text_atomic(path: pathlib.Path, text: str) -> None:
+    """Write ``text`` next to ``path`` and swap it in, so readers never see half a report."""
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_text(text, encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+class SnapshotWatcher:
+    def __init__(self, source, output_dir, cache: Optional[SnapshotCache] = None, tolerance: float = 0.0) -> None:
+        self.source = source
+        self.output_dir = pathlib.Path(output_dir)
+        self.cache = cache or SnapshotCache()
+        self.tolerance = tolerance
+        self.files: Dict[pathlib.Path, WatchedFile] = {}
+        self.failures: Dict[pathlib.Path, str] = {}
+        self.reports: Dict[pathlib.Path, pathlib.Path] = {}
+
+    def poll(self) -> List[Tuple[pathlib.Path, pathlib.Path, CachedSnapshot]]:
+        """Check the source once and regenerate changed reports.
+
+        Returns ``(snapshot, report, entry)`` for every report that was written.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        paths = resolve_snapshot_paths(self.source)
+        updated = []
+        index_changed = False
+
+        for stale in set(self.files) - set(paths):
+            self.forget_digest(self.files.pop(stale).digest)
+            index_changed = True
+        for stale in set(self.failures) - set(paths):
+            del self.failures[stale]
+            index_changed = True
+        for stale in set(self.reports) - set(paths):
+            self.reports.pop(stale).unlink(missing_ok=True)
+
+        report_paths = batch_report_paths(paths, self.output_dir)
+        for path, report_path in zip(paths, report_paths):
+            # Removing a snapshot can rename another's report; drop the old name.
+            previous = self.reports.get(path)
+            if previous is not None and previous != report_path:
+                if previous not in report_paths:
+                    previous.unlink(missing_ok=True)
+                del self.reports[path]
+                self.files.pop(path, None)
+
+        for path, report_path in zip(paths, report_paths):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            known = self.files.get(path)
+            if (
+                known is not None
+                and (known.mtime_ns, known.size) == (stat.st_mtime_ns, stat.st_size)
+                and report_path.exists()
+            ):
+                continue
+
+            try:
+                raw = path.read_bytes()
+                digest = content_digest(raw)
+                if known is not None and known.digest == digest and report_path.exists():
+                    known.mtime_ns, known.size = stat.st_mtime_ns, stat.st_size
+                    continue
+                entry = self.cache.load_bytes(raw, path)
+            except (OSError, ValueError, KeyError, IndexError) as exc:
+                # Usually a file caught mid-save; it is retried on the next poll.
+                if self.failures.get(path) != str(exc):
+                    self.failures[path] = str(exc)
+                    index_changed = True
+                self.files.pop(path, None)
+                continue
+
+            write_text_atomic(report_path, entry.report())
+            self.reports[path] = report_path
+            summary = dict(entry.summary(), snapshot=str(path), report=str(report_path))
+            self.files[path] = WatchedFile(stat.st_mtime_ns, stat.st_size, digest, summary)
+            if self.failures.pop(path, None) is not None:
+                index_changed = True
+            updated.append((path, report_path, entry))
+
+        if updated or index_changed:
+            self.write_index()
+        return updated
+
+    def forget_digest(self, digest: Optional[str]) -> None:
+        if digest is not None and all(watched.digest != digest for watched in self.files.values()):
+            self.cache.discard(digest)
+
+    def write_index(self) -> pathlib.Path:
+        results = [watched.summary for _, watched in sorted(self.files.items()) if watched.summary]
+        failures = sorted((str(path), error) for path, error in self.failures.items())
+        index_path = self.output_dir / INDEX_NAME
+        write_text_atomic(index_path, format_capacity_index(results, failures, self.tolerance))
+        return index_path
+
+    def run(self, interval: float = DEFAULT_INTERVAL, once: bool = False) -> None:
+        reported: Dict[pathlib.Path, str] = {}
+        while True:
+            started = time.perf_counter()
+            for path, report_path, entry in self.poll():
+                print(
+                    f"Updated {report_path} from {path.name} "
+                    f"({entry.computed_teachers} recomputed, {entry.reused_teachers} reused, "
+                    f"{time.perf_counter() - started:.2f}s)",
+                    flush=True,
+                )
+            for path, error in self.failures.items():
+                if reported.get(path) != error:
+                    print(f"Skipped {path.name}: {error}", file=sys.stderr, flush=True)
+            reported = dict(self.failures)
+            if once:
+                return
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regenerate teacher load reports whenever snapshots change.")
+    parser.add_argument("source", help="Directory or glob of allocation snapshots (.json or .mxc) to watch.")
+    parser.add_argument("--output-dir", default="load-reports", help="Directory for reports and load-index.md.")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"Seconds between polls (default {DEFAULT_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Balance (minutes) within which a teacher is not listed in the index.",
+    )
+    parser.add_argument("--period-profile", help="Optional JSON profile overriding the subject-period rules.")
+    parser.add_argument("--cache-size", type=int, default=16, help="Parsed snapshots to keep in memory.")
+    parser.add_argument("--once", action="store_true", help="Update the reports once and exit.")
+    args = parser.parse_args(argv)
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    watcher = SnapshotWatcher(
+        args.source,
+        args.output_dir,
+        SnapshotCache(max_snapshots=args.cache_size, rules=rules),
+        args.tolerance,
+    )
+    print(f"Watching {args.source}; reports go to {watcher.output_dir}", flush=True)
+    try:
+        watcher.run(args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,293 @@
+"""Score candidate allocation moves without re-running the full load verification.
+
+``MoveEvaluator`` loads a snapshot once, keeps every teacher's balance (capacity minus
+load) together with the running sum and sum of squares of those balances, and scores a
+move by adjusting only the two teachers it touches. Imbalance is measured as the sum of
+squared deviations of the balances from their mean, so a move's score is an O(1)
+update no matter how many teachers or allocations the snapshot has.
+"""
+
+import argparse
+import math
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from period_rules import DEFAULT_RULES, PeriodRuleEngine
+from verify_teacher_load import (
+    build_snapshot_loads,
+    build_split_lookup,
+    compute_line_minutes,
+    load_snapshot,
+)
+
+
+class Move(NamedTuple):
+    """Move ``subject`` from the ``source`` allocation key to the ``target`` key."""
+
+    subject: str
+    source: str
+    target: str
+
+
+class Swap(NamedTuple):
+    """Exchange ``first_subject`` in ``first`` with ``second_subject`` in ``second``."""
+
+    first: str
+    first_subject: str
+    second: str
+    second_subject: str
+
+
+class MoveScore(NamedTuple):
+    move: Union[Move, Swap]
+    delta: float
+    imbalance: float
+    balances: Dict[str, float]
+
+
+def parse_key(key: str) -> Tuple[int, int]:
+    line_idx, teacher_idx = key.split("-")
+    return int(line_idx), int(teacher_idx)
+
+
+def make_key(line_idx: int, teacher_idx: int) -> str:
+    return f"{line_idx}-{teacher_idx}"
+
+
+class MoveEvaluator:
+    def __init__(self, data, rules: Optional[PeriodRuleEngine] = None) -> None:
+        self.rules = rules or DEFAULT_RULES
+        self.teachers: List[str] = list(data["teachers"])
+        self.lines: List[str] = list(data["lines"])
+        self.line_minutes = compute_line_minutes(self.lines, self.rules)
+        self.split_lookup, _ = build_split_lookup(data.get("subjectSplits", {}))
+        self._period_values: Dict[str, float] = {}
+        self.allocations: Dict[str, Union[List[str], str]] = {
+            key: list(subjects) if isinstance(subjects, list) else subjects
+            for key, subjects in data["allocations"].items()
+        }
+
+        loads = build_snapshot_loads(data, self.rules)
+        self.balances: Dict[str, float] = {name: load["balance_minutes"] for name, load in loads.items()}
+        self.count = len(self.balances)
+        self.balance_sum = sum(self.balances.values())
+        self.balance_squares = sum(value * value for value in self.balances.values())
+
+    @property
+    def imbalance(self) -> float:
+        """Sum of squared deviations of the teacher balances from their mean."""
+        if not self.count:
+            return 0.0
+        return max(self.balance_squares - self.balance_sum * self.balance_sum / self.count, 0.0)
+
+    @property
+    def balance_std(self) -> float:
+        return math.sqrt(self.imbalance / self.count) if self.count else 0.0
+
+    def period_value(self, subject: str) -> float:
+        value = self._period_values.get(subject)
+        if value is None:
+            value = self.rules.period_value(subject, self.split_lookup)
+            self._period_values[subject] = value
+        return value
+
+    def subject_minutes(self, subject: str, key: str) -> float:
+        line_idx, _ = parse_key(key)
+        return self.period_value(subject) * self.line_minutes[line_idx]
+
+    def cell_subjects(self, key: str) -> List[str]:
+        subjects = self.allocations.get(key, [])
+        return subjects if isinstance(subjects, list) else [subjects]
+
+    def _check_key(self, key: str) -> Tuple[int, int]:
+        line_idx, teacher_idx = parse_key(key)
+        if not (0 <= line_idx < len(self.lines) and 0 <= teacher_idx < len(self.teachers)):
+            raise ValueError(f"Allocation key {key!r} is outside the snapshot grid.")
+        return line_idx, teacher_idx
+
+    def _check_subject(self, key: str, subject: str) -> None:
+        if subject not in self.cell_subjects(key):
+            raise ValueError(f"{subject!r} is not allocated at {key!r}.")
+
+    def teacher_deltas(self, move: Union[Move, Swap]) -> Dict[str, float]:
+        """Return the change in balance minutes for each teacher touched by ``move``."""
+        deltas: Dict[str, float] = {}
+
+        def shift(subject: str, source: str, target: str) -> None:
+            _, source_teacher = self._check_key(source)
+            _, target_teacher = self._check_key(target)
+            # Balance is capacity - load, so the giver gains what it hands over.
+            giver = self.teachers[source_teacher]
+            taker = self.teachers[target_teacher]
+            deltas[giver] = deltas.get(giver, 0.0) + self.subject_minutes(subject, source)
+            deltas[taker] = deltas.get(taker, 0.0) - self.subject_minutes(subject, target)
+
+        if isinstance(move, Swap):
+            self._check_subject(move.first, move.first_subject)
+            self._check_subject(move.second, move.second_subject)
+            shift(move.first_subject, move.first, move.second)
+            shift(move.second_subject, move.second, move.first)
+        else:
+            self._check_subject(move.source, move.subject)
+            shift(move.subject, move.source, move.target)
+        return deltas
+
+    def _updated_moments(self, deltas: Dict[str, float]) -> Tuple[float, float]:
+        balance_sum = self.balance_sum
+        balance_squares = self.balance_squares
+        for name, delta in deltas.items():
+            old = self.balances[name]
+            new = old + delta
+            balance_sum += delta
+            balance_squares += new * new - old * old
+        return balance_sum, balance_squares
+
+    def score(self, move: Union[Move, Swap]) -> MoveScore:
+        """Score ``move`` without applying it; a negative delta reduces imbalance."""
+        deltas = self.teacher_deltas(move)
+        balance_sum, balance_squares = self._updated_moments(deltas)
+        imbalance = max(balance_squares - balance_sum * balance_sum / self.count, 0.0) if self.count else 0.0
+        balances = {name: self.balances[name] + delta for name, delta in deltas.items()}
+        return MoveScore(move, imbalance - self.imbalance, imbalance, balances)
+
+    def rank(
+        self,
+        moves: Iterable[Union[Move, Swap]],
+        limit: Optional[int] = None,
+        improving_only: bool = False,
+    ) -> List[MoveScore]:
+        """Score ``moves`` and return them ordered by largest imbalance reduction first.
+
+        Moves that do not apply to the current allocation (unknown subject or a key
+        outside the grid) are skipped.
+        """
+        scores = []
+        for move in moves:
+            try:
+                result = self.score(move)
+            except ValueError:
+                continue
+            if improving_only and result.delta >= 0:
+                continue
+            scores.append(result)
+        scores.sort(key=lambda item: item.delta)
+        return scores[:limit] if limit is not None else scores
+
+    def _store_subjects(self, key: str, subjects: List[str]) -> None:
+        # Keep the export's shape: a single subject is a string, several are a list.
+        if not subjects:
+            del self.allocations[key]
+        elif len(subjects) == 1:
+            self.allocations[key] = subjects[0]
+        else:
+            self.allocations[key] = subjects
+
+    def _remove_subject(self, key: str, subject: str) -> None:
+        remaining = list(self.cell_subjects(key))
+        remaining.remove(subject)
+        self._store_subjects(key, remaining)
+
+    def _add_subject(self, key: str, subject: str) -> None:
+        self._store_subjects(key, self.cell_subjects(key) + [subject])
+
+    def apply(self, move: Union[Move, Swap]) -> MoveScore:
+        """Apply ``move`` to the evaluator's allocation and running balances."""
+        result = self.score(move)
+        self.balance_sum, self.balance_squares = self._updated_moments(
+            {name: balance - self.balances[name] for name, balance in result.balances.items()}
+        )
+        self.balances.update(result.balances)
+
+        if isinstance(move, Swap):
+            self._remove_subject(move.first, move.first_subject)
+            self._remove_subject(move.second, move.second_subject)
+            self._add_subject(move.second, move.first_subject)
+            self._add_subject(move.first, move.second_subject)
+        else:
+            self._remove_subject(move.source, move.subject)
+            self._add_subject(move.target, move.subject)
+        return result
+
+    def iter_reassignments(self) -> Iterator[Move]:
+        """Yield every move of a subject to another teacher on the same line."""
+        for key in list(self.allocations):
+            try:
+                line_idx, teacher_idx = parse_key(key)
+            except ValueError:
+                continue
+            for subject in self.cell_subjects(key):
+                for other in range(len(self.teachers)):
+                    if other != teacher_idx:
+                        yield Move(subject, key, make_key(line_idx, other))
+
+    def iter_line_swaps(self) -> Iterator[Swap]:
+        """Yield swaps of subjects between two teachers on the same line."""
+        by_line: Dict[int, List[Tuple[str, str]]] = {}
+        for key in self.allocations:
+            try:
+                line_idx, _ = parse_key(key)
+            except ValueError:
+                continue
+            by_line.setdefault(line_idx, []).extend((key, subject) for subject in self.cell_subjects(key))
+        for entries in by_line.values():
+            for offset, (first, first_subject) in enumerate(entries):
+                for second, second_subject in entries[offset + 1 :]:
+                    if first != second:
+                        yield Swap(first, first_subject, second, second_subject)
+
+
+def describe_move(evaluator: MoveEvaluator, move: Union[Move, Swap]) -> str:
+    def label(key: str) -> str:
+        line_idx, teacher_idx = parse_key(key)
+        return f"{evaluator.lines[line_idx]} / {evaluator.teachers[teacher_idx]}"
+
+    if isinstance(move, Swap):
+        return f"swap {move.first_subject} ({label(move.first)}) with {move.second_subject} ({label(move.second)})"
+    return f"move {move.subject}: {label(move.source)} -> {label(move.target)}"
+
+
+def format_ranking(evaluator: MoveEvaluator, scores: Sequence[MoveScore]) -> str:
+    lines = [
+        "# What-if Moves",
+        "",
+        f"Current balance std dev: {evaluator.balance_std:.2f} minutes",
+        "",
+        "| Rank | Move | Std dev after | Affected balances |",
+        "| - | - | - | - |",
+    ]
+    for rank, result in enumerate(scores, start=1):
+        std_after = math.sqrt(result.imbalance / evaluator.count) if evaluator.count else 0.0
+        balances = ", ".join(f"{name}: {value:.2f}" for name, value in result.balances.items())
+        lines.append(f"| {rank} | {describe_move(evaluator, result.move)} | {std_after:.2f} | {balances} |")
+    if not scores:
+        lines.append("| — | — | — | — |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rank same-line reassignments and swaps by load imbalance reduction.")
+    parser.add_argument("snapshot", help="Snapshot file (.json or .mxc).")
+    parser.add_argument("--top", type=int, default=20, help="Number of moves to list.")
+    parser.add_argument("--swaps", action="store_true", help="Also score swaps between teachers on the same line.")
+    parser.add_argument("--output", help="Write the ranking to this markdown file instead of stdout.")
+    parser.add_argument("--period-profile", help="JSON period rule profile.")
+    args = parser.parse_args(argv)
+
+    rules = PeriodRuleEngine.from_file(args.period_profile) if args.period_profile else None
+    with load_snapshot(args.snapshot) as data:
+        evaluator = MoveEvaluator(data, rules)
+        candidates: Iterable[Union[Move, Swap]] = evaluator.iter_reassignments()
+        scores = evaluator.rank(candidates, improving_only=True)
+        if args.swaps:
+            scores = sorted(scores + evaluator.rank(evaluator.iter_line_swaps(), improving_only=True), key=lambda item: item.delta)
+        text = format_ranking(evaluator, scores[: args.top])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        print(f"Wrote {args.output}")
+    else:
+        print(text, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
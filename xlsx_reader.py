@@ -0,0 +1,192 @@
+"""Stream rows out of .xlsx workbooks using only the standard library.
+
+Worksheets are read with ``xml.etree.ElementTree.iterparse`` straight from the zip
+entry. Each ``<row>`` element is cleared from its parent once it has been yielded, so
+memory stays bounded by the shared-strings table rather than the size of the sheet. Rows are
+returned as lists of strings, padded like a CSV export, so they can be fed to the same
+parsers as ``csv.reader`` output.
+"""
+
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+NAMESPACE_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NAMESPACE_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NAMESPACE_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CELL_REFERENCE_PATTERN = re.compile(r"([A-Z]+)(\d+)")
+XLSX_SUFFIXES = {".xlsx", ".xlsm"}
+
+
+def is_xlsx_path(path: Union[str, Path]) -> bool:
+    return Path(path).suffix.lower() in XLSX_SUFFIXES
+
+
+def column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter) - 64)
+    return index - 1
+
+
+def dimension_width(reference: str) -> int:
+    last = reference.split(":")[-1]
+    match = CELL_REFERENCE_PATTERN.match(last)
+    return column_index(match.group(1)) + 1 if match else 0
+
+
+def _resolve_target(target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def list_sheets(archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Return ``(sheet name, zip entry)`` pairs in workbook order."""
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {
+        rel.get("Id"): _resolve_target(rel.get("Target", ""))
+        for rel in rels.iter(f"{NAMESPACE_PACKAGE_REL}Relationship")
+    }
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheets = []
+    for sheet in workbook.iter(f"{NAMESPACE_MAIN}sheet"):
+        target = targets.get(sheet.get(f"{NAMESPACE_REL}id"))
+        if target:
+            sheets.append((sheet.get("name", ""), target))
+    return sheets
+
+
+def _text_of(element) -> str:
+    """Concatenate the text runs of a string item, ignoring phonetic hints."""
+    parts = []
+    for child in element:
+        if child.tag == f"{NAMESPACE_MAIN}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{NAMESPACE_MAIN}r":
+            run_text = child.find(f"{NAMESPACE_MAIN}t")
+            if run_text is not None:
+                parts.append(run_text.text or "")
+    return "".join(parts)
+
+
+def read_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        handle = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings: List[str] = []
+    root = None
+    with handle:
+        for event, element in ElementTree.iterparse(handle, events=("start", "end")):
+            if root is None:
+                root = element
+            elif event == "end" and element.tag == f"{NAMESPACE_MAIN}si":
+                strings.append(_text_of(element))
+                root.clear()
+    return strings
+
+
+def format_number(raw: str) -> str:
+    try:
+        value = float(raw)
+    except ValueError:
+        return raw
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _cell_value(cell, shared_strings: List[str]) -> str:
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        inline = cell.find(f"{NAMESPACE_MAIN}is")
+        return _text_of(inline) if inline is not None else ""
+
+    value = cell.find(f"{NAMESPACE_MAIN}v")
+    if value is None or value.text is None:
+        return ""
+    raw = value.text
+    if cell_type == "s":
+        index = int(raw)
+        return shared_strings[index] if 0 <= index < len(shared_strings) else ""
+    if cell_type == "b":
+        return "TRUE" if raw == "1" else "FALSE"
+    if cell_type in ("str", "e"):
+        return raw
+    return format_number(raw)
+
+
+def select_sheet(sheets: List[Tuple[str, str]], sheet: Optional[Union[str, int]]) -> Tuple[str, str]:
+    if not sheets:
+        raise ValueError("The workbook does not contain any worksheets.")
+    if sheet is None:
+        return sheets[0]
+    if not isinstance(sheet, int):
+        for name, target in sheets:
+            if name == sheet:
+                return name, target
+        for name, target in sheets:
+            if name.strip().lower() == str(sheet).strip().lower():
+                return name, target
+        # A sheet named "2025" is matched by name above; only otherwise is a number an index.
+        if str(sheet).strip().isdigit():
+            sheet = int(sheet)
+    if isinstance(sheet, int):
+        if not 0 <= sheet < len(sheets):
+            raise ValueError(f"Sheet index {sheet} is out of range (0-{len(sheets) - 1}).")
+        return sheets[sheet]
+    available = ", ".join(name for name, _ in sheets)
+    raise ValueError(f"Sheet {sheet!r} not found. Available sheets: {available}")
+
+
+def iter_xlsx_rows(path: Union[str, Path], sheet: Optional[Union[str, int]] = None) -> Iterator[List[str]]:
+    """Yield the rows of ``sheet`` (name or zero-based index; default first) as strings.
+
+    Missing rows and cells are filled with empty strings, and rows are padded to the
+    width declared by the sheet's ``<dimension>``, matching what a CSV export contains.
+    """
+    with zipfile.ZipFile(path) as archive:
+        _, entry = select_sheet(list_sheets(archive), sheet)
+        shared_strings = read_shared_strings(archive)
+
+        expected_row = 1
+        sheet_width = 0
+        sheet_data = None
+        with archive.open(entry) as handle:
+            for event, element in ElementTree.iterparse(handle, events=("start", "end")):
+                if event == "start":
+                    if element.tag == f"{NAMESPACE_MAIN}sheetData":
+                        sheet_data = element
+                    continue
+                if element.tag == f"{NAMESPACE_MAIN}dimension":
+                    sheet_width = dimension_width(element.get("ref", ""))
+                    continue
+                if element.tag != f"{NAMESPACE_MAIN}row":
+                    continue
+
+                row_number = int(element.get("r", expected_row))
+                while expected_row < row_number:
+                    yield [""] * sheet_width
+                    expected_row += 1
+
+                values: Dict[int, str] = {}
+                next_column = 0
+                for cell in element.iter(f"{NAMESPACE_MAIN}c"):
+                    match = CELL_REFERENCE_PATTERN.match(cell.get("r", ""))
+                    column = column_index(match.group(1)) if match else next_column
+                    values[column] = _cell_value(cell, shared_strings)
+                    next_column = column + 1
+                # Drop the finished row from <sheetData> too, or long sheets keep one
+                # empty element per row alive.
+                element.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+                populated = [column for column, value in values.items() if value != ""]
+                width = max(max(populated) + 1 if populated else 0, sheet_width)
+                yield [values.get(column, "") for column in range(width)]
+                expected_row = row_number + 1
@@ -0,0 +1,467 @@
+"""Streaming SpreadsheetML workbook writer built on ``zipfile``.
+
+Worksheets are written row by row straight into their zip entries, so a sheet with
+tens of thousands of rows never exists as one string in memory. Text cells go
+through a shared-strings table and cell styles are deduplicated, so repeated values
+and formats are stored once per workbook.
+
+    with WorkbookWriter("report.xlsx") as book:
+        header = book.styles.add(font={"bold": True})
+        book.add_sheet("Data", [[Cell("Name", header)], ["Alice"]], column_widths=[20])
+"""
+
+import datetime
+import io
+import zipfile
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+NAMESPACE_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NAMESPACE_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NAMESPACE_PACKAGE_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPE_PREFIX = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+PAGE_MARGINS = '<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" header="0.3" footer="0.3"/>'
+INVALID_SHEET_NAME_CHARACTERS = set('[]:*?/\\')
+MAX_SHEET_NAME_LENGTH = 31
+
+
+@lru_cache(maxsize=None)
+def column_letter(idx: int) -> str:
+    result = []
+    while idx:
+        idx, remainder = divmod(idx - 1, 26)
+        result.append(chr(65 + remainder))
+    return ''.join(reversed(result))
+
+
+class Cell(NamedTuple):
+    value: object = None
+    style: int = 0
+
+
+class Row(NamedTuple):
+    cells: Sequence[object]
+    height: Optional[float] = None
+
+
+class DataValidation(NamedTuple):
+    sqref: str
+    formula: str
+    type: str = "list"
+    allow_blank: bool = True
+
+
+def font_xml(size=11, color="FF000000", name="Calibri", family=2, bold=False) -> str:
+    bold_xml = "<b/>" if bold else ""
+    return (
+        f'<font><sz val="{size}"/><color rgb="{color}"/><name val="{name}"/>'
+        f'<family val="{family}"/>{bold_xml}</font>'
+    )
+
+
+def fill_xml(color: Optional[str] = None, pattern: str = "solid") -> str:
+    if color is None:
+        return f'<fill><patternFill patternType="{pattern}"/></fill>'
+    return (
+        f'<fill><patternFill patternType="{pattern}"><fgColor rgb="{color}"/>'
+        f'<bgColor rgb="{color}"/></patternFill></fill>'
+    )
+
+
+def border_xml(color: Optional[str] = None, style: str = "thin") -> str:
+    if color is None:
+        return "<border><left/><right/><top/><bottom/><diagonal/></border>"
+    sides = "".join(
+        f'<{side} style="{style}"><color rgb="{color}"/></{side}>'
+        for side in ("left", "right", "top", "bottom")
+    )
+    return f"<border>{sides}<diagonal/></border>"
+
+
+class StyleRegistry:
+    """Deduplicating registry of fonts, fills, borders and cell formats."""
+
+    def __init__(self) -> None:
+        self.fonts: List[str] = []
+        self.fills: List[str] = []
+        self.borders: List[str] = []
+        self.cell_formats: List[str] = []
+        self._indexes: Dict[Tuple[str, str], int] = {}
+        self._intern("font", self.fonts, font_xml())
+        self._intern("fill", self.fills, fill_xml(pattern="none"))
+        self._intern("fill", self.fills, fill_xml(pattern="gray125"))
+        self._intern("border", self.borders, border_xml())
+        self._intern("xf", self.cell_formats, '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>')
+
+    def _intern(self, kind: str, table: List[str], xml: str) -> int:
+        index = self._indexes.get((kind, xml))
+        if index is None:
+            index = len(table)
+            table.append(xml)
+            self._indexes[(kind, xml)] = index
+        return index
+
+    def add(
+        self,
+        font: Optional[dict] = None,
+        fill: Optional[str] = None,
+        border: Optional[str] = None,
+        horizontal: Optional[str] = None,
+        vertical: Optional[str] = None,
+        wrap: bool = False,
+        number_format: int = 0,
+    ) -> int:
+        """Return the style index for the given format, registering it if it is new.
+
+        ``font`` takes the keyword arguments of ``font_xml``; ``fill`` and ``border`` are
+        ARGB colours for a solid fill and a thin border; ``number_format`` is a built-in
+        SpreadsheetML number format id (for example ``2`` for ``0.00``).
+        """
+        font_id = self._intern("font", self.fonts, font_xml(**font)) if font else 0
+        fill_id = self._intern("fill", self.fills, fill_xml(fill)) if fill else 0
+        border_id = self._intern("border", self.borders, border_xml(border)) if border else 0
+
+        attributes = [
+            f'numFmtId="{number_format}" fontId="{font_id}" fillId="{fill_id}" borderId="{border_id}" xfId="0"'
+        ]
+        if number_format:
+            attributes.append('applyNumberFormat="1"')
+        if font:
+            attributes.append('applyFont="1"')
+        if fill:
+            attributes.append('applyFill="1"')
+        if border:
+            attributes.append('applyBorder="1"')
+
+        alignment = ""
+        if horizontal or vertical or wrap:
+            attributes.append('applyAlignment="1"')
+            parts = []
+            if horizontal:
+                parts.append(f'horizontal="{horizontal}"')
+            if vertical:
+                parts.append(f'vertical="{vertical}"')
+            if wrap:
+                parts.append('wrapText="1"')
+            alignment = f"<alignment {' '.join(parts)}/>"
+
+        if alignment:
+            xml = f"<xf {' '.join(attributes)}>{alignment}</xf>"
+        else:
+            xml = f"<xf {' '.join(attributes)}/>"
+        return self._intern("xf", self.cell_formats, xml)
+
+    def to_xml(self) -> str:
+        def block(tag: str, items: List[str]) -> str:
+            return f'  <{tag} count="{len(items)}">' + "".join(items) + f"</{tag}>"
+
+        parts = [
+            XML_HEADER,
+            f'<styleSheet xmlns="{NAMESPACE_MAIN}">',
+            block("fonts", self.fonts),
+            block("fills", self.fills),
+            block("borders", self.borders),
+            '  <cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>',
+            block("cellXfs", self.cell_formats),
+            '  <cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>',
+            "</styleSheet>",
+        ]
+        return "\n".join(parts)
+
+
+class SharedStrings:
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.references = 0
+
+    def index(self, value: str) -> int:
+        self.references += 1
+        index = self.ids.get(value)
+        if index is None:
+            index = len(self.values)
+            self.ids[value] = index
+            self.values.append(value)
+        return index
+
+    def write(self, handle) -> None:
+        handle.write(XML_HEADER)
+        handle.write(
+            f'<sst xmlns="{NAMESPACE_MAIN}" count="{self.references}" uniqueCount="{len(self.values)}">'
+        )
+        for value in self.values:
+            handle.write(f'<si><t xml:space="preserve">{escape(value)}</t></si>')
+        handle.write("</sst>")
+
+
+def sanitize_sheet_name(name: str, used: Iterable[str] = ()) -> str:
+    cleaned = "".join("_" if ch in INVALID_SHEET_NAME_CHARACTERS else ch for ch in str(name))
+    cleaned = cleaned.strip("'").strip() or "Sheet"
+    cleaned = cleaned[:MAX_SHEET_NAME_LENGTH]
+    taken = {existing.lower() for existing in used}
+    candidate = cleaned
+    suffix = 2
+    while candidate.lower() in taken:
+        tail = f" ({suffix})"
+        candidate = cleaned[: MAX_SHEET_NAME_LENGTH - len(tail)] + tail
+        suffix += 1
+    return candidate
+
+
+class WorkbookWriter:
+    """Write an .xlsx workbook one sheet, and one row, at a time."""
+
+    def __init__(self, path, creator: str = "Timetable Matrix Tools") -> None:
+        self.path = path
+        self.creator = creator
+        self.styles = StyleRegistry()
+        self.shared_strings = SharedStrings()
+        self.sheet_names: List[str] = []
+        self.sheet_order: List[int] = []
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def __enter__(self) -> "WorkbookWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+
+    def _cell_xml(self, ref: str, cell) -> str:
+        if isinstance(cell, Cell):
+            value, style = cell
+        else:
+            value, style = cell, 0
+        style_attr = f' s="{style}"' if style else ""
+
+        if value is None or value == "":
+            return f'<c r="{ref}"{style_attr}/>' if style else ""
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float)):
+            return f'<c r="{ref}"{style_attr}><v>{value!r}</v></c>'
+        index = self.shared_strings.index(str(value))
+        return f'<c r="{ref}"{style_attr} t="s"><v>{index}</v></c>'
+
+    def add_sheet(
+        self,
+        name: str,
+        rows: Iterable[Union[Row, Sequence[object]]],
+        column_widths: Sequence[float] = (),
+        freeze_header: bool = False,
+        show_grid_lines: bool = True,
+        merge_cells: Sequence[str] = (),
+        data_validations: Sequence[DataValidation] = (),
+    ) -> str:
+        """Stream ``rows`` into a new worksheet and return the sheet's final name.
+
+        Each row is a ``Row`` or a plain sequence of cells; a cell is a ``Cell`` or a
+        bare value. Empty unstyled cells are skipped.
+        """
+        sheet_name = sanitize_sheet_name(name, self.sheet_names)
+        self.sheet_names.append(sheet_name)
+        self.sheet_order.append(len(self.sheet_names) - 1)
+        entry = f"xl/worksheets/sheet{len(self.sheet_names)}.xml"
+
+        with self._zip.open(entry, "w", force_zip64=True) as raw:
+            handle = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            grid = "" if show_grid_lines else ' showGridLines="0"'
+            handle.write(XML_HEADER)
+            handle.write(f'<worksheet xmlns="{NAMESPACE_MAIN}" xmlns:r="{NAMESPACE_REL}">\n')
+            handle.write(f'  <sheetViews><sheetView workbookViewId="0"{grid}>')
+            if freeze_header:
+                handle.write(
+                    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                    '<selection pane="bottomLeft" activeCell="A2" sqref="A2"/>'
+                )
+            else:
+                handle.write('<selection activeCell="A1" sqref="A1"/>')
+            handle.write("</sheetView></sheetViews>\n")
+            handle.write('  <sheetFormatPr defaultRowHeight="15"/>\n')
+            if column_widths:
+                cols = "".join(
+                    f'<col min="{idx}" max="{idx}" width="{width}" customWidth="1"/>'
+                    for idx, width in enumerate(column_widths, start=1)
+                )
+                handle.write(f"  <cols>{cols}</cols>\n")
+
+            handle.write("  <sheetData>\n")
+            for row_idx, row in enumerate(rows, start=1):
+                height = None
+                if isinstance(row, Row):
+                    row, height = row.cells, row.height
+                cells = "".join(
+                    self._cell_xml(f"{column_letter(col_idx)}{row_idx}", cell)
+                    for col_idx, cell in enumerate(row, start=1)
+                )
+                height_attr = f' ht="{height}" customHeight="1"' if height else ""
+                handle.write(f'  <row r="{row_idx}"{height_attr}>{cells}</row>\n')
+            handle.write("  </sheetData>\n")
+
+            if merge_cells:
+                merges = "".join(f'<mergeCell ref="{ref}"/>' for ref in merge_cells)
+                handle.write(f'  <mergeCells count="{len(merge_cells)}">{merges}</mergeCells>\n')
+            if data_validations:
+                handle.write(f'  <dataValidations count="{len(data_validations)}">')
+                for validation in data_validations:
+                    allow_blank = "1" if validation.allow_blank else "0"
+                    handle.write(
+                        f'<dataValidation type="{validation.type}" allowBlank="{allow_blank}" '
+                        f'showInputMessage="1" showErrorMessage="1" sqref="{validation.sqref}">'
+                        f"<formula1>{escape(validation.formula)}</formula1></dataValidation>"
+                    )
+                handle.write("</dataValidations>\n")
+            handle.write(f"  {PAGE_MARGINS}\n")
+            handle.write("</worksheet>")
+            handle.flush()
+            handle.detach()
+
+        return sheet_name
+
+    def move_sheet_to_front(self, sheet_index: int) -> None:
+        """Show the sheet added at ``sheet_index`` as the first tab."""
+        self.sheet_order.remove(sheet_index)
+        self.sheet_order.insert(0, sheet_index)
+
+    def close(self) -> None:
+        with self._zip.open("xl/sharedStrings.xml", "w", force_zip64=True) as raw:
+            handle = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+            self.shared_strings.write(handle)
+            handle.flush()
+            handle.detach()
+
+        self._zip.writestr("[Content_Types].xml", build_content_types(len(self.sheet_names)))
+        self._zip.writestr("_rels/.rels", build_root_rels())
+        ordered_names = [self.sheet_names[index] for index in self.sheet_order]
+        self._zip.writestr("docProps/app.xml", build_app_xml(ordered_names))
+        self._zip.writestr("docProps/core.xml", build_core_xml(self.creator))
+        self._zip.writestr("xl/workbook.xml", build_workbook_xml(self.sheet_names, self.sheet_order))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", build_workbook_rels(len(self.sheet_names)))
+        self._zip.writestr("xl/styles.xml", self.styles.to_xml())
+        self._zip.close()
+
+
+def build_content_types(sheet_count: int) -> str:
+    sheet_overrides = [
+        f'  <Override PartName="/xl/worksheets/sheet{idx}.xml" ContentType="{CONTENT_TYPE_PREFIX}.worksheet+xml"/>'
+        for idx in range(1, sheet_count + 1)
+    ]
+    parts = [
+        XML_HEADER,
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+        '  <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>',
+        '  <Default Extension="xml" ContentType="application/xml"/>',
+        f'  <Override PartName="/xl/workbook.xml" ContentType="{CONTENT_TYPE_PREFIX}.sheet.main+xml"/>',
+        *sheet_overrides,
+        f'  <Override PartName="/xl/styles.xml" ContentType="{CONTENT_TYPE_PREFIX}.styles+xml"/>',
+        f'  <Override PartName="/xl/sharedStrings.xml" ContentType="{CONTENT_TYPE_PREFIX}.sharedStrings+xml"/>',
+        '  <Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>',
+        '  <Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>',
+        '</Types>'
+    ]
+    return '\n'.join(parts)
+
+
+def build_root_rels() -> str:
+    parts = [
+        XML_HEADER,
+        f'<Relationships xmlns="{NAMESPACE_PACKAGE_REL}">',
+        '  <Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>',
+        '  <Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>',
+        '  <Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>',
+        '</Relationships>'
+    ]
+    return '\n'.join(parts)
+
+
+def build_app_xml(sheet_names) -> str:
+    vector_entries = ''.join(f'<vt:lpstr>{escape(name)}</vt:lpstr>' for name in sheet_names)
+    parts = [
+        XML_HEADER,
+        '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">',
+        '  <Application>Microsoft Excel</Application>',
+        '  <DocSecurity>0</DocSecurity>',
+        '  <ScaleCrop>false</ScaleCrop>',
+        '  <HeadingPairs>',
+        '    <vt:vector size="2" baseType="variant">',
+        '      <vt:variant><vt:lpstr>Worksheets</vt:lpstr></vt:variant>',
+        f'      <vt:variant><vt:i4>{len(sheet_names)}</vt:i4></vt:variant>',
+        '    </vt:vector>',
+        '  </HeadingPairs>',
+        '  <TitlesOfParts>',
+        f'    <vt:vector size="{len(sheet_names)}" baseType="lpstr">{vector_entries}</vt:vector>',
+        '  </TitlesOfParts>',
+        '  <Company></Company>',
+        '  <LinksUpToDate>false</LinksUpToDate>',
+        '  <SharedDoc>false</SharedDoc>',
+        '  <HyperlinksChanged>false</HyperlinksChanged>',
+        '  <AppVersion>16.0300</AppVersion>',
+        '</Properties>'
+    ]
+    return '\n'.join(parts)
+
+
+def build_core_xml(creator: str) -> str:
+    timestamp = (
+        datetime.datetime.now(datetime.timezone.utc)
+        .replace(microsecond=0)
+        .isoformat()
+        .replace('+00:00', 'Z')
+    )
+    parts = [
+        XML_HEADER,
+        '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" xmlns:dcmitype="http://purl.org/dc/dcmitype/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">',
+        f'  <dc:creator>{escape(creator)}</dc:creator>',
+        f'  <cp:lastModifiedBy>{escape(creator)}</cp:lastModifiedBy>',
+        f'  <dcterms:created xsi:type="dcterms:W3CDTF">{timestamp}</dcterms:created>',
+        f'  <dcterms:modified xsi:type="dcterms:W3CDTF">{timestamp}</dcterms:modified>',
+        '</cp:coreProperties>'
+    ]
+    return '\n'.join(parts)
+
+
+def build_workbook_xml(sheet_names, sheet_order=None) -> str:
+    if sheet_order is None:
+        sheet_order = range(len(sheet_names))
+    sheet_entries = [
+        f'    <sheet name={quoteattr(sheet_names[index])} sheetId="{index + 1}" r:id="rId{index + 1}"/>'
+        for index in sheet_order
+    ]
+    parts = [
+        XML_HEADER,
+        f'<workbook xmlns="{NAMESPACE_MAIN}" xmlns:r="{NAMESPACE_REL}">',
+        '  <fileVersion appName="xl" lastEdited="7" lowestEdited="7" rupBuild="22228"/>',
+        '  <workbookPr defaultThemeVersion="164011"/>',
+        '  <bookViews>',
+        '    <workbookView xWindow="0" yWindow="0" windowWidth="28800" windowHeight="16380" activeTab="0"/>',
+        '  </bookViews>',
+        '  <sheets>',
+        *sheet_entries,
+        '  </sheets>',
+        '</workbook>'
+    ]
+    return '\n'.join(parts)
+
+
+def build_workbook_rels(sheet_count: int) -> str:
+    rel_entries = [
+        f'  <Relationship Id="rId{idx}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{idx}.xml"/>'
+        for idx in range(1, sheet_count + 1)
+    ]
+    rel_entries.append(
+        f'  <Relationship Id="rId{sheet_count + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    )
+    rel_entries.append(
+        f'  <Relationship Id="rId{sheet_count + 2}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+    )
+    parts = [
+        XML_HEADER,
+        f'<Relationships xmlns="{NAMESPACE_PACKAGE_REL}">',
+        *rel_entries,
+        '</Relationships>'
+    ]
+    return '\n'.join(parts)